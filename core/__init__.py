@@ -2,5 +2,19 @@
 # Init for core package
 #-------------------------------------------------------------------------------
 
-from core.lepton import *
-from core.inference import *
\ No newline at end of file
+# the camera and inference modules import flirpy and OpenCV, so their
+# names are imported on first use rather than with the package (which
+# is imported by every core module, e.g. 'from core import metrics')
+_lazy_modules = ("core.lepton", "core.inference")
+
+
+def __getattr__(name):
+    import importlib.util
+    # 'from core import metrics' looks up the submodule name here
+    # before importing it
+    if not name.startswith("_") and importlib.util.find_spec("core." + name) is None:
+        for module_name in _lazy_modules:
+            module = importlib.import_module(module_name)
+            if hasattr(module, name):
+                return getattr(module, name)
+    raise AttributeError("module 'core' has no attribute '{}'".format(name))
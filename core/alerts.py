@@ -0,0 +1,454 @@
+"""
+Alerts for faces over the temperature threshold.
+
+The alert engine runs an asyncio event loop in its own thread.
+Faces are submitted from the monitor thread without blocking,
+matched to the people seen in earlier frames, and alerts are
+raised per person:
+    - the first time a person is seen over the threshold
+    - again once the debounce period has passed while they
+      are still over the threshold
+    - escalated from a person's escalate_after-th alert onwards
+      (with escalate_after = 1 every alert is escalated)
+
+Alerts are sent to each sink (audio, log, webhook, file...)
+concurrently. Each sink has its own queue, so a slow or failing
+sink delays neither the monitor nor the other sinks. Blocking
+sinks are run in the loop's thread pool.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import threading
+import asyncio
+import logging
+import json
+import time
+
+# module imports
+from core import metrics
+
+
+# seconds before a person is alerted for again
+ALERT_DEBOUNCE = 2.0
+
+# seconds a person can be unseen before they are forgotten
+TRACK_TIMEOUT = 5.0
+
+ALERTS_RAISED = metrics.counter(
+    "fever_monitor_alerts_total", "Alerts raised for people over the temperature threshold.")
+ALERTS_SENT = metrics.counter(
+    "fever_monitor_alerts_sent_total", "Alerts sent by each alert sink.", labelnames=("sink",))
+ALERT_SINK_ERRORS = metrics.counter(
+    "fever_monitor_alert_sink_errors_total", "Alerts each alert sink failed to send.", labelnames=("sink",))
+
+
+class Alert:
+    """
+    Alert raised for a person over the temperature threshold.
+    """
+    __slots__ = ('person_id', 'timestamp', 'temp', 'temp_unit', 'detection', 'count', 'escalated', 'face')
+
+    def __init__(self, person_id, timestamp, temp, temp_unit, detection, count, escalated, face=None):
+        self.person_id = person_id
+        self.timestamp = timestamp
+        self.temp = temp
+        self.temp_unit = temp_unit
+        self.detection = detection
+        self.count = count
+        self.escalated = escalated
+        self.face = face
+
+    def to_dict(self):
+        """
+        Returns the alert as a dict that can be written as JSON.
+
+        Returns:
+            [dict] alert data (without the face image)
+        """
+        d = self.detection
+        return {
+            "person_id": self.person_id,
+            "timestamp": self.timestamp,
+            "temp": float(self.temp),
+            "temp_unit": self.temp_unit,
+            "x": int(d.x),
+            "y": int(d.y),
+            "w": int(d.w),
+            "h": int(d.h),
+            "confidence": float(d.confidence),
+            "count": self.count,
+            "escalated": self.escalated}
+
+
+class AlertSink:
+    """
+    Destination alerts are sent to.
+
+    Sinks override send, a coroutine run on the alert engine's
+    event loop. Sinks that block override send_blocking instead,
+    which is run in the loop's thread pool.
+    """
+    name = "sink"
+
+    # number of alerts queued before alerts are dropped
+    max_queued_alerts = 100
+
+    async def send(self, alert):
+        """
+        Sends an alert.
+
+        Params:
+            alert: [Alert] alert raised
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.send_blocking, alert)
+
+    def send_blocking(self, alert):
+        """
+        Sends an alert, blocking until it is sent.
+
+        Params:
+            alert: [Alert] alert raised
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases any resources held by the sink.
+        """
+        pass
+
+
+class CallbackSink(AlertSink):
+    """
+    Calls a function with each alert, such as playing a sound.
+    """
+    name = "callback"
+
+    def __init__(self, callback, name=None):
+        self._callback = callback
+        if name is not None:
+            self.name = name
+
+    def send_blocking(self, alert):
+        self._callback(alert)
+
+
+class LogSink(AlertSink):
+    """
+    Writes each alert to a logger.
+    """
+    name = "log"
+
+    def __init__(self, logger=None):
+        self._logger = logger if logger is not None else logging.getLogger(__name__)
+
+    async def send(self, alert):
+        self._logger.warning("{}temperature alert: person {} at {:.1f} {} (alert {})".format(
+            "ESCALATED " if alert.escalated else "", alert.person_id, alert.temp, alert.temp_unit, alert.count))
+
+
+class FileSink(AlertSink):
+    """
+    Appends each alert to a file as a line of JSON.
+    """
+    name = "file"
+
+    def __init__(self, file_path):
+        self._file = open(file_path, "a")
+
+    def send_blocking(self, alert):
+        self._file.write(json.dumps(alert.to_dict()) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink(AlertSink):
+    """
+    Posts each alert as JSON to a URL.
+    """
+    name = "webhook"
+
+    def __init__(self, url, timeout=5.0):
+        self._url = url
+        self._timeout = timeout
+
+    def send_blocking(self, alert):
+        # imported on first use as urllib.request is slow to import
+        import urllib.request
+        request = urllib.request.Request(
+            self._url,
+            data=json.dumps(alert.to_dict()).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST")
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            response.read()
+
+
+class _Person:
+    """
+    Person over the threshold matched across frames.
+    """
+    __slots__ = ('person_id', 'x', 'y', 'size', 'last_seen', 'last_alert', 'count')
+
+    def __init__(self, person_id):
+        self.person_id = person_id
+        self.x = 0.0
+        self.y = 0.0
+        self.size = 0.0
+        self.last_seen = 0.0
+        self.last_alert = None
+        self.count = 0
+
+
+class AlertEngine:
+    """
+    Raises alerts for faces over the temperature threshold and
+    sends them to sinks from a background event loop.
+    """
+
+    def __init__(self, sinks, debounce=ALERT_DEBOUNCE, escalate_after=3, track_timeout=TRACK_TIMEOUT,
+                 max_queued_frames=100):
+        """
+        Creates the alert engine.
+
+        Params:
+            sinks: [list] AlertSink objects alerts are sent to
+            debounce: [float] seconds before a person is alerted for again
+            escalate_after: [int] number of the first alert for a person
+                that is escalated, later alerts are also escalated (1
+                escalates every alert, 0 never escalates)
+            track_timeout: [float] seconds a person can be unseen before
+                they are forgotten
+            max_queued_frames: [int] number of frames that can be queued
+                before frames are dropped
+
+        Raises:
+            AssertionError: assertions fail
+        """
+        assert (debounce >= 0 and escalate_after >= 0 and track_timeout > 0 and max_queued_frames >= 1), \
+            "Debounce, escalation, timeout and queue size must be valid positive values."
+        self._sinks = list(sinks)
+        self._debounce = debounce
+        self._escalate_after = escalate_after
+        self._track_timeout = track_timeout
+        self._max_queued_frames = max_queued_frames
+        self._people = []
+        self._next_person_id = 0
+        self._alert_count = 0
+        self._dropped_frames = 0
+        self._dropped_alerts = 0
+        self._loop = None
+        self._frames = None
+        self._thread = None
+        self._started = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Starts the event loop in a background thread.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="AlertEngine", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self, timeout=5.0):
+        """
+        Sends any queued alerts, stops the event loop and closes
+        the sinks.
+
+        Params:
+            timeout: [float] seconds to wait for queued alerts
+        """
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._frames.put(None), self._loop)
+            self._thread.join(timeout)
+        self._thread = None
+        for sink in self._sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def is_running(self):
+        """
+        Returns True if the engine is running.
+
+        Returns:
+            [bool] True if running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, faces, temp_unit="Celsius", timestamp=None):
+        """
+        Queues the faces detected in a frame.
+
+        Does not block. If the engine has fallen behind and its
+        queue is full, the frame is dropped and counted (see
+        get_dropped_frames).
+
+        Params:
+            faces: [list] Face objects detected in the frame
+            temp_unit: [string] unit of the face temperatures
+            timestamp: [float] time the frame was captured
+                (defaults to the current time)
+
+        Raises:
+            AssertionError: engine not started
+        """
+        assert (self.is_running()), \
+            "Alert engine is not running."
+        faces = [f for f in faces if f.over_threshold]
+        if not faces:
+            return
+        item = (time.time() if timestamp is None else timestamp, temp_unit, faces)
+        self._loop.call_soon_threadsafe(self._queue_frame, item)
+
+    def _queue_frame(self, item):
+        try:
+            self._frames.put_nowait(item)
+        except asyncio.QueueFull:
+            self._dropped_frames += 1
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        """
+        Raises alerts for the frames queued and sends them to a
+        queue per sink until the engine is stopped.
+        """
+        self._frames = asyncio.Queue(maxsize=self._max_queued_frames)
+        sink_queues = [asyncio.Queue(maxsize=sink.max_queued_alerts) for sink in self._sinks]
+        senders = [asyncio.ensure_future(self._send_loop(sink, q)) for sink, q in zip(self._sinks, sink_queues)]
+        self._started.set()
+
+        while True:
+            item = await self._frames.get()
+            if item is None:
+                break
+            for alert in self._raise_alerts(*item):
+                for q in sink_queues:
+                    try:
+                        q.put_nowait(alert)
+                    except asyncio.QueueFull:
+                        self._dropped_alerts += 1
+
+        # let each sink send the alerts queued
+        for q in sink_queues:
+            q.put_nowait(None)
+        await asyncio.gather(*senders)
+
+    async def _send_loop(self, sink, q):
+        """
+        Sends the alerts queued for a sink, one at a time.
+        """
+        while True:
+            alert = await q.get()
+            if alert is None:
+                return
+            try:
+                await sink.send(alert)
+                ALERTS_SENT.labels(sink.name).inc()
+            except Exception:
+                ALERT_SINK_ERRORS.labels(sink.name).inc()
+
+    def _raise_alerts(self, timestamp, temp_unit, faces):
+        """
+        Matches faces to people and applies the debounce and
+        escalation rules.
+
+        Returns:
+            [list] Alert objects raised
+        """
+        # forget people who have left
+        self._people = [p for p in self._people if timestamp - p.last_seen <= self._track_timeout]
+
+        alerts = []
+        unmatched = list(self._people)
+        for face in faces:
+            d = face.detection
+            x, y, size = d.x + d.w / 2, d.y + d.h / 2, max(d.w, d.h)
+
+            # match the closest person within a face width of the face
+            person, best = None, None
+            for p in unmatched:
+                distance = ((p.x - x) ** 2 + (p.y - y) ** 2) ** 0.5
+                if distance <= max(p.size, size) and (best is None or distance < best):
+                    person, best = p, distance
+            if person is None:
+                person = _Person(self._next_person_id)
+                self._next_person_id += 1
+                self._people.append(person)
+            else:
+                unmatched.remove(person)
+            person.x, person.y, person.size, person.last_seen = x, y, size, timestamp
+
+            if person.last_alert is not None and timestamp - person.last_alert < self._debounce:
+                continue
+            person.last_alert = timestamp
+            person.count += 1
+            self._alert_count += 1
+            ALERTS_RAISED.inc()
+            alerts.append(Alert(
+                person_id=person.person_id,
+                timestamp=timestamp,
+                temp=face.temp,
+                temp_unit=temp_unit,
+                detection=d,
+                count=person.count,
+                escalated=0 < self._escalate_after <= person.count,
+                face=face))
+        return alerts
+
+    def get_alert_count(self):
+        """
+        Returns the number of alerts raised.
+
+        Returns:
+            [int] number of alerts raised
+        """
+        return self._alert_count
+
+    def get_dropped_frames(self):
+        """
+        Returns the number of frames dropped because the queue
+        was full.
+
+        Returns:
+            [int] number of frames dropped
+        """
+        return self._dropped_frames
+
+    def get_dropped_alerts(self):
+        """
+        Returns the number of alerts dropped because a sink's
+        queue was full.
+
+        Returns:
+            [int] number of alerts dropped
+        """
+        return self._dropped_alerts
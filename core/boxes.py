@@ -0,0 +1,220 @@
+"""
+Bounding box functions.
+
+Operates on arrays of boxes with shape [N, 4], where each
+row is a top-left x, top-left y, width and height box. All
+boxes are processed at once using NumPy, avoiding a Python
+call per box.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import numpy as np
+
+
+def to_box_array(boxes):
+    """
+    Returns boxes as an integer array with shape [N, 4].
+
+    Params:
+        boxes: [list] or [np.ndarray] (x, y, w, h) boxes
+
+    Returns:
+        [np.ndarray] int array of boxes with shape [N, 4]
+
+    Raises:
+        AssertionError: assertion failed
+    """
+    arr = np.asarray(boxes).reshape(-1, 4)
+    assert (arr.shape[1] == 4), \
+        "Boxes must have 4 values (x, y, w, h)."
+    return arr.astype(int)
+
+
+def clip_boxes(boxes, width, height):
+    """
+    Sets box coordinates to be within the bounds of an image.
+
+    Array equivalent of image_processing.keep_box_within_bounds:
+    out-of-bounds coordinates are set to the closest in-bounds
+    value and boxes are kept within the last row and column.
+
+    Params:
+        boxes: [np.ndarray] int array of boxes with shape [N, 4]
+        width: [int] width of the image
+        height: [int] height of the image
+
+    Returns:
+        [np.ndarray] int array of clipped boxes with shape [N, 4]
+    """
+    max_x = width - 1
+    max_y = height - 1
+
+    x = np.clip(boxes[:, 0], 0, max_x)
+    y = np.clip(boxes[:, 1], 0, max_y)
+    right = np.minimum(boxes[:, 0] + boxes[:, 2], max_x)
+    bottom = np.minimum(boxes[:, 1] + boxes[:, 3], max_y)
+
+    return np.stack([x,
+                     y,
+                     np.clip(right - x, 0, None),
+                     np.clip(bottom - y, 0, None)], axis=1)
+
+
+def expand_boxes(boxes, x_zoom_out=0.33, y_zoom_out=0.33):
+    """
+    Zooms out of boxes by a percentage of their size.
+
+    Boxes are expanded equally on each side and may be left
+    out-of-bounds, so should be clipped afterwards.
+
+    Params:
+        boxes: [np.ndarray] int array of boxes with shape [N, 4]
+        x_zoom_out: [float] zoom-out percentage for the width of the boxes
+        y_zoom_out: [float] zoom-out percentage for the height of the boxes
+
+    Returns:
+        [np.ndarray] int array of expanded boxes with shape [N, 4]
+    """
+    x_zoom = np.ceil(boxes[:, 2] * x_zoom_out).astype(int)
+    y_zoom = np.ceil(boxes[:, 3] * y_zoom_out).astype(int)
+
+    return np.stack([boxes[:, 0] - x_zoom // 2,
+                     boxes[:, 1] - y_zoom // 2,
+                     boxes[:, 2] + x_zoom,
+                     boxes[:, 3] + y_zoom], axis=1)
+
+
+def shrink_boxes(boxes, shrink=0.2):
+    """
+    Shrinks boxes by a percentage of their size, keeping each
+    box at least 1 pixel wide and high.
+
+    Boxes are shrunk equally on each side, so shrunk boxes stay
+    within the bounds of the original boxes.
+
+    Params:
+        boxes: [np.ndarray] int array of boxes with shape [N, 4]
+        shrink: [float] shrink percentage of the width and height
+
+    Returns:
+        [np.ndarray] int array of shrunk boxes with shape [N, 4]
+    """
+    w = np.maximum(np.round(boxes[:, 2] * (1 - shrink)).astype(int), 1)
+    h = np.maximum(np.round(boxes[:, 3] * (1 - shrink)).astype(int), 1)
+
+    return np.stack([boxes[:, 0] + (boxes[:, 2] - w) // 2,
+                     boxes[:, 1] + (boxes[:, 3] - h) // 2,
+                     w,
+                     h], axis=1)
+
+
+def box_area(boxes):
+    """
+    Returns the area of each box.
+
+    Params:
+        boxes: [np.ndarray] array of boxes with shape [N, 4]
+
+    Returns:
+        [np.ndarray] area of each box with shape [N]
+    """
+    return np.clip(boxes[:, 2], 0, None) * np.clip(boxes[:, 3], 0, None)
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Returns the intersection over union of every pair of boxes.
+
+    Params:
+        boxes_a: [np.ndarray] array of boxes with shape [N, 4]
+        boxes_b: [np.ndarray] array of boxes with shape [M, 4]
+
+    Returns:
+        [np.ndarray] float array of IoU values with shape [N, M]
+    """
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 0] + boxes_a[:, None, 2], boxes_b[None, :, 0] + boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 1] + boxes_a[:, None, 3], boxes_b[None, :, 1] + boxes_b[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = box_area(boxes_a)[:, None] + box_area(boxes_b)[None, :] - intersection
+    return intersection / np.maximum(union, np.finfo(np.float32).eps)
+
+
+def non_max_suppression(boxes, scores, iou_threshold, class_ids=None, top_k=0):
+    """
+    Returns the boxes kept by greedy non-maximum suppression.
+
+    Boxes are visited from the highest score down, and a box is
+    kept unless its IoU with a box already kept is greater than
+    the threshold. Each step compares one kept box with all the
+    boxes remaining at once, so the Python loop runs once per box
+    kept rather than once per pair of boxes. Boxes with equal
+    scores are visited in index order, as cv2.dnn.NMSBoxes does.
+
+    Params:
+        boxes: [np.ndarray] array of boxes with shape [N, 4]
+        scores: [np.ndarray] score of each box with shape [N]
+        iou_threshold: [float] maximum IoU of a box kept with a
+            box of a higher score
+        class_ids: [np.ndarray] class of each box with shape [N],
+            boxes of different classes do not suppress each other
+            (optional, all boxes are compared if not passed)
+        top_k: [int] number of highest scoring boxes considered
+            (0 considers every box)
+
+    Returns:
+        [np.ndarray] int array of the indexes of the boxes kept,
+        highest score first
+
+    Raises:
+        AssertionError: assertion failed
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores).reshape(-1)
+    assert (len(boxes) == len(scores)), \
+        "A score must be passed for each box."
+    assert (top_k >= 0), \
+        "Top k must be greater than or equal to 0."
+
+    order = np.argsort(-scores, kind='stable')
+    if top_k:
+        order = order[:top_k]
+    boxes = boxes[order]
+
+    x1 = boxes[:, 0]
+    y1 = boxes[:, 1]
+    # move each class to its own region along the x axis, so boxes
+    # of different classes never overlap
+    if class_ids is not None and len(boxes):
+        span = (x1 + np.clip(boxes[:, 2], 0, None)).max() - x1.min() + 1
+        x1 = x1 + np.asarray(class_ids).reshape(-1)[order] * span
+    x2 = x1 + boxes[:, 2]
+    y2 = y1 + boxes[:, 3]
+    area = box_area(boxes)
+
+    keep = []
+    remaining = np.arange(len(boxes))
+    while remaining.size:
+        i = remaining[0]
+        keep.append(i)
+        remaining = remaining[1:]
+        intersection = (np.clip(np.minimum(x2[i], x2[remaining]) - np.maximum(x1[i], x1[remaining]), 0, None)
+                        * np.clip(np.minimum(y2[i], y2[remaining]) - np.maximum(y1[i], y1[remaining]), 0, None))
+        total_area = area[i] + area[remaining]
+        iou = intersection / np.maximum(total_area - intersection, np.finfo(np.float32).eps)
+        # round the IoU as cv2.dnn.NMSBoxes does, so both keep the
+        # same boxes at the threshold (boxes with no area suppress
+        # each other, also as in NMSBoxes)
+        overlap = np.float32(1) - (1 - iou).astype(np.float32)
+        remaining = remaining[(overlap <= np.float32(iou_threshold)) & (total_area > 0)]
+    return order[np.array(keep, dtype=int)]
@@ -0,0 +1,263 @@
+"""
+Stores screening results in an SQLite database.
+
+Faces are queued by record and written by a background
+thread in batched transactions, so recording results at the
+full frame rate does not slow down the fever monitor. The
+database uses write-ahead logging (WAL) so it can be read
+while results are written.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import threading
+import sqlite3
+import queue
+import time
+import io
+
+
+# screening record table
+CREATE_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    frame_id INTEGER NOT NULL,
+    face_id INTEGER NOT NULL,
+    temp REAL NOT NULL,
+    temp_unit TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    w INTEGER NOT NULL,
+    h INTEGER NOT NULL,
+    over_threshold INTEGER NOT NULL,
+    thumbnail BLOB)"""
+
+INSERT_EVENT = """
+INSERT INTO events (timestamp, frame_id, face_id, temp, temp_unit, confidence,
+                    x, y, w, h, over_threshold, thumbnail)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# columns of the records returned by EventStore.get_events
+EVENT_COLUMNS = (
+    "id", "timestamp", "frame_id", "face_id", "temp", "temp_unit", "confidence",
+    "x", "y", "w", "h", "over_threshold", "thumbnail")
+
+
+class EventStore:
+    """
+    SQLite screening record store with a background writer.
+    """
+
+    def __init__(self, db_path, batch_size=64, flush_interval=1.0, save_thumbnails=False, max_queued_frames=1000):
+        """
+        Opens (or creates) the database and starts the writer.
+
+        Params:
+            db_path: [string] path to the SQLite database file
+            batch_size: [int] number of records written per transaction
+            flush_interval: [float] seconds before queued records are
+                written when there are less than batch_size records
+            save_thumbnails: [bool] set to True to store face images
+                as PNG files
+            max_queued_frames: [int] number of frames that can be queued
+                before frames are dropped
+
+        Raises:
+            AssertionError: assertions fail
+            sqlite3.Error: failed opening the database
+        """
+        assert (batch_size >= 1 and flush_interval > 0 and max_queued_frames >= 1), \
+            "Batch size, flush interval and queue size must be valid positive values."
+        self._db_path = db_path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._save_thumbnails = save_thumbnails
+        self._queue = queue.Queue(maxsize=max_queued_frames)
+        self._frame_id = 0
+        self._dropped_frames = 0
+        self._written = 0
+        self._error = None
+        self._closed = False
+
+        # create the database before returning so errors are raised here
+        connection = self._connect()
+        connection.close()
+
+        self._thread = threading.Thread(target=self._write_loop, name="EventStoreWriter", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connect(self):
+        """
+        Opens a connection to the database, creating the events
+        table if it does not exist.
+
+        Returns:
+            [sqlite3.Connection] database connection
+        """
+        connection = sqlite3.connect(self._db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(CREATE_EVENTS_TABLE)
+        connection.commit()
+        return connection
+
+    def record(self, faces, temp_unit="Celsius", timestamp=None):
+        """
+        Queues the faces detected in a frame to be written.
+
+        Does not block. If the writer has fallen behind and the
+        queue is full, the frame is dropped and counted (see
+        get_dropped_frames).
+
+        Params:
+            faces: [list] Face objects detected in the frame
+            temp_unit: [string] unit of the face temperatures
+            timestamp: [float] time the frame was captured
+                (defaults to the current time)
+
+        Raises:
+            AssertionError: store closed
+        """
+        assert (not self._closed), \
+            "Event store is closed."
+        if not faces:
+            return
+        self._frame_id += 1
+        try:
+            self._queue.put_nowait((time.time() if timestamp is None else timestamp,
+                                    self._frame_id, temp_unit, list(faces)))
+        except queue.Full:
+            self._dropped_frames += 1
+
+    def _to_rows(self, item):
+        """
+        Converts a queued frame to database rows.
+        """
+        timestamp, frame_id, temp_unit, faces = item
+        rows = []
+        for face_id, face in enumerate(faces):
+            thumbnail = None
+            if self._save_thumbnails and face.img is not None:
+                buffer = io.BytesIO()
+                face.img.save(buffer, format="PNG")
+                thumbnail = buffer.getvalue()
+            d = face.detection
+            rows.append((timestamp, frame_id, face_id, float(face.temp), temp_unit, float(d.confidence),
+                         int(d.x), int(d.y), int(d.w), int(d.h), int(bool(face.over_threshold)), thumbnail))
+        return rows
+
+    def _write_loop(self):
+        """
+        Writes queued frames in batched transactions until the
+        store is closed.
+        """
+        connection = None
+        try:
+            connection = self._connect()
+            rows = []
+            last_write = time.monotonic()
+            stop = False
+            while not stop:
+                try:
+                    item = self._queue.get(timeout=self._flush_interval)
+                    if item is None:
+                        stop = True
+                    else:
+                        rows.extend(self._to_rows(item))
+                except queue.Empty:
+                    pass
+
+                if rows and (stop
+                             or len(rows) >= self._batch_size
+                             or time.monotonic() - last_write >= self._flush_interval):
+                    with connection:
+                        connection.executemany(INSERT_EVENT, rows)
+                    self._written += len(rows)
+                    rows = []
+                    last_write = time.monotonic()
+        except Exception as e:
+            self._error = e
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def close(self, timeout=None):
+        """
+        Writes any queued records and stops the writer.
+
+        Params:
+            timeout: [float] seconds to wait for the writer (None waits
+                until all records are written)
+
+        Raises:
+            Exception: the writer failed
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join(timeout)
+        if self._error is not None:
+            raise Exception("Event store writer failed: {}".format(self._error))
+
+    def get_events(self, since=None, limit=None):
+        """
+        Returns the records written, oldest first.
+
+        Records still queued are not included.
+
+        Params:
+            since: [float] only return records with a later timestamp
+            limit: [int] maximum number of records returned
+
+        Returns:
+            [list] dicts with the keys in EVENT_COLUMNS
+        """
+        query = "SELECT {} FROM events".format(", ".join(EVENT_COLUMNS))
+        params = []
+        if since is not None:
+            query += " WHERE timestamp > ?"
+            params.append(since)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        connection = sqlite3.connect(self._db_path)
+        try:
+            return [dict(zip(EVENT_COLUMNS, row)) for row in connection.execute(query, params)]
+        finally:
+            connection.close()
+
+    def get_written_count(self):
+        """
+        Returns the number of records written to the database.
+
+        Returns:
+            [int] number of records written
+        """
+        return self._written
+
+    def get_dropped_frames(self):
+        """
+        Returns the number of frames dropped because the queue
+        was full.
+
+        Returns:
+            [int] number of frames dropped
+        """
+        return self._dropped_frames
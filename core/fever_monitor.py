@@ -11,21 +11,38 @@ __email__ = "contact@cookjames.uk"
 
 
 # external module imports
+import numpy as np
+import collections
+import functools
+import threading
+import math
+import time
 import os
 
 # module imports
 from core.lepton import (LeptonCamera,
+                         img_dimension,
                          to_celsius,
                          to_fahrenheit,
                          to_kelvin)
-from core.inference import YoloInference
-from core.image_processing import (get_max_array_value,
-                                   crop_face_in_image_array,
-                                   to_color_img_array,
+from core.inference import (YoloInference,
+                            OnnxInference,
+                            detections_to_array,
+                            suppress_boxes,
+                            nms_methods)
+from core.image_processing import (to_color_img_array,
                                    to_pil_image,
-                                   draw_face_box,
-                                   keep_box_within_bounds,
+                                   draw_box,
                                    colormaps)
+from core.temporal_filter import create_temporal_filter
+from core.temperature import (estimate_temperatures,
+                              temperature_estimators)
+from core import metrics
+from core.memory_tracker import MemoryTracker
+from core.boxes import (to_box_array,
+                        clip_boxes,
+                        expand_boxes,
+                        box_area)
 
 
 # global path variable definitions
@@ -33,17 +50,190 @@ THIS_PATH = os.path.abspath(os.path.dirname(__file__))
 PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, ".."))
 YOLO_FILES_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "yolo"))
 
+# colormap applied to thermal images before inference
+INFERENCE_COLORMAP_INDEX = 5
+
+# network input size used for inference
+NETWORK_WIDTH, NETWORK_HEIGHT = 160, 128
+
+# reduced network input size used by the adaptive resolution mode,
+# and the frames that make the monitor infer at full size:
+#   - faces smaller than ADAPTIVE_MIN_FACE_SIZE pixels (image pixels)
+#   - faces less than ADAPTIVE_CONFIDENCE_MARGIN over the threshold
+# full size is kept for ADAPTIVE_HOLD_FRAMES frames after such a
+# frame, and a frame is probed at full size after
+# ADAPTIVE_PROBE_INTERVAL reduced frames to find new small faces
+ADAPTIVE_NETWORK_WIDTH, ADAPTIVE_NETWORK_HEIGHT = 96, 64
+ADAPTIVE_MIN_FACE_SIZE = 30
+ADAPTIVE_CONFIDENCE_MARGIN = 0.2
+ADAPTIVE_HOLD_FRAMES = 15
+ADAPTIVE_PROBE_INTERVAL = 15
+
+# allocation sites listed in each memory report (see set_memory_tracking)
+MEMORY_REPORT_TOP_SITES = 10
+
+# seconds after a flat-field correction that frames are skipped
+FFC_SKIP_WINDOW = 2.0
+
+# YOLO model files relative to YOLO_FILES_PATH
+# (models without a weights file can only be run using ONNX Runtime)
+YOLO_MODEL_FILES = {
+    "Standard": {
+        "cfg": os.path.join("Standard", "yolo-obj.cfg"),
+        "weights": os.path.join("Standard", "yolo-obj_best.weights"),
+        "onnx": os.path.join("Standard", "yolo-obj_best.onnx")},
+    "Lightweight": {
+        "cfg": os.path.join("Lightweight", "tiny_yolo_3l.cfg"),
+        "weights": os.path.join("Lightweight", "tiny_yolo_3l_best.weights"),
+        "onnx": os.path.join("Lightweight", "tiny_yolo_3l_best.onnx")},
+    "Lightweight INT8": {
+        "onnx": os.path.join("Lightweight", "tiny_yolo_3l_int8.onnx")}}
+
+# operational metrics (see core.metrics)
+FRAMES_CAPTURED = metrics.counter(
+    "fever_monitor_frames_captured_total", "Frames captured from the Lepton camera.")
+FRAMES_INFERRED = metrics.counter(
+    "fever_monitor_frames_inferred_total", "Frames that inference was run on.")
+FRAMES_SKIPPED = metrics.counter(
+    "fever_monitor_frames_skipped_total", "Frames skipped during or after a flat-field correction.")
+FACES_DETECTED = metrics.counter(
+    "fever_monitor_faces_detected_total", "Faces detected.")
+FACES_OVER_THRESHOLD = metrics.counter(
+    "fever_monitor_faces_over_threshold_total",
+    "Faces detected over the temperature threshold, counted in every frame (see core.alerts for alerts).")
+STAGE_SECONDS = metrics.histogram(
+    "fever_monitor_stage_seconds", "Time taken by each stage of FeverMonitor.run.", labelnames=("stage",))
+INFERENCE_PASSES = metrics.counter(
+    "fever_monitor_inference_passes_total", "Network passes at each input resolution.", labelnames=("resolution",))
+FORWARD_SECONDS = metrics.histogram(
+    "fever_monitor_forward_seconds", "Time taken by the network at each input resolution.",
+    labelnames=("resolution",))
+
+# temperature units in order of unit index
+temp_units = [
+    "Celsius",
+    "Fahrenheit",
+    "Kelvin"]
+
+# inference engines that can run the YOLO models
+inference_engines = [
+    "OpenCV",
+    "ONNX Runtime"]
+
+# snapshot of the settings that can be changed while the monitor
+# runs, fields are passed to FeverMonitor by name (see apply_config)
+MonitorConfig = collections.namedtuple("MonitorConfig", [
+    "temp_threshold",
+    "temp_unit",
+    "colormap_index",
+    "yolo_model",
+    "confidence_threshold",
+    "use_gpu",
+    "inference_engine",
+    "num_threads",
+    "rois",
+    "ffc_window",
+    "reconnect_timeout",
+    "temporal_filter",
+    "filter_alpha",
+    "filter_frames",
+    "temp_estimator",
+    "face_shrink",
+    "nms_method",
+    "nms_threshold",
+    "nms_top_k",
+    "adaptive_resolution",
+    "memory_tracking"], defaults=[
+    38.0, "Celsius", 5, "Standard", 0.5, False, "OpenCV", 0, (),
+    FFC_SKIP_WINDOW, 0.0, "None", 0.5, 3, "Maximum", 0.0, "OpenCV", None, 0, False, 0])
+
+
+def get_model_file_path(model, file_type):
+    """
+    Returns the path to a YOLO model file.
+
+    Params:
+        model: [string] name of the model
+        file_type: [string] 'cfg', 'weights' or 'onnx'
+
+    Returns:
+        [string] path to the file
+
+    Raises:
+        [Exception] model name or file type not recognised
+    """
+    if model not in YOLO_MODEL_FILES:
+        raise Exception("Model name '{}' not recognised.".format(model))
+    if file_type not in YOLO_MODEL_FILES[model]:
+        raise Exception("Model file type '{}' not recognised.".format(file_type))
+    return os.path.join(YOLO_FILES_PATH, YOLO_MODEL_FILES[model][file_type])
+
 
 class Face:
     """
     Class containing details and image of a face detected.
+
+    The face image can be passed directly or created lazily
+    by passing an img_loader function, which is only called
+    the first time the img attribute is read.
     """
+    __slots__ = ('detection', 'temp', 'over_threshold', '_img', '_img_loader')
 
-    def __init__(self, detection, temp, img, over_threshold):
+    def __init__(self, detection, temp, img, over_threshold, img_loader=None):
         self.detection = detection
         self.temp = temp
-        self.img = img
         self.over_threshold = over_threshold
+        self._img = img
+        self._img_loader = img_loader
+
+    @property
+    def img(self):
+        """
+        Returns the face image, creating it if required.
+
+        Returns:
+            [PIL.Image.Image] image of the face (or None)
+        """
+        # read the loader once, the image may be read from more than one thread
+        img_loader = self._img_loader
+        if self._img is None and img_loader is not None:
+            self._img = img_loader()
+            self._img_loader = None
+        return self._img
+
+    @img.setter
+    def img(self, img):
+        self._img = img
+        self._img_loader = None
+
+
+def faces_to_array(faces):
+    """
+    Converts a frame of faces to a structured array.
+
+    Params:
+        faces: [list] Face objects
+
+    Returns:
+        [np.ndarray] structured array of type DETECTION_DTYPE
+    """
+    return detections_to_array([f.detection for f in faces], [f.temp for f in faces])
+
+
+def _observe_stage(stage, start):
+    """
+    Records the time taken by a stage of FeverMonitor.run.
+
+    Params:
+        stage: [string] name of the stage
+        start: [float] time.perf_counter value when the stage started
+
+    Returns:
+        [float] time.perf_counter value when the stage ended
+    """
+    end = time.perf_counter()
+    STAGE_SECONDS.labels(stage).observe(end - start)
+    return end
 
 
 class FeverMonitor:
@@ -53,8 +243,29 @@ class FeverMonitor:
                  colormap_index=5,
                  yolo_model="Standard",
                  confidence_threshold=0.5,
-                 use_gpu=False):
-        self._lepton_camera = LeptonCamera()
+                 use_gpu=False,
+                 inference_engine="OpenCV",
+                 num_threads=0,
+                 rois=None,
+                 eager_face_images=False,
+                 ffc_window=FFC_SKIP_WINDOW,
+                 reconnect_timeout=0.0,
+                 temporal_filter="None",
+                 filter_alpha=0.5,
+                 filter_frames=3,
+                 temp_estimator="Maximum",
+                 face_shrink=0.0,
+                 nms_method="OpenCV",
+                 nms_threshold=None,
+                 nms_top_k=0,
+                 adaptive_resolution=False,
+                 memory_tracking=0,
+                 event_store=None,
+                 use_camera=True,
+                 background_model_load=False,
+                 model_cache=True):
+        # no camera is opened to only process frames (see process_frame)
+        self._lepton_camera = LeptonCamera(reconnect_timeout=reconnect_timeout) if use_camera else None
 
         # init variables
         self._temp_threshold = 0.0
@@ -62,16 +273,149 @@ class FeverMonitor:
         self._colormap_index = 0
         self._yolo_inf = None
         self._model_name_selected = ""
+        self._model_loaded = None
+        self._model_lock = threading.Lock()
+        self._model_generation = 0
+        self._pending_model = None
+        self._model_loading = False
+        self._model_load_error = None
+        self._background_model_load = False
+        # optimized ONNX models are cached on disk (see core.model_cache)
+        self._model_cache = model_cache
         self._confidence_threshold = 0.0
         self._using_gpu = False
+        self._inference_engine = "OpenCV"
+        self._num_threads = 0
+        self._rois = []
+        self._roi_network_dimensions = []
+        self._eager_face_images = False
+        self._ffc_window = 0.0
+        self._frame_skipped = False
+        self._temporal_filter = None
+        self._temporal_filter_name = "None"
+        self._temp_estimator = "Maximum"
+        self._face_shrink = 0.0
+        self._nms_method = "OpenCV"
+        self._nms_threshold = None
+        self._nms_top_k = 0
+        self._adaptive_resolution = False
+        self._full_resolution_frames = 0
+        self._reduced_frames = 0
+        self._resolution_stats = {}
+        self._resolution_reruns = 0
+        self._memory_tracking = 0
+        self._memory_tracker = None
+        self._memory_report = None
+        self._event_store = None
+        self._reconnect_timeout = 0.0
+        self._filter_alpha = 0.5
+        self._filter_frames = 3
 
         # set parameters passed
         self.set_temp_threshold(temp_threshold)
         self.set_temp_unit(temp_unit)
+        self.set_inference_engine(inference_engine, num_threads)
         self.set_yolo_model(yolo_model)
         self.set_confidence_threshold(confidence_threshold)
         self.set_colormap_index(colormap_index)
         self.set_gpu(use_gpu)
+        self.set_rois(rois)
+        self.set_eager_face_images(eager_face_images)
+        self.set_ffc_window(ffc_window)
+        self.set_reconnect_timeout(reconnect_timeout)
+        self.set_temporal_filter(temporal_filter, filter_alpha, filter_frames)
+        self.set_temp_estimator(temp_estimator, face_shrink)
+        self.set_nms(nms_method, nms_threshold, nms_top_k)
+        self.set_adaptive_resolution(adaptive_resolution)
+        self.set_memory_tracking(memory_tracking)
+        self.set_event_store(event_store)
+        self.set_background_model_load(background_model_load)
+
+    def apply_config(self, config):
+        """
+        Applies a settings snapshot, only calling the setters of
+        the settings that differ from the current settings.
+
+        The model is only reloaded when the model, inference
+        engine, number of threads or GPU setting changes, and the
+        temporal filter is only reset when its settings change.
+        If a setter fails, the settings before it are applied
+        and the rest are applied with the next snapshot.
+
+        Params:
+            config: [MonitorConfig] settings to apply
+
+        Returns:
+            [set] names of the settings changed
+
+        Raises:
+            [Exception] setting not valid
+            [AssertionError] assertion failed
+        """
+        config = config._replace(rois=tuple(tuple(int(v) for v in roi) for roi in (config.rois or ())))
+        current = self.get_config()
+        changed = {f for f in MonitorConfig._fields if getattr(config, f) != getattr(current, f)}
+
+        if "temp_threshold" in changed:
+            self.set_temp_threshold(config.temp_threshold)
+        if "temp_unit" in changed:
+            self.set_temp_unit(config.temp_unit)
+        if "colormap_index" in changed:
+            self.set_colormap_index(config.colormap_index)
+        if changed & {"yolo_model", "inference_engine", "num_threads"}:
+            self._set_model(config.yolo_model, config.inference_engine, config.num_threads)
+        if "confidence_threshold" in changed:
+            self.set_confidence_threshold(config.confidence_threshold)
+        if "use_gpu" in changed:
+            self.set_gpu(config.use_gpu)
+        if "rois" in changed:
+            self.set_rois(config.rois)
+        if "ffc_window" in changed:
+            self.set_ffc_window(config.ffc_window)
+        if "reconnect_timeout" in changed:
+            self.set_reconnect_timeout(config.reconnect_timeout)
+        if changed & {"temporal_filter", "filter_alpha", "filter_frames"}:
+            self.set_temporal_filter(config.temporal_filter, config.filter_alpha, config.filter_frames)
+        if changed & {"temp_estimator", "face_shrink"}:
+            self.set_temp_estimator(config.temp_estimator, config.face_shrink)
+        if changed & {"nms_method", "nms_threshold", "nms_top_k"}:
+            self.set_nms(config.nms_method, config.nms_threshold, config.nms_top_k)
+        if "adaptive_resolution" in changed:
+            self.set_adaptive_resolution(config.adaptive_resolution)
+        if "memory_tracking" in changed:
+            self.set_memory_tracking(config.memory_tracking)
+
+        return changed
+
+    def get_config(self):
+        """
+        Gets a snapshot of the current settings.
+
+        Returns:
+            [MonitorConfig] settings snapshot
+        """
+        return MonitorConfig(
+            temp_threshold=self._temp_threshold,
+            temp_unit=temp_units[self._temp_unit_index],
+            colormap_index=self._colormap_index,
+            yolo_model=self._model_name_selected,
+            confidence_threshold=self._confidence_threshold,
+            use_gpu=self._using_gpu,
+            inference_engine=self._inference_engine,
+            num_threads=self._num_threads,
+            rois=tuple(self._rois),
+            ffc_window=self._ffc_window,
+            reconnect_timeout=self._reconnect_timeout,
+            temporal_filter=self._temporal_filter_name,
+            filter_alpha=self._filter_alpha,
+            filter_frames=self._filter_frames,
+            temp_estimator=self._temp_estimator,
+            face_shrink=self._face_shrink,
+            nms_method=self._nms_method,
+            nms_threshold=self._nms_threshold,
+            nms_top_k=self._nms_top_k,
+            adaptive_resolution=self._adaptive_resolution,
+            memory_tracking=self._memory_tracking)
 
     def set_temp_threshold(self, temp):
         """
@@ -117,39 +461,214 @@ class FeverMonitor:
         """
         Loads a YOLO model to use for inference.
 
-        The model weights and config files are loaded
-        from a static path.
+        The model files are loaded from a static path. The
+        "Lightweight INT8" model is created by
+        tools/quantize_lightweight.py and is always run
+        using ONNX Runtime.
 
         Params:
             model: [sting] name of the model to be loaded
         """
-        # define path to file containing class names
-        labels_path = os.path.join(YOLO_FILES_PATH, 'obj.names')
-
-        # choose model
-        if model == "Standard":
-            weights_path = os.path.join(YOLO_FILES_PATH, 'Standard', 'yolo-obj_best.weights')
-            cfg_path = os.path.join(YOLO_FILES_PATH, 'Standard', 'yolo-obj.cfg')
-        elif model == "Lightweight":
-            weights_path = os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.weights')
-            cfg_path = os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l.cfg')
-        else:
+        if model not in YOLO_MODEL_FILES:
             raise Exception("Model name '{}' not recognised.".format(model))
 
         # if the model selected is not the model currently setup
         # then create a new model
         if model != self._model_name_selected:
             self._model_name_selected = model
+            self._load_model()
+
+    def set_inference_engine(self, engine="OpenCV", num_threads=0):
+        """
+        Sets the engine used to run the YOLO model.
+
+        The "OpenCV" engine runs the Darknet model files using
+        the OpenCV DNN module. The "ONNX Runtime" engine runs
+        ONNX models created by tools/export_onnx.py.
+
+        Params:
+            engine: [string] name of the inference engine
+            num_threads: [int] number of threads used by ONNX Runtime
+                (0 lets ONNX Runtime decide)
+
+        Raises:
+            [Exception] engine name not recognised
+        """
+        if engine not in inference_engines:
+            raise Exception("Inference engine '{}' not recognised.".format(engine))
+
+        changed = (engine != self._inference_engine or num_threads != self._num_threads)
+        self._inference_engine = engine
+        self._num_threads = num_threads
+
+        # reload the current model using the new engine
+        if changed and self._yolo_inf is not None:
+            self._load_model()
+
+    def _set_model(self, model, engine, num_threads):
+        """
+        Sets the model, inference engine and number of threads
+        together, loading the model once if any of them changed.
+
+        If the model fails to load (when not loaded in the
+        background), the previous settings are kept.
+
+        Params:
+            model: [sting] name of the model to be loaded
+            engine: [string] name of the inference engine
+            num_threads: [int] number of threads used by ONNX Runtime
+
+        Raises:
+            [Exception] model or engine name not recognised
+        """
+        if model not in YOLO_MODEL_FILES:
+            raise Exception("Model name '{}' not recognised.".format(model))
+        if engine not in inference_engines:
+            raise Exception("Inference engine '{}' not recognised.".format(engine))
+
+        previous = (self._model_name_selected, self._inference_engine, self._num_threads)
+        if (model, engine, num_threads) == previous:
+            return
+        self._model_name_selected, self._inference_engine, self._num_threads = model, engine, num_threads
+        try:
+            self._load_model()
+        except Exception:
+            self._model_name_selected, self._inference_engine, self._num_threads = previous
+            raise
+
+    def set_background_model_load(self, enabled):
+        """
+        Sets whether models are loaded in the background.
+
+        Loading a model can take seconds. When enabled, changing
+        the model, inference engine or number of threads loads
+        and warms up the new model in a background thread while
+        run keeps using the current model, and the new model is
+        swapped in before the first frame after it is ready. If
+        the new model fails to load, the current model is kept
+        (see pop_model_load_error).
+
+        Params:
+            enabled: [bool] set to True to load models in the background
+        """
+        self._background_model_load = enabled
+
+    def is_model_loading(self):
+        """
+        Returns True if a model is being loaded in the background.
+
+        Returns:
+            [bool] True if loading
+        """
+        return self._model_loading
 
-            # create model
-            self._yolo_inf = YoloInference(
-                weights_path=weights_path,
-                cfg_path=cfg_path,
+    def pop_model_load_error(self):
+        """
+        Returns the error of the last model that failed to load
+        in the background, and clears it.
+
+        Returns:
+            [string] error message, or None if no model failed
+        """
+        error, self._model_load_error = self._model_load_error, None
+        return error
+
+    def _load_model(self):
+        """
+        Creates the inference object for the selected model
+        and inference engine.
+
+        The first model is always loaded before returning,
+        later models are loaded in the background if enabled.
+        """
+        model = (self._model_name_selected, self._inference_engine, self._num_threads)
+        with self._model_lock:
+            # invalidates any model being loaded in the background
+            self._model_generation += 1
+            generation = self._model_generation
+            self._pending_model = None
+            self._model_loading = self._background_model_load and self._yolo_inf is not None
+
+        if self._model_loading:
+            threading.Thread(
+                target=self._load_model_in_background,
+                args=(generation, model, self._using_gpu),
+                name="ModelLoader",
+                daemon=True).start()
+        else:
+            self._yolo_inf = self._create_inference(*model, self._using_gpu)
+            self._model_loaded = model
+
+    def _create_inference(self, model, engine, num_threads, use_gpu):
+        """
+        Creates an inference object for a model and inference engine.
+
+        Returns:
+            inference object
+        """
+        labels_path = os.path.join(YOLO_FILES_PATH, 'obj.names')
+
+        if (engine == "ONNX Runtime"
+                or "weights" not in YOLO_MODEL_FILES[model]):
+            yolo_inf = OnnxInference(
+                onnx_path=get_model_file_path(model, "onnx"),
+                labels_path=labels_path,
+                use_gpu=use_gpu,
+                num_threads=num_threads,
+                use_cache=self._model_cache)
+        else:
+            yolo_inf = YoloInference(
+                weights_path=get_model_file_path(model, "weights"),
+                cfg_path=get_model_file_path(model, "cfg"),
                 labels_path=labels_path,
-                use_gpu=self._using_gpu)
+                use_gpu=use_gpu)
 
-            # set model network size
-            self._yolo_inf.set_network_dimensions(160, 128)
+        # set model network size
+        yolo_inf.set_network_dimensions(NETWORK_WIDTH, NETWORK_HEIGHT)
+        return yolo_inf
+
+    def _load_model_in_background(self, generation, model, use_gpu):
+        """
+        Loads and warms up a model, then queues it to be swapped
+        in by _swap_model unless a newer model has been requested.
+        """
+        yolo_inf, error = None, None
+        try:
+            yolo_inf = self._create_inference(*model, use_gpu)
+
+            # the first inference run sets up the network, so run it here
+            img_width, img_height = img_dimension
+            yolo_inf.load_image(np.zeros((img_height, img_width, 3), dtype=np.uint8))
+            yolo_inf.run(threshold=self._confidence_threshold)
+        except Exception as e:
+            error = e
+
+        with self._model_lock:
+            if generation == self._model_generation:
+                self._pending_model = (model, yolo_inf, use_gpu, error)
+                self._model_loading = False
+
+    def _swap_model(self):
+        """
+        Swaps in a model loaded in the background, if one is ready.
+        """
+        with self._model_lock:
+            pending, self._pending_model = self._pending_model, None
+        if pending is None:
+            return
+        model, yolo_inf, use_gpu, error = pending
+
+        if error is not None:
+            # keep the current model and settings
+            self._model_load_error = "Failed loading model '{}' ({}): {}".format(model[0], model[1], error)
+            self._model_name_selected, self._inference_engine, self._num_threads = self._model_loaded
+            return
+
+        # the GPU setting may have changed while the model was loading
+        if use_gpu != self._using_gpu:
+            yolo_inf.set_gpu(self._using_gpu)
+        self._yolo_inf = yolo_inf
+        self._model_loaded = model
 
     def set_confidence_threshold(self, threshold):
         """
@@ -180,6 +699,451 @@ class FeverMonitor:
         self._yolo_inf.set_gpu(use)
         self._using_gpu = use
 
+    def set_rois(self, rois=None):
+        """
+        Sets the regions of interest that inference is run on.
+
+        When regions of interest are set, only those regions of
+        the image are passed to the network, at a network size
+        proportional to the region size, so inference cost falls
+        with the area covered. Faces outside of the regions are
+        not detected. Pass None or an empty list to run inference
+        on the whole image.
+
+        Params:
+            rois: [list] (x, y, w, h) boxes in image coordinates
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        rois = [tuple(int(v) for v in roi) for roi in (rois or [])]
+        img_width, img_height = img_dimension
+        for x, y, w, h in rois:
+            assert (0 <= x and 0 <= y and w > 0 and h > 0 and x + w <= img_width and y + h <= img_height), \
+                "Region of interest ({}, {}, {}, {}) must be within the image bounds ({}, {}).".format(
+                    x, y, w, h, img_width, img_height)
+
+        # scale each region by the same factor as the whole image,
+        # rounding up to the nearest valid network size
+        self._roi_network_dimensions = [
+            (max(32, 32 * math.ceil(w * NETWORK_WIDTH / img_width / 32)),
+             max(32, 32 * math.ceil(h * NETWORK_HEIGHT / img_height / 32)))
+            for x, y, w, h in rois]
+        self._rois = rois
+
+    def get_rois(self):
+        """
+        Gets the regions of interest that inference is run on.
+
+        Returns:
+            [list] (x, y, w, h) boxes, empty if the whole image is used
+        """
+        return list(self._rois)
+
+    def set_eager_face_images(self, eager):
+        """
+        Sets whether face images of faces over the temperature
+        threshold are created when the monitor is run.
+
+        Face images are otherwise created on demand, the first
+        time Face.img is read. Creating the images of faces over
+        the threshold in run moves the cost to the thread calling
+        run, while faces below the threshold are still only
+        created if they are used.
+
+        Params:
+            eager: [bool] set to True to create images of faces
+                over the threshold in run
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        assert (type(eager) == bool), \
+            "Parameter 'eager' must be a valid boolean value."
+        self._eager_face_images = eager
+
+    def set_ffc_window(self, window):
+        """
+        Sets the period of time after a flat-field correction
+        (FFC) that frames are skipped.
+
+        Temperatures measured during and shortly after an FFC
+        are not reliable, so inference is not run on these
+        frames and no faces are returned for them. Frames
+        captured while an FFC is imminent or in progress are
+        always skipped.
+
+        Params:
+            window: [float] seconds after an FFC
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        assert ((type(window) == int or type(window) == float) and window >= 0), \
+            "FFC window must be a positive number of seconds."
+        self._ffc_window = window
+
+    def get_ffc_window(self):
+        """
+        Gets the period of time after a flat-field correction
+        that frames are skipped.
+
+        Returns:
+            [float] seconds after an FFC
+        """
+        return self._ffc_window
+
+    def set_reconnect_timeout(self, timeout):
+        """
+        Sets how long the monitor keeps trying to reconnect to
+        the Lepton camera after a capture fails.
+
+        While reconnecting, run blocks and the loaded model is
+        kept, so monitoring resumes once the camera returns.
+
+        Params:
+            timeout: [float] seconds to keep trying to reconnect
+                (0 raises the first capture failure)
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        if self._lepton_camera is not None:
+            self._lepton_camera.set_reconnect_timeout(timeout)
+        self._reconnect_timeout = timeout
+
+    def set_temporal_filter(self, name="None", alpha=0.5, num_frames=3):
+        """
+        Sets the temporal filter applied to frames before faces
+        are detected and measured.
+
+        Filtering reduces the frame noise that causes jittery
+        face temperatures. The filter is reset when it is set
+        and after frames skipped for a flat-field correction.
+
+        Params:
+            name: [string] name of the filter ("None", "Exponential"
+                or "Median")
+            alpha: [float] weight of the latest frame ("Exponential")
+            num_frames: [int] odd number of frames ("Median")
+
+        Raises:
+            [Exception] filter name not recognised
+        """
+        self._temporal_filter = create_temporal_filter(name=name, alpha=alpha, num_frames=num_frames)
+        self._temporal_filter_name = name
+        self._filter_alpha = alpha
+        self._filter_frames = num_frames
+
+    def get_temporal_filter(self):
+        """
+        Gets the name of the temporal filter applied to frames.
+
+        Returns:
+            [string] name of the filter
+        """
+        return self._temporal_filter_name
+
+    def reset_temporal_filter(self):
+        """
+        Clears the frames held by the temporal filter, so the
+        next frame is not filtered with earlier frames.
+        """
+        if self._temporal_filter is not None:
+            self._temporal_filter.reset()
+
+    def set_temp_estimator(self, estimator="Maximum", face_shrink=0.0):
+        """
+        Sets how the temperature of each face is measured.
+
+        See temperature.estimate_temperatures for the estimators.
+        Shrinking the face boxes keeps hot backgrounds and objects
+        at the edges of the boxes out of the measurement.
+
+        Params:
+            estimator: [string] name of the estimator
+            face_shrink: [float] fraction of the face box width and
+                height removed before measuring
+
+        Raises:
+            [Exception] estimator name not recognised
+            [AssertionError] assertion failed
+        """
+        if estimator not in temperature_estimators:
+            raise Exception("Temperature estimator '{}' not recognised.".format(estimator))
+        assert (0 <= face_shrink < 1), \
+            "Face shrink must be a valid value from 0 up to 1."
+        self._temp_estimator = estimator
+        self._face_shrink = face_shrink
+
+    def get_temp_estimator(self):
+        """
+        Gets the name of the estimator used to measure faces.
+
+        Returns:
+            [string] name of the estimator
+        """
+        return self._temp_estimator
+
+    def set_nms(self, method="OpenCV", iou_threshold=None, top_k=0):
+        """
+        Sets how overlapping detections are suppressed.
+
+        See inference.suppress_boxes for the methods. Lowering
+        the confidence threshold passes more boxes to the
+        suppression, which top_k limits to the boxes with the
+        highest confidence.
+
+        Params:
+            method: [string] name of the non-maxima suppression method
+            iou_threshold: [float] maximum IoU of a detection kept with
+                a detection of a higher confidence (None uses the
+                confidence threshold)
+            top_k: [int] number of detections considered (0 considers
+                every detection)
+
+        Raises:
+            [Exception] method name not recognised
+            [AssertionError] assertion failed
+        """
+        if method not in nms_methods:
+            raise Exception("NMS method '{}' not recognised.".format(method))
+        assert (iou_threshold is None or 0 <= iou_threshold <= 1), \
+            "IoU threshold must be a valid value between 0 and 1."
+        assert (type(top_k) == int and top_k >= 0), \
+            "Top k must be an integer greater than or equal to 0."
+        self._nms_method = method
+        self._nms_threshold = iou_threshold
+        self._nms_top_k = top_k
+
+    def get_nms(self):
+        """
+        Gets the name of the non-maxima suppression method.
+
+        Returns:
+            [string] name of the method
+        """
+        return self._nms_method
+
+    def set_adaptive_resolution(self, adaptive):
+        """
+        Sets whether inference runs at a reduced network size
+        when faces are large enough to be found at that size.
+
+        Whole frames are inferred at ADAPTIVE_NETWORK_WIDTH x
+        ADAPTIVE_NETWORK_HEIGHT, and at the full network size
+        for a while after a frame with a small face or a face
+        close to the confidence threshold (that frame is run
+        again at full size). A frame is also run at full size
+        regularly, as faces too small to be found at the reduced
+        size would otherwise never be seen. Not used with regions
+        of interest, which set their own network sizes.
+
+        Switching size makes OpenCV set the network up again, so
+        the first pass after each switch takes longer (see
+        get_resolution_stats).
+
+        Params:
+            adaptive: [bool] set to True to adapt the network size
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        assert (type(adaptive) == bool), \
+            "Parameter 'adaptive' must be a valid boolean value."
+        self._adaptive_resolution = adaptive
+        self._full_resolution_frames = 0
+        self._reduced_frames = 0
+
+    def get_adaptive_resolution(self):
+        """
+        Gets whether inference runs at a reduced network size
+        when faces are large enough.
+
+        Returns:
+            [bool] True if the network size is adapted
+        """
+        return self._adaptive_resolution
+
+    def get_resolution_stats(self):
+        """
+        Gets how often inference ran at each network size and the
+        mean time taken by the network at each size.
+
+        Returns:
+            [dict] 'passes' and 'mean_forward_seconds' dicts keyed
+            by the network size as 'WIDTHxHEIGHT', and 'reruns',
+            the number of frames run again at full size
+        """
+        return {
+            "passes": {r: n for r, (n, _) in self._resolution_stats.items()},
+            "mean_forward_seconds": {r: t / n for r, (n, t) in self._resolution_stats.items()},
+            "reruns": self._resolution_reruns}
+
+    def reset_resolution_stats(self):
+        """
+        Clears the network size statistics.
+        """
+        self._resolution_stats = {}
+        self._resolution_reruns = 0
+
+    def set_memory_tracking(self, interval):
+        """
+        Sets the number of frames between memory reports, or 0 to
+        stop tracking memory.
+
+        Memory allocations are traced using tracemalloc (see
+        core.memory_tracker), recording the net growth of the
+        memory and of the number of memory blocks between frames,
+        including memory kept by the code using the results (the
+        growth, not the number of allocations). Every interval
+        frames the allocation sites that grew the most are logged
+        and kept as the latest report (see pop_memory_report).
+        Tracing slows down the monitor, so is only set to find
+        memory growth.
+
+        Params:
+            interval: [int] frames between memory reports
+
+        Raises:
+            [AssertionError] assertion failed
+        """
+        assert (type(interval) == int and interval >= 0), \
+            "Parameter 'interval' must be a valid integer of 0 or greater."
+        if self._memory_tracker is not None:
+            self._memory_tracker.stop()
+            self._memory_tracker = None
+        self._memory_tracking = interval
+        if interval > 0:
+            self._memory_tracker = MemoryTracker(interval=interval, top=MEMORY_REPORT_TOP_SITES)
+            self._memory_tracker.start()
+
+    def get_memory_tracking(self):
+        """
+        Gets the number of frames between memory reports.
+
+        Returns:
+            [int] frames between memory reports, 0 if memory is
+            not tracked
+        """
+        return self._memory_tracking
+
+    def pop_memory_report(self):
+        """
+        Returns the memory report made since the last call, and
+        clears it.
+
+        Returns:
+            [MemoryReport] latest memory report, or None if no
+            report was made
+        """
+        report, self._memory_report = self._memory_report, None
+        return report
+
+    def _track_memory(self):
+        """
+        Records the memory allocated since the previous frame if
+        memory is tracked.
+        """
+        if self._memory_tracker is not None:
+            report = self._memory_tracker.frame()
+            if report is not None:
+                self._memory_report = report
+
+    def _run_inference(self):
+        """
+        Runs inference on the image loaded with the confidence
+        threshold and non-maxima suppression set.
+
+        Returns:
+            [list] Detection objects
+        """
+        detections, inference_time = self._yolo_inf.run(
+            threshold=self._confidence_threshold,
+            nms_threshold=self._nms_threshold,
+            nms_method=self._nms_method,
+            top_k=self._nms_top_k)
+
+        resolution = "{}x{}".format(*self._yolo_inf.get_network_dimensions())
+        passes, seconds = self._resolution_stats.get(resolution, (0, 0.0))
+        self._resolution_stats[resolution] = (passes + 1, seconds + inference_time)
+        INFERENCE_PASSES.labels(resolution).inc()
+        FORWARD_SECONDS.labels(resolution).observe(inference_time)
+        return detections
+
+    def _run_adaptive_inference(self):
+        """
+        Runs inference on the image loaded at the reduced network
+        size, or at full size if recent frames need it (see
+        set_adaptive_resolution).
+
+        Returns:
+            [list] Detection objects
+        """
+        if self._full_resolution_frames == 0 and self._reduced_frames < ADAPTIVE_PROBE_INTERVAL:
+            self._yolo_inf.set_network_dimensions(ADAPTIVE_NETWORK_WIDTH, ADAPTIVE_NETWORK_HEIGHT)
+            try:
+                detections = self._run_inference()
+            finally:
+                self._yolo_inf.set_network_dimensions(NETWORK_WIDTH, NETWORK_HEIGHT)
+            if not self._needs_full_resolution(detections):
+                self._reduced_frames += 1
+                return detections
+            # run this frame again at full size
+            self._resolution_reruns += 1
+
+        detections = self._run_inference()
+        self._reduced_frames = 0
+        if self._needs_full_resolution(detections):
+            self._full_resolution_frames = ADAPTIVE_HOLD_FRAMES
+        else:
+            self._full_resolution_frames = max(0, self._full_resolution_frames - 1)
+        return detections
+
+    def _needs_full_resolution(self, detections):
+        """
+        Returns True if any detection is too small or too close to
+        the confidence threshold to rely on the reduced network size.
+        """
+        return any(min(d.w, d.h) < ADAPTIVE_MIN_FACE_SIZE
+                   or d.confidence < self._confidence_threshold + ADAPTIVE_CONFIDENCE_MARGIN
+                   for d in detections)
+
+    def set_event_store(self, event_store=None):
+        """
+        Sets the store that the faces detected are recorded to.
+
+        Faces are queued to the store at the end of each run and
+        written by the store in the background.
+
+        Params:
+            event_store: [EventStore] store to record faces to
+                (None stops recording)
+        """
+        self._event_store = event_store
+
+    def get_capture_metadata(self):
+        """
+        Gets the telemetry data of the last frame captured.
+
+        Returns:
+            [CaptureMetadata] telemetry data of the last frame
+            (None without a camera)
+        """
+        if self._lepton_camera is None:
+            return None
+        return self._lepton_camera.get_metadata()
+
+    def is_frame_skipped(self):
+        """
+        Returns True if the last frame was skipped because it was
+        captured during or shortly after a flat-field correction.
+
+        Returns:
+            [bool] True if the last frame was skipped
+        """
+        return self._frame_skipped
+
     def is_using_gpu(self):
         """
         Returns True if the GPU being used.
@@ -217,6 +1181,15 @@ class FeverMonitor:
         """
         return self._confidence_threshold
 
+    def get_inference_engine(self):
+        """
+        Gets the name of the inference engine being used.
+
+        Returns:
+            [string] name of the inference engine
+        """
+        return self._inference_engine
+
     def get_model_name_selected(self):
         """
         Gets the model name selected.
@@ -233,8 +1206,9 @@ class FeverMonitor:
 
         An image is captured by the camera and is converted
         to an 8-bit image. Inference is run on the image
-        using the model that is loaded. The maximum
-        temperatures of any faces detected are recorded and
+        using the model that is loaded. The temperatures of
+        any faces detected are measured using the estimator
+        set (the maximum by default), recorded and
         bounding boxes are drawn green if the target is below
         the temperature threshold, otherwise the box is red.
         An list of Face objects are returned as well as the
@@ -242,13 +1216,25 @@ class FeverMonitor:
         bounding boxes and temperatures drawn around faces in
         the image.
 
+        Frames captured during or shortly after a flat-field
+        correction are returned without running inference and
+        with no faces (see set_ffc_window and is_frame_skipped).
+
+        Face images are views of the image without boxes drawn
+        and are only converted to PIL images when Face.img is
+        read (see set_eager_face_images).
+
         Returns:
             [PIL.Image.Image] Image containing monitor results
             [list] - An list of face objects
 
         Raises:
             [Exception] Lepton camera disconnected
+            [AssertionError] monitor created without a camera
         """
+        assert (self._lepton_camera is not None), \
+            "Monitor was created without a camera, use process_frame."
+        start = time.perf_counter()
         try:
             # capture image
             self._lepton_camera.capture()
@@ -256,30 +1242,105 @@ class FeverMonitor:
             if not self._lepton_camera.lepton_connected():
                 raise Exception("Lepton camera disconnected.")
             raise e
+        FRAMES_CAPTURED.inc()
+        start = _observe_stage("capture", start)
+
+        # raw uint16 image, only the face temperatures are converted
+        img = self._lepton_camera.get_raw_img()
 
-        img = self._lepton_camera.get_img()
+        # skip frames with unreliable temperatures
+        self._frame_skipped = self._lepton_camera.get_metadata().in_ffc_window(self._ffc_window)
+        if self._frame_skipped:
+            FRAMES_SKIPPED.inc()
+            self._track_memory()
+            if self._temporal_filter is not None:
+                self._temporal_filter.reset()
+            return to_pil_image(to_color_img_array(arr=img, colormap_index=self._colormap_index)), []
+
+        return self.process_frame(img)
+
+    def process_frame(self, img, render=True):
+        """
+        Runs inference on a raw frame and returns the monitor
+        results.
+
+        Used by run for each frame captured, and can be called
+        directly to process recorded frames. Frames are passed
+        through the temporal filter set, so should be passed in
+        the order they were captured.
+
+        Without rendering, no color image or face images are
+        created and no boxes are drawn, which is faster when
+        only the face temperatures are needed.
+
+        Params:
+            img: [np.ndarray] 2D raw thermal frame (uint16 as
+                captured or any real dtype)
+            render: [bool] set to False to skip creating images
+
+        Returns:
+            [PIL.Image.Image] Image containing monitor results
+            (None without rendering)
+            [list] - An list of face objects
+        """
+        self._track_memory()
+        start = time.perf_counter()
+
+        # start using a model loaded in the background
+        if self._pending_model is not None:
+            self._swap_model()
+
+        # reduce frame noise before faces are measured
+        if self._temporal_filter is not None:
+            img = self._temporal_filter.apply(img)
+            start = _observe_stage("filter", start)
 
         # load into inf object and run inference
-        self._yolo_inf.load_image(to_color_img_array(arr=img, colormap_index=5))
-        detections, inference_time = self._yolo_inf.run(threshold=self._confidence_threshold)
+        inf_img = to_color_img_array(arr=img, colormap_index=INFERENCE_COLORMAP_INDEX)
+        if self._rois:
+            detections = self._run_roi_inference(inf_img)
+        elif self._adaptive_resolution:
+            self._yolo_inf.load_image(inf_img)
+            detections = self._run_adaptive_inference()
+        else:
+            self._yolo_inf.load_image(inf_img)
+            detections = self._run_inference()
+        FRAMES_INFERRED.inc()
+        start = _observe_stage("inference", start)
 
         # correct bounding boxes that are outside the bounds of the image
-        for d in detections:
-            d.x, d.y, d.w, d.h = keep_box_within_bounds(img, d.x, d.y, d.w, d.h)
-
-        # convert image to color image using a user-set colormap
-        color_img = to_color_img_array(arr=img, colormap_index=self._colormap_index)
+        # and drop boxes left with no area
+        img_height, img_width = img.shape[:2]
+        boxes = clip_boxes(to_box_array([(d.x, d.y, d.w, d.h) for d in detections]), img_width, img_height)
+        keep = box_area(boxes) > 0
+        detections = [d for d, k in zip(detections, keep) if k]
+        boxes = boxes[keep]
+
+        # boxes zoomed out of faces slightly for images of whole heads
+        head_boxes = clip_boxes(expand_boxes(boxes, x_zoom_out=0.6, y_zoom_out=0.6), img_width, img_height)
+
+        # measure all faces at once
+        face_temps = estimate_temperatures(
+            img=img,
+            boxes=boxes,
+            estimator=self._temp_estimator,
+            shrink=self._face_shrink)
+        start = _observe_stage("measure", start)
+
+        # convert image to color image using a user-set colormap,
+        # boxes are drawn on a copy so face images stay clean
+        if render:
+            color_img = to_color_img_array(arr=img, colormap_index=self._colormap_index)
+            display_img = color_img.copy()
 
         face_objects = []
 
         # for each face detected
-        for d in detections:
+        for d, (x, y, w, h), (head_x, head_y, head_w, head_h), face_temp in zip(
+                detections, boxes, head_boxes, face_temps):
+            d.x, d.y, d.w, d.h = int(x), int(y), int(w), int(h)
 
-            # get face max temperature
-            face_temp = get_max_array_value(
-                arr=crop_face_in_image_array(img, d.x, d.y, d.w, d.h, x_zoom_out=0, y_zoom_out=0))
-
-            # convert max face temperature
+            # convert face temperature
             if self._temp_unit_index == 0:
                 face_temp = to_celsius(face_temp)
             elif self._temp_unit_index == 1:
@@ -287,16 +1348,25 @@ class FeverMonitor:
             elif self._temp_unit_index == 2:
                 face_temp = to_kelvin(face_temp)
 
-            # zoom out of face slightly image of whole head
-            face_img = to_pil_image(
-                crop_face_in_image_array(color_img, d.x, d.y, d.w, d.h, x_zoom_out=0.6, y_zoom_out=0.6))
-
             # create face object
+            over_threshold = face_temp >= self._temp_threshold
+            if not render:
+                face_objects.append(Face(detection=d, temp=face_temp, img=None, over_threshold=over_threshold))
+                continue
+
+            # zoom out of face slightly image of whole head,
+            # only converted to a PIL image when it is used
+            face_view = color_img[head_y:head_y + head_h, head_x:head_x + head_w]
+            if self._eager_face_images and over_threshold:
+                face_img, img_loader = to_pil_image(face_view), None
+            else:
+                face_img, img_loader = None, functools.partial(to_pil_image, face_view)
             face = Face(
                 detection=d,
                 temp=face_temp,
                 img=face_img,
-                over_threshold=(face_temp >= self._temp_threshold))
+                over_threshold=over_threshold,
+                img_loader=img_loader)
             face_objects.append(face)
 
             # determine properties of displayed boxes
@@ -306,16 +1376,62 @@ class FeverMonitor:
                 box_color = (255, 0, 0)  # red for above threshold
 
             # draw box around faces in the image
-            color_img = draw_face_box(
-                face=face,
-                arr=color_img,
+            display_img = draw_box(
+                arr=display_img,
+                box=(x, y, w, h),
                 color=box_color,
                 text="{}".format(str(round(face_temp, 1))),
                 box_thickness=1,
                 text_thickness=1)
 
         # convert image array to PIL image
-        pil_image = to_pil_image(color_img)
+        pil_image = to_pil_image(display_img) if render else None
+        _observe_stage("render", start)
+
+        FACES_DETECTED.inc(len(face_objects))
+        FACES_OVER_THRESHOLD.inc(sum(f.over_threshold for f in face_objects))
+
+        # queue the results to be stored
+        if self._event_store is not None:
+            self._event_store.record(face_objects, temp_unit=temp_units[self._temp_unit_index])
 
         return pil_image, face_objects
 
+    def _run_roi_inference(self, img):
+        """
+        Runs inference on each region of interest of an image.
+
+        Detections are mapped back to image coordinates. Detections
+        of the same face in overlapping regions are suppressed.
+
+        Params:
+            img: [np.ndarray] 3D image array
+
+        Returns:
+            [list] Detection objects
+        """
+        detections = []
+        try:
+            for (x, y, w, h), (network_width, network_height) in zip(self._rois, self._roi_network_dimensions):
+                self._yolo_inf.set_network_dimensions(network_width, network_height)
+                self._yolo_inf.load_image(img[y:y + h, x:x + w])
+                roi_detections = self._run_inference()
+                for d in roi_detections:
+                    d.x += x
+                    d.y += y
+                detections.extend(roi_detections)
+        finally:
+            self._yolo_inf.set_network_dimensions(NETWORK_WIDTH, NETWORK_HEIGHT)
+
+        # suppress duplicates from overlapping regions
+        if len(self._rois) > 1 and len(detections) > 1:
+            idxs = suppress_boxes(
+                boxes=to_box_array([(d.x, d.y, d.w, d.h) for d in detections]),
+                confidences=np.array([d.confidence for d in detections]),
+                class_ids=np.array([d.class_id for d in detections]),
+                iou_threshold=self._confidence_threshold if self._nms_threshold is None else self._nms_threshold,
+                method=self._nms_method,
+                top_k=self._nms_top_k)
+            detections = [detections[i] for i in idxs]
+
+        return detections
@@ -12,7 +12,6 @@ __email__ = "contact@cookjames.uk"
 
 # external module imports
 import numpy as np
-from PIL import Image
 import cv2
 import math
 
@@ -50,6 +49,8 @@ def to_color_img_array(arr, colormap_index=5):
     Applies the selected OpenCV colormap to an array.
 
     Params:
+        arr: [np.ndarray] 2D array, raw uint16 Lepton frames are
+            rescaled using integer math (see to_8bit_array)
         colormap_index: cv2 colormap applied to image
 
     Returns:
@@ -63,14 +64,51 @@ def to_color_img_array(arr, colormap_index=5):
             colormap_index, len(colormaps))
 
     # Rescale to 8 bit color
-    img = 255 * (arr - arr.min()) / (arr.max() - arr.min())
+    if np.issubdtype(arr.dtype, np.integer):
+        img = to_8bit_array(arr)
+    else:
+        img = (255 * (arr - arr.min()) / (arr.max() - arr.min())).astype(np.uint8)
 
     # Apply colormap
-    color_arr = cv2.applyColorMap(img.astype(np.uint8), colormap_index)
+    color_arr = cv2.applyColorMap(img, colormap_index)
 
     return color_arr
 
 
+def to_8bit_array(arr):
+    """
+    Rescales an integer array to the range 0 to 255.
+
+    Uses integer math only, giving the same result as the
+    floating point rescale in to_color_img_array without
+    creating floating point copies of the array.
+
+    Params:
+        arr: [np.ndarray] integer array, such as a raw uint16 Lepton frame
+
+    Returns:
+        np.ndarray: uint8 array with the same shape
+
+    Raises:
+        AssertionError: assertions fail
+    """
+    assert (np.issubdtype(arr.dtype, np.integer)), \
+        "Expected an integer array but got {}.".format(arr.dtype)
+    arr_min = int(arr.min())
+    arr_range = int(arr.max()) - arr_min
+    if arr_range == 0:
+        return np.zeros(arr.shape, dtype=np.uint8)
+
+    # uint32 holds the largest value of (uint16 value * 255)
+    if arr.dtype in (np.uint8, np.uint16):
+        img = np.subtract(arr, arr_min, dtype=np.uint32)
+    else:
+        img = arr.astype(np.int64) - arr_min
+    img *= 255
+    img //= arr_range
+    return img.astype(np.uint8)
+
+
 def to_pil_image(color_arr, width=None):
     """
     Creates and returns an PIL Image using a 3D image array.
@@ -91,6 +129,7 @@ def to_pil_image(color_arr, width=None):
         "Width value must be greater than 0."
 
     # Convert to PIl.Image.Image
+    from PIL import Image
     color_img = Image.fromarray(color_arr, 'RGB')
 
     # Scale if required
@@ -233,9 +272,9 @@ def crop_image_array(arr, x, y, w, h):
         arr = np.array(arr)
     assert (type(arr) == np.ndarray), \
         "Expected type list or np.ndarray but got {}.".format(type(arr))
-    assert (len(arr) > y and len(arr) > y + h and y > 0 and h >= 0), \
+    assert (len(arr) > y and len(arr) > y + h and y >= 0 and h >= 0), \
         "y crop index outside bounds of the array ({}, {}).".format(y, y + h)
-    assert (len(arr[0]) > x and len(arr[0]) > x + w and x > 0 and w >= 0), \
+    assert (len(arr[0]) > x and len(arr[0]) > x + w and x >= 0 and w >= 0), \
         "x crop index outside bounds of the array ({}, {}).".format(x, x + w)
     return arr[y:y+h, x:x+w]
 
@@ -280,17 +319,46 @@ def draw_face_box(face, arr, color, text="face", box_thickness=1, text_thickness
     face.detection.x, face.detection.y, face.detection.w, face.detection.h =\
         keep_box_within_bounds(arr, face.detection.x, face.detection.y, face.detection.w, face.detection.h)
 
+    return draw_box(
+        arr=arr,
+        box=(face.detection.x, face.detection.y, face.detection.w, face.detection.h),
+        color=color,
+        text=text,
+        box_thickness=box_thickness,
+        text_thickness=text_thickness)
+
+
+def draw_box(arr, box, color, text="face", box_thickness=1, text_thickness=1):
+    """
+    Draws a box and text around a detection.
+
+    The box must already be within the bounds of the array
+    (see boxes.clip_boxes).
+
+    Params:
+        arr: [np.array] 3D image array
+        box: [tuple] (x, y, w, h) box
+        color: [list] color of the box
+        text: [str] text to be drawn next to the detection
+        box_thickness: [int] thickness of the box drawn
+        text_thickness: [int] thickness of the text drawn
+
+    Returns:
+        arr: [np.array] 3D image array with detection box and text drawn
+    """
+    x, y, w, h = (int(v) for v in box)
+
     # draw box
     cv2.rectangle(img=arr,
-                  pt1=(face.detection.x, face.detection.y),
-                  pt2=(face.detection.x + face.detection.w, face.detection.y + face.detection.h),
+                  pt1=(x, y),
+                  pt2=(x + w, y + h),
                   color=color,
                   thickness=box_thickness)
 
     # draw text
     cv2.putText(img=arr,
                 text=text,
-                org=(face.detection.x+(face.detection.w//2), face.detection.y-2),
+                org=(x + (w // 2), y - 2),
                 fontFace=cv2.FONT_HERSHEY_SIMPLEX,
                 fontScale=0.4,
                 color=color,
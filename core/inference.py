@@ -21,15 +21,56 @@ __email__ = "contact@cookjames.uk"
 
 # external module imports
 import numpy as np
+import logging
+import json
 import time
 import cv2
 import os
 
+# module imports
+from core import metrics
+from core.model_cache import (get_cached_model,
+							   remove_cached_model)
+from core.boxes import non_max_suppression
+
+
+# class scores at or below this value are zeroed by YOLO layers
+# (matches the OpenCV Darknet region layer)
+YOLO_CLASS_THRESHOLD = 0.2
+
+# non-maximum suppression methods (see suppress_boxes)
+nms_methods = [
+	"OpenCV",
+	"Vectorized"]
+
+# time taken to load models
+MODEL_LOAD_SECONDS = metrics.histogram(
+	"fever_monitor_model_load_seconds",
+	"Time taken to load a YOLO model.",
+	labelnames=("engine",))
+
+# cached models that cannot be loaded are logged here
+logger = logging.getLogger(__name__)
+
+
+# structured array type for storing a whole frame of detections,
+# with the face temperature measured for each detection
+DETECTION_DTYPE = np.dtype([
+	('x', np.int32),
+	('y', np.int32),
+	('w', np.int32),
+	('h', np.int32),
+	('class_id', np.int32),
+	('confidence', np.float32),
+	('temp', np.float32)])
+
 
 class Detection:
 	"""
 	Inference detection data.
 	"""
+	__slots__ = ('x', 'y', 'w', 'h', 'class_id', 'confidence')
+
 	def __init__(self, x, y, w, h, class_id, confidence):
 		self.x = x
 		self.y = y
@@ -57,7 +98,11 @@ class YoloInference:
 		self.set_network_dimensions(w=network_width, h=network_height)
 		# init vars
 		self._net = None
+		self._output_layer_names = []
 		self._image = None
+		self._tile_width = 0
+		self._tile_height = 0
+		self._tile_overlap = 0.0
 		self.labels = []
 
 		self.init_network()
@@ -70,8 +115,12 @@ class YoloInference:
 		Reads data and configurations from the
 		cfg, weights and labels files.
 		"""
+		start = time.perf_counter()
 		self.labels = open(self.labels_path).read().strip().split("\n")
 		self._net = cv2.dnn.readNetFromDarknet(self.cfg_path, self.weights_path)
+		# determine only the *output* layer names that we need from YOLO
+		self._output_layer_names = self._net.getUnconnectedOutLayersNames()
+		MODEL_LOAD_SECONDS.labels("OpenCV").observe(time.perf_counter() - start)
 
 	def set_gpu(self, use):
 		"""
@@ -90,6 +139,20 @@ class YoloInference:
 			self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_DEFAULT)
 			self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
 
+	def _forward(self, blob):
+		"""
+		Runs a forward pass of the network.
+
+		Params:
+			blob: [np.ndarray] 4D input blob
+
+		Returns:
+			[list] output of each YOLO layer, one row per
+			candidate box (x, y, w, h, objectness, class scores)
+		"""
+		self._net.setInput(blob)
+		return self._net.forward(self._output_layer_names)
+
 	def set_network_dimensions(self, w, h):
 		"""
 		Sets the width and height of the network.
@@ -112,6 +175,61 @@ class YoloInference:
 		self._network_width = w
 		self._network_height = h
 
+	def get_network_dimensions(self):
+		"""
+		Gets the width and height of the network.
+
+		Returns:
+			[tuple] (width, height) of the network input
+		"""
+		return self._network_width, self._network_height
+
+	def set_tiling(self, tile_width=0, tile_height=0, overlap=0.25):
+		"""
+		Sets images larger than a tile to be split into tiles.
+
+		Each tile is resized to the network size rather than the
+		whole image, so small faces in large (upscaled or stitched)
+		images keep enough pixels to be detected. The tiles overlap
+		so faces on the edge of one tile are whole in another, are
+		run through the network in one batch, and the detections of
+		every tile are merged with the non-maxima suppression.
+		Images no larger than a tile are run whole.
+
+		Params:
+			tile_width: [int] width of each tile in image pixels
+				(0 disables tiling)
+			tile_height: [int] height of each tile in image pixels
+				(0 disables tiling)
+			overlap: [float] fraction of a tile overlapping the
+				next tile
+
+		Raises:
+			AssertionError: assertion failed
+		"""
+		assert (tile_width >= 0 and tile_height >= 0), \
+			"Tile width and height must be greater than or equal to 0."
+		assert (0 <= overlap < 1), \
+			"Tile overlap must be a valid value from 0 up to 1."
+		self._tile_width = tile_width
+		self._tile_height = tile_height
+		self._tile_overlap = overlap
+
+	def get_tiles(self):
+		"""
+		Returns the tiles the loaded image is split into.
+
+		Returns:
+			[list] (x, y, w, h) tiles, a single tile covering the
+			image if tiling is disabled or the image fits in a tile
+		"""
+		assert(self._image is not None), \
+			"Cannot tile image - no image loaded."
+		(H, W) = self._image.shape[:2]
+		if not (self._tile_width and self._tile_height) or (W <= self._tile_width and H <= self._tile_height):
+			return [(0, 0, W, H)]
+		return tile_grid(W, H, self._tile_width, self._tile_height, self._tile_overlap)
+
 	def load_image_from_file(self, file_path):
 		"""
 		Loads an image from a file.
@@ -146,13 +264,22 @@ class YoloInference:
 			"Image must have RGB as its third dimension"
 		self._image = image
 
-	def run(self, threshold=0.3):
+	def run(self, threshold=0.3, nms_threshold=None, nms_method="OpenCV", top_k=0):
 		"""
 		Runs inference on the image loaded and returns results.
 
 		Only returns images above the threshold passed. Uses
 		non-maxima suppression to suppress weak, overlapping
-		bounding boxes.
+		bounding boxes (see suppress_boxes). Images larger than
+		a tile are run as a batch of tiles (see set_tiling).
+
+		Params:
+			threshold: [float] confidence threshold
+			nms_threshold: [float] IoU threshold of the non-maxima
+				suppression (defaults to the confidence threshold)
+			nms_method: [string] non-maxima suppression method
+			top_k: [int] number of highest confidence boxes passed
+				to the non-maxima suppression (0 passes every box)
 
 		Returns:
 			[list] array of detection objects
@@ -160,81 +287,409 @@ class YoloInference:
 		assert(self._image is not None), \
 			"Cannot run inference - no image loaded."
 
-		(H, W) = self._image.shape[:2]
-
-		# determine only the *output* layer names that we need from YOLO
-		ln = self._net.getLayerNames()
-		ln = [ln[i[0] - 1] for i in self._net.getUnconnectedOutLayers()]
-
-		# 1 / 255.0
-		blob = cv2.dnn.blobFromImage(self._image, 1 / 255.0, (self._network_width, self._network_height), swapRB=True, crop=False)
-		self._net.setInput(blob)
+		# run every tile of the image through the network in one batch
+		tiles = self.get_tiles()
+		if len(tiles) == 1:
+			blob = to_blob(self._image, self._network_width, self._network_height)
+		else:
+			blob = cv2.dnn.blobFromImages(
+				[self._image[y:y + h, x:x + w] for x, y, w, h in tiles],
+				1 / 255.0, (self._network_width, self._network_height), swapRB=True, crop=False)
 
 		# run inference
 		start = time.time()
-		layerOutputs = self._net.forward(ln)
+		layerOutputs = self._forward(blob)
 		end = time.time()
 		inference_time = end - start
 
 		# print("[INFO] YOLO took {:.6f} seconds".format(inference_time))
 
-		# initialize our lists of detected bounding boxes, confidences, and
-		# class IDs, respectively
-		boxes = []
-		confidences = []
-		classIDs = []
-
-		# loop over each of the layer outputs
-		for output in layerOutputs:
-			# loop over each of the detections
-			for detection in output:
-				# extract the class ID and confidence (i.e., probability) of
-				# the current object detection
-				scores = detection[5:]
-				classID = np.argmax(scores)
-				confidence = scores[classID]
-
-				# filter out weak predictions by ensuring the detected
-				# probability is greater than the minimum probability
-				if confidence > threshold:
-					# scale the bounding box coordinates back relative to the
-					# size of the image, keeping in mind that YOLO actually
-					# returns the center (x, y)-coordinates of the bounding
-					# box followed by the boxes' width and height
-					box = detection[0:4] * np.array([W, H, W, H])
-					(centerX, centerY, width, height) = box.astype("int")
-
-					# use the center (x, y)-coordinates to derive the top and
-					# and left corner of the bounding box
-					x = int(centerX - (width / 2))
-					y = int(centerY - (height / 2))
-
-					# update our list of bounding box coordinates, confidences,
-					# and class IDs
-					boxes.append([x, y, int(width), int(height)])
-					confidences.append(float(confidence))
-					classIDs.append(classID)
+		# detections of each tile, with shape [tiles, detections, values]
+		output = np.concatenate([o.reshape(len(tiles), -1, o.shape[-1]) for o in layerOutputs], axis=1)
+
+		results = [self._decode_detections(o, tile, threshold) for o, tile in zip(output, tiles)]
+		boxes = np.concatenate([r[0] for r in results])
+		confidences = np.concatenate([r[1] for r in results])
+		classIDs = np.concatenate([r[2] for r in results])
+		if len(boxes) == 0:
+			return [], inference_time
 
 		# apply non-maxima suppression to suppress weak, overlapping bounding boxes
 		# (keeps good indexes)
-		idxs = cv2.dnn.NMSBoxes(boxes, confidences, threshold, threshold)
-
-		# ensure at least one detection exists
-		detections = []
-
-		if len(idxs) > 0:
-			# loop over the indexes we are keeping
-			for i in idxs.flatten():
-				# extract the bounding box coordinates
-				(x, y) = (boxes[i][0], boxes[i][1])
-				(w, h) = (boxes[i][2], boxes[i][3])
-
-				detections.append(Detection(
-					x=boxes[i][0],
-					y=boxes[i][1],
-					w=boxes[i][2],
-					h=boxes[i][3],
-					class_id=classIDs[i],
-					confidence=confidences[i]))
+		idxs = suppress_boxes(
+			boxes=boxes,
+			confidences=confidences,
+			class_ids=classIDs,
+			iou_threshold=threshold if nms_threshold is None else nms_threshold,
+			method=nms_method,
+			top_k=top_k)
+
+		detections = [Detection(
+			x=x,
+			y=y,
+			w=w,
+			h=h,
+			class_id=class_id,
+			confidence=confidence) for (x, y, w, h), class_id, confidence in zip(
+				boxes[idxs].tolist(), classIDs[idxs].tolist(), confidences[idxs].tolist())]
 		return detections, inference_time
 
+	def _decode_detections(self, output, tile, threshold):
+		"""
+		Filters the detections of a tile by confidence and converts
+		them to image coordinates.
+
+		Params:
+			output: [np.ndarray] detections with shape [N, 5 + classes]
+			tile: [tuple] (x, y, w, h) tile of the image
+			threshold: [float] confidence threshold
+
+		Returns:
+			[np.ndarray] int array of (x, y, w, h) boxes with shape [M, 4]
+			[np.ndarray] confidence of each box
+			[np.ndarray] class of each box
+		"""
+		(X, Y, W, H) = tile
+
+		# extract the class ID and confidence (i.e., probability) of
+		# every detection at once
+		scores = output[:, 5:]
+		classIDs = np.argmax(scores, axis=1)
+		confidences = scores[np.arange(len(scores)), classIDs]
+
+		# filter out weak predictions by ensuring the detected
+		# probability is greater than the minimum probability
+		mask = confidences > threshold
+
+		# scale the bounding box coordinates back relative to the
+		# size of the tile, keeping in mind that YOLO actually
+		# returns the center (x, y)-coordinates of the bounding
+		# box followed by the boxes' width and height
+		box = (output[mask, 0:4] * np.array([W, H, W, H])).astype("int")
+
+		# use the center (x, y)-coordinates to derive the top and
+		# and left corner of the bounding box, in image coordinates
+		boxes = np.stack([
+			(box[:, 0] - box[:, 2] / 2).astype(int) + X,
+			(box[:, 1] - box[:, 3] / 2).astype(int) + Y,
+			box[:, 2],
+			box[:, 3]], axis=1)
+		return boxes, confidences[mask], classIDs[mask]
+
+
+class OnnxInference(YoloInference):
+	"""
+	YOLO model inference using ONNX Runtime.
+
+	Runs an ONNX model exported by core.onnx_export on the
+	CPU. Has the same load_image/run contract as YoloInference
+	so the two can be swapped.
+
+	With use_cache set, the optimized model is loaded from the
+	model cache (see core.model_cache) when running on the CPU,
+	which creates sessions several times faster.
+	"""
+	def __init__(self, onnx_path, labels_path, network_width=64, network_height=64, use_gpu=False, num_threads=0,
+				 use_cache=False):
+		assert (os.path.isfile(onnx_path)), \
+			"ONNX file '{}' not found.".format(onnx_path)
+		assert (os.path.isfile(labels_path)), \
+			"Labels file '{}' not found.".format(labels_path)
+		self.onnx_path = onnx_path
+		self.labels_path = labels_path
+		# network dimensions
+		self._network_width = None
+		self._network_height = None
+		self.set_network_dimensions(w=network_width, h=network_height)
+		# init vars
+		self._session = None
+		self._input_name = None
+		self._yolo_layers = []
+		self._image = None
+		self._tile_width = 0
+		self._tile_height = 0
+		self._tile_overlap = 0.0
+		self._use_gpu = use_gpu
+		self._num_threads = 0
+		self._use_cache = use_cache
+		self.labels = []
+
+		self.set_num_threads(num_threads)
+		self.init_network()
+
+	def init_network(self):
+		"""
+		Initialises the network.
+
+		Reads the labels file and creates an ONNX Runtime
+		session for the model.
+		"""
+		import onnxruntime
+
+		start = time.perf_counter()
+		self.labels = open(self.labels_path).read().strip().split("\n")
+
+		options = onnxruntime.SessionOptions()
+		options.intra_op_num_threads = self._num_threads
+		options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+		providers = ['CPUExecutionProvider']
+		if self._use_gpu:
+			providers.insert(0, 'CUDAExecutionProvider')
+
+		# the cached model is already optimized for the CPU, the
+		# model is loaded as if uncached if the cache cannot be used
+		self._session = None
+		if self._use_cache and not self._use_gpu:
+			try:
+				cached_options = onnxruntime.SessionOptions()
+				cached_options.intra_op_num_threads = self._num_threads
+				cached_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+				self._session = onnxruntime.InferenceSession(
+					get_cached_model(self.onnx_path), sess_options=cached_options, providers=providers)
+			except Exception as e:
+				logger.warning("Failed loading cached model for '{}', loading the model: {}".format(
+					self.onnx_path, e))
+				# created again the next time the model is loaded
+				try:
+					remove_cached_model(self.onnx_path)
+				except Exception:
+					pass
+		if self._session is None:
+			self._session = onnxruntime.InferenceSession(self.onnx_path, sess_options=options, providers=providers)
+		self._input_name = self._session.get_inputs()[0].name
+		self._yolo_layers = json.loads(self._session.get_modelmeta().custom_metadata_map['yolo_layers'])
+		MODEL_LOAD_SECONDS.labels("ONNX Runtime").observe(time.perf_counter() - start)
+
+	def set_gpu(self, use):
+		"""
+		Sets inference to run using a local GPU.
+
+		Requires the onnxruntime-gpu package, otherwise
+		inference falls back to the CPU.
+
+		Params:
+			use: [bool] set to True to use gpu
+		"""
+		if use != self._use_gpu:
+			self._use_gpu = use
+			self.init_network()
+
+	def set_num_threads(self, num_threads):
+		"""
+		Sets the number of threads used to run inference.
+
+		Params:
+			num_threads: [int] number of threads (0 lets
+			ONNX Runtime decide)
+
+		Raises:
+			AssertionError: assertion failed
+		"""
+		assert (type(num_threads) == int and num_threads >= 0), \
+			"Number of threads must be an integer greater than or equal to 0."
+		if num_threads != self._num_threads:
+			self._num_threads = num_threads
+			if self._session is not None:
+				self.init_network()
+
+	def _forward(self, blob):
+		"""
+		Runs a forward pass of the network.
+
+		Params:
+			blob: [np.ndarray] 4D input blob
+
+		Returns:
+			[list] output of each YOLO layer, one row per
+			candidate box (x, y, w, h, objectness, class scores)
+		"""
+		outputs = self._session.run(None, {self._input_name: blob})
+		return [decode_yolo_output(
+			output=output,
+			anchors=layer['anchors'],
+			scale_x_y=layer['scale_x_y'],
+			network_width=self._network_width,
+			network_height=self._network_height) for output, layer in zip(outputs, self._yolo_layers)]
+
+
+def suppress_boxes(boxes, confidences, class_ids, iou_threshold, method="OpenCV", top_k=0):
+	"""
+	Returns the boxes kept by non-maxima suppression.
+
+	Methods:
+		OpenCV: cv2.dnn.NMSBoxes, boxes of every class
+			suppress each other
+		Vectorized: core.boxes.non_max_suppression, run on the
+			arrays directly, only boxes of the same class
+			suppress each other
+
+	Params:
+		boxes: [np.ndarray] int array of (x, y, w, h) boxes with shape [N, 4]
+		confidences: [np.ndarray] confidence of each box with shape [N]
+		class_ids: [np.ndarray] class of each box with shape [N]
+		iou_threshold: [float] maximum IoU of a box kept with a box
+			of a higher confidence
+		method: [string] non-maxima suppression method
+		top_k: [int] number of highest confidence boxes considered
+			(0 considers every box)
+
+	Returns:
+		[np.ndarray] int array of the indexes of the boxes kept,
+		highest confidence first
+
+	Raises:
+		[Exception] method not recognised
+	"""
+	if method not in nms_methods:
+		raise Exception("NMS method '{}' not recognised.".format(method))
+	if len(boxes) == 0:
+		return np.empty(0, dtype=int)
+	if method == "Vectorized":
+		return non_max_suppression(boxes, confidences, iou_threshold, class_ids=class_ids, top_k=top_k)
+	# boxes are already over the confidence threshold
+	idxs = cv2.dnn.NMSBoxes(
+		np.asarray(boxes, dtype=int).tolist(), np.asarray(confidences, dtype=np.float32).tolist(), 0.0, iou_threshold,
+		top_k=top_k)
+	return np.array(idxs, dtype=int).reshape(-1)
+
+
+def detections_to_array(detections, temps=None):
+	"""
+	Converts detections to a structured array.
+
+	Params:
+		detections: [list] Detection objects
+		temps: [list] temperature of each detection (optional,
+			set to NaN if not passed)
+
+	Returns:
+		[np.ndarray] structured array of type DETECTION_DTYPE
+
+	Raises:
+		AssertionError: assertion failed
+	"""
+	assert (temps is None or len(temps) == len(detections)), \
+		"A temperature must be passed for each detection."
+	arr = np.empty(len(detections), dtype=DETECTION_DTYPE)
+	for field in Detection.__slots__:
+		arr[field] = [getattr(d, field) for d in detections]
+	arr['temp'] = np.nan if temps is None else temps
+	return arr
+
+
+def array_to_detections(arr):
+	"""
+	Converts a structured array to detections.
+
+	Params:
+		arr: [np.ndarray] structured array of type DETECTION_DTYPE
+
+	Returns:
+		[list] Detection objects
+	"""
+	return [Detection(
+		x=int(row['x']),
+		y=int(row['y']),
+		w=int(row['w']),
+		h=int(row['h']),
+		class_id=int(row['class_id']),
+		confidence=float(row['confidence'])) for row in arr]
+
+
+def tile_grid(width, height, tile_width, tile_height, overlap=0.25):
+	"""
+	Splits an image into overlapping tiles.
+
+	Tiles are spread evenly with at least the overlap passed
+	between neighbours, and the last row and column of tiles
+	end at the image edges. Tiles are cut to the image if the
+	image is smaller than a tile.
+
+	Params:
+		width: [int] width of the image
+		height: [int] height of the image
+		tile_width: [int] width of each tile
+		tile_height: [int] height of each tile
+		overlap: [float] minimum fraction of a tile overlapping
+			the next tile
+
+	Returns:
+		[list] (x, y, w, h) tiles, in rows from the top left
+
+	Raises:
+		AssertionError: assertion failed
+	"""
+	assert (tile_width > 0 and tile_height > 0), \
+		"Tile width and height must be greater than 0."
+	assert (0 <= overlap < 1), \
+		"Tile overlap must be a valid value from 0 up to 1."
+
+	def positions(size, tile_size):
+		if size <= tile_size:
+			return [0]
+		stride = tile_size * (1 - overlap)
+		num_tiles = int(np.ceil((size - tile_size) / stride)) + 1
+		return [int(round(i * (size - tile_size) / (num_tiles - 1))) for i in range(num_tiles)]
+
+	tile_width = min(tile_width, width)
+	tile_height = min(tile_height, height)
+	return [(x, y, tile_width, tile_height)
+			for y in positions(height, tile_height)
+			for x in positions(width, tile_width)]
+
+
+def to_blob(image, network_width, network_height):
+	"""
+	Creates the network input blob for an image.
+
+	Params:
+		image: [np.ndarray] 3D BGR image array
+		network_width: [int] width of the network input
+		network_height: [int] height of the network input
+
+	Returns:
+		[np.ndarray] 4D float32 blob scaled to 0-1 with shape
+		[1, 3, network_height, network_width]
+	"""
+	return cv2.dnn.blobFromImage(image, 1 / 255.0, (network_width, network_height), swapRB=True, crop=False)
+
+
+def decode_yolo_output(output, anchors, scale_x_y, network_width, network_height):
+	"""
+	Decodes the raw output of a YOLO layer.
+
+	Produces the same layout as the OpenCV Darknet region
+	layer: centre x, centre y, width and height relative to
+	the image, objectness, then class scores multiplied by
+	the objectness. The boxes of each image of a batch follow
+	the boxes of the image before.
+
+	Params:
+		output: [np.ndarray] raw layer output with shape
+			[batch, anchors * (5 + classes), rows, cols]
+		anchors: [list] anchor (width, height) pairs in pixels
+		scale_x_y: [float] box centre scale factor
+		network_width: [int] width of the network input
+		network_height: [int] height of the network input
+
+	Returns:
+		[np.ndarray] decoded boxes with shape
+		[batch * rows * cols * anchors, 5 + classes]
+	"""
+	batch, channels, rows, cols = output.shape
+	num_anchors = len(anchors)
+	size = channels // num_anchors
+
+	# reorder to [batch, rows, cols, anchors, values]
+	arr = output.reshape(batch, num_anchors, size, rows, cols).transpose(0, 3, 4, 1, 2)
+	arr = 1 / (1 + np.exp(-arr))
+
+	anchors = np.array(anchors, dtype=np.float32)
+	arr[..., 0] = (np.arange(cols, dtype=np.float32)[None, :, None] + arr[..., 0] * scale_x_y - (scale_x_y - 1) / 2) / cols
+	arr[..., 1] = (np.arange(rows, dtype=np.float32)[:, None, None] + arr[..., 1] * scale_x_y - (scale_x_y - 1) / 2) / rows
+	arr[..., 2] = np.exp(output[:, 2::size].transpose(0, 2, 3, 1)) * anchors[:, 0] / network_width
+	arr[..., 3] = np.exp(output[:, 3::size].transpose(0, 2, 3, 1)) * anchors[:, 1] / network_height
+	arr[..., 5:] *= arr[..., 4:5]
+	arr[..., 5:][arr[..., 5:] <= YOLO_CLASS_THRESHOLD] = 0
+
+	return arr.reshape(-1, size)
@@ -14,27 +14,153 @@ __email__ = "contact@cookjames.uk"
 
 
 # external module imports
-from flirpy.camera.lepton import Lepton
 import numpy as np
+import time
+import os
+
+# module imports
+from core import metrics
 
 
 # Lepton capture image dimensions
 img_dimension = 160, 120
 
+# seconds a device scan is reused for before scanning again
+DEVICE_SCAN_INTERVAL = 5.0
+
+# seconds between reconnect attempts, doubled after each failed attempt
+RECONNECT_INITIAL_DELAY = 0.25
+RECONNECT_MAX_DELAY = 4.0
+
+# number of times the camera was reconnected after a capture failed
+CAMERA_RECONNECTS = metrics.counter(
+    "fever_monitor_camera_reconnects_total",
+    "Times the Lepton camera was reconnected after a capture failed.")
+
+# flat-field correction (FFC) states reported in the telemetry status bits
+FFC_STATE_NEVER_COMMANDED = 0
+FFC_STATE_IMMINENT = 1
+FFC_STATE_IN_PROGRESS = 2
+FFC_STATE_COMPLETE = 3
+
+
+class CaptureMetadata:
+    """
+    Telemetry data recorded with a captured image.
+
+    Values are None when no telemetry was decoded for the
+    image.
+    """
+    __slots__ = ('uptime_ms', 'ffc_elapsed_ms', 'ffc_state', 'frame_count')
+
+    def __init__(self, uptime_ms=None, ffc_elapsed_ms=None, ffc_state=None, frame_count=None):
+        self.uptime_ms = uptime_ms
+        self.ffc_elapsed_ms = ffc_elapsed_ms
+        self.ffc_state = ffc_state
+        self.frame_count = frame_count
+
+    def in_ffc_window(self, window):
+        """
+        Returns True if the image was captured during a flat-field
+        correction or within a period of time after one.
+
+        Temperatures in these images are not reliable. Returns
+        False if no telemetry was decoded for the image.
+
+        Params:
+            window: [float] seconds after a flat-field correction
+
+        Returns:
+            [bool] True if the image was captured within the window
+        """
+        if self.ffc_state in (FFC_STATE_IMMINENT, FFC_STATE_IN_PROGRESS):
+            return True
+        if self.ffc_elapsed_ms is None or self.ffc_state == FFC_STATE_NEVER_COMMANDED:
+            return False
+        return self.ffc_elapsed_ms < window * 1000
+
 
 class LeptonCamera:
-    def __init__(self):
+    def __init__(self, reconnect_timeout=0.0):
+        # imported on first use as flirpy is slow to import and is
+        # not needed to process recorded frames
+        from flirpy.camera.lepton import Lepton
         self._camera = Lepton()
+        self._raw_img = None
         self._img = None
+        self._metadata = None
         self._device_id = None
+        self._last_scan_time = None
+        self._reconnect_timeout = 0.0
+        self._reconnect_count = 0
+
+        self.set_reconnect_timeout(reconnect_timeout)
 
         self._find_lepton()
         if self._device_id is None:
             raise ValueError("Lepton camera not connected.")
 
+    def set_reconnect_timeout(self, timeout):
+        """
+        Sets how long capture keeps trying to reconnect to the
+        Lepton camera after a capture fails.
+
+        Reconnect attempts are made with an exponentially
+        increasing delay between them. Set to 0 to raise the
+        first capture failure.
+
+        Params:
+            timeout: [float] seconds to keep trying to reconnect
+
+        Raises:
+            AssertionError: assertions fail
+        """
+        assert ((type(timeout) == int or type(timeout) == float) and timeout >= 0), \
+            "Reconnect timeout must be a positive number of seconds."
+        self._reconnect_timeout = timeout
+
+    def get_reconnect_count(self):
+        """
+        Returns the number of times the camera was reconnected
+        after a capture failed.
+
+        Returns:
+             int: number of reconnects
+        """
+        return self._reconnect_count
+
     def capture(self):
         """
-        Captures and stores an image.
+        Captures and stores an image and its telemetry data.
+
+        If the capture fails, the camera is reopened and the
+        capture is retried until the reconnect timeout passes.
+
+        Raises:
+            ValueError: Failed to open Lepton camera.
+            IOError: Lepton not connected.
+        """
+        deadline = time.monotonic() + self._reconnect_timeout
+        delay = RECONNECT_INITIAL_DELAY
+        failed = False
+        while True:
+            try:
+                self._grab()
+                break
+            except Exception:
+                if time.monotonic() + delay > deadline:
+                    raise
+                failed = True
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+        if failed:
+            self._reconnect_count += 1
+            CAMERA_RECONNECTS.inc()
+
+    def _grab(self):
+        """
+        Grabs an image and its telemetry data from the camera.
 
         Raises:
             ValueError: Failed to open Lepton camera.
@@ -47,14 +173,29 @@ class LeptonCamera:
         if self._device_id is None:
             raise ValueError("Lepton camera not connected.")
 
-        # Grab image and telemetry data
+        # Grab image and telemetry data, keeping the uint16
+        # centikelvin values (no copy is made for uint16 frames)
+        self._img = None
         try:
-            self._img = self._camera.grab(self._device_id).astype(np.float32)
+            self._raw_img = self._camera.grab(self._device_id).astype(np.uint16, copy=False)
         except Exception as e:
-            self._img = None
+            self._raw_img = None
+            self._metadata = None
             self._device_id = None
+
+            # close the video capture so it is reopened on the next grab
+            self._camera.release()
+            self._camera.cap = None
             raise Exception("Lepton capture failed: {}".format(e))
 
+        # telemetry attributes are only set once telemetry is decoded
+        status = getattr(self._camera, 'status', None)
+        self._metadata = CaptureMetadata(
+            uptime_ms=getattr(self._camera, 'uptime_ms', None),
+            ffc_elapsed_ms=getattr(self._camera, 'ffc_elapsed_ms', None),
+            ffc_state=None if status is None else (int(status) >> 4) & 0x3,
+            frame_count=getattr(self._camera, 'frame_count', None))
+
     def get_img(self):
         """
         Returns the raw thermal image captured.
@@ -65,10 +206,41 @@ class LeptonCamera:
         Raises:
             AssertionError: assertions fail
         """
-        assert (self._img is not None), \
+        assert (self._raw_img is not None), \
             "No telemetry data collected."
+        if self._img is None:
+            self._img = self._raw_img.astype(np.float32)
         return self._img
 
+    def get_raw_img(self):
+        """
+        Returns the raw thermal image captured without converting
+        it to floating point.
+
+        Returns:
+            np.uint16: thermal data array in centikelvin
+
+        Raises:
+            AssertionError: assertions fail
+        """
+        assert (self._raw_img is not None), \
+            "No telemetry data collected."
+        return self._raw_img
+
+    def get_metadata(self):
+        """
+        Returns the telemetry data recorded with the image captured.
+
+        Returns:
+            CaptureMetadata: telemetry data of the image
+
+        Raises:
+            AssertionError: assertions fail
+        """
+        assert (self._metadata is not None), \
+            "No telemetry data collected."
+        return self._metadata
+
     def get_uptime(self):
         """
         Returns Lepton camera uptime in seconds.
@@ -79,7 +251,7 @@ class LeptonCamera:
         Raises:
             AssertionError: assertions fail
         """
-        assert (self._img is not None), \
+        assert (self._raw_img is not None), \
             "No telemetry data collected."
         return self._camera.uptime_ms//1000
 
@@ -93,7 +265,7 @@ class LeptonCamera:
         Raises:
             AssertionError: assertions fail
         """
-        assert (self._img is not None), \
+        assert (self._raw_img is not None), \
             "No telemetry data collected."
         return self._camera.ffc_elapsed_ms//1000
 
@@ -101,10 +273,16 @@ class LeptonCamera:
         """
         Returns True if the Lepton camera is connected.
 
+        A device found by a recent scan is assumed to still be
+        connected, avoiding a device scan for every check.
+
         Returns:
              [bool]] True if the Lepton camera is connected
         """
-        self._find_lepton()
+        if (self._device_id is None
+                or self._last_scan_time is None
+                or time.monotonic() - self._last_scan_time > DEVICE_SCAN_INTERVAL):
+            self._find_lepton()
         return self._device_id is not None
 
     def _find_lepton(self):
@@ -115,6 +293,34 @@ class LeptonCamera:
         Otherwise sets device_id to None.
         """
         self._device_id = self._camera.find_video_device()
+        self._last_scan_time = time.monotonic()
+
+
+def load_frame(file_path):
+    """
+    Loads a raw Lepton frame saved to a file.
+
+    Frames can be saved as NumPy '.npy' files or as comma
+    separated '.csv' files.
+
+    Params:
+        file_path - [string] path to the frame file
+
+    Returns:
+        np.float32: thermal data array
+
+    Raises:
+        AssertionError: assertions fail
+    """
+    assert (os.path.isfile(file_path)), \
+        "Frame file '{}' not found.".format(file_path)
+    extension = os.path.splitext(file_path)[1].lower()
+    assert (extension in ('.npy', '.csv')), \
+        "Frame file '{}' must be a '.npy' or '.csv' file.".format(file_path)
+
+    if extension == '.npy':
+        return np.load(file_path).astype(np.float32)
+    return np.loadtxt(file_path, delimiter=',').astype(np.float32)
 
 
 def to_kelvin(value):
@@ -0,0 +1,247 @@
+"""
+Memory allocation tracking for long runs of the fever monitor.
+
+Uses tracemalloc to trace the memory allocated by Python (in
+every thread, so images and faces held by the GUI are traced
+as well as those held by the monitor). After each frame the
+net growth of the memory traced and of the number of memory
+blocks since the previous frame are recorded, with the peak
+memory during the frame. The growth is what a frame allocated
+less what it freed, so it is close to 0 for a frame that frees
+everything it allocates (however much that is) and can be
+negative; memory that is never freed shows up as a steady
+growth per frame. Every interval frames a snapshot is taken and
+compared with the previous snapshot, reporting the allocation
+sites that grew the most, so memory that is never freed stands
+out as a site that grows in every report.
+
+Tracing slows down allocations and snapshots take time in
+proportion to the memory traced, so tracking is only enabled
+to find memory growth.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import tracemalloc
+import logging
+import time
+import sys
+
+
+# allocations by tracemalloc and the import system are not reported
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")]
+
+
+class AllocationSite:
+    """
+    Growth of the memory allocated at a line of code between
+    two snapshots.
+    """
+    __slots__ = ('location', 'size', 'size_diff', 'count', 'count_diff')
+
+    def __init__(self, location, size, size_diff, count, count_diff):
+        self.location = location
+        self.size = size
+        self.size_diff = size_diff
+        self.count = count
+        self.count_diff = count_diff
+
+    def __str__(self):
+        return "{}: {:+.1f} KiB ({:+d} blocks), {:.1f} KiB total".format(
+            self.location, self.size_diff / 1024, self.count_diff, self.size / 1024)
+
+
+class MemoryReport:
+    """
+    Memory allocated over the frames between two snapshots.
+
+    net_bytes_per_frame and net_blocks_per_frame are the mean
+    net growth per frame of the memory traced and of the number
+    of memory blocks allocated (negative if memory was freed),
+    not the number of allocations made.
+    """
+    __slots__ = ('frames', 'elapsed', 'traced', 'net_bytes_per_frame', 'net_blocks_per_frame', 'frame_peak',
+                 'top_sites')
+
+    def __init__(self, frames, elapsed, traced, net_bytes_per_frame, net_blocks_per_frame, frame_peak, top_sites):
+        self.frames = frames
+        self.elapsed = elapsed
+        self.traced = traced
+        self.net_bytes_per_frame = net_bytes_per_frame
+        self.net_blocks_per_frame = net_blocks_per_frame
+        self.frame_peak = frame_peak
+        self.top_sites = top_sites
+
+    def __str__(self):
+        lines = ["Memory over {} frames ({:.0f} s): {:.1f} MiB traced, "
+                 "net {:+.1f} KiB and {:+.1f} blocks per frame, frame peak {:.1f} MiB".format(
+                     self.frames, self.elapsed, self.traced / 2 ** 20, self.net_bytes_per_frame / 1024,
+                     self.net_blocks_per_frame, self.frame_peak / 2 ** 20)]
+        lines.extend("    {}".format(site) for site in self.top_sites)
+        return "\n".join(lines)
+
+
+class MemoryTracker:
+    """
+    Tracks the net memory growth per frame and the allocation
+    sites that grow between snapshots.
+
+    Call frame once per frame, a report is returned every
+    interval frames (and logged). Only the latest report is
+    kept, so tracking does not grow the memory itself.
+    """
+
+    def __init__(self, interval=100, top=10, traceback_frames=1, logger=None):
+        assert (type(interval) == int and interval > 0), \
+            "Interval must be a valid integer greater than 0."
+        assert (type(top) == int and top >= 0), \
+            "Top must be a valid integer of 0 or greater."
+        self._interval = interval
+        self._top = top
+        self._traceback_frames = traceback_frames
+        self._logger = logger if logger is not None else logging.getLogger(__name__)
+        self._started_tracing = False
+        self._snapshot = None
+        self._snapshot_time = 0.0
+        self._frames = 0
+        self._frame_traced = 0
+        self._frame_blocks = 0
+        self._bytes_total = 0
+        self._blocks_total = 0
+        self._frame_peak = 0
+        self._last_report = None
+
+    def start(self):
+        """
+        Starts tracing memory allocations (if not already traced)
+        and takes the first snapshot.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._traceback_frames)
+            self._started_tracing = True
+        self._snapshot = self._take_snapshot()
+        self._snapshot_time = time.perf_counter()
+        self._reset_frames()
+
+    def stop(self):
+        """
+        Stops tracing memory allocations if tracing was started
+        by start.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._snapshot = None
+
+    def is_tracking(self):
+        """
+        Returns True if the tracker was started and not stopped.
+
+        Returns:
+            [bool] True if tracking
+        """
+        return self._snapshot is not None
+
+    def frame(self):
+        """
+        Records the net growth of the memory traced and of the
+        number of memory blocks since the previous frame, and
+        compares a new snapshot with the previous snapshot
+        every interval frames.
+
+        Returns:
+            [MemoryReport] report if a snapshot was taken,
+            otherwise None
+
+        Raises:
+            [AssertionError] tracker not started
+        """
+        assert (self._snapshot is not None), \
+            "Memory tracker must be started before tracking frames."
+        traced, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        self._bytes_total += traced - self._frame_traced
+        self._blocks_total += blocks - self._frame_blocks
+        self._frame_peak = max(self._frame_peak, peak)
+        self._frame_traced = traced
+        self._frame_blocks = blocks
+        tracemalloc.reset_peak()
+
+        self._frames += 1
+        if self._frames < self._interval:
+            return None
+        return self._report()
+
+    def get_last_report(self):
+        """
+        Returns the latest report.
+
+        Returns:
+            [MemoryReport] latest report, or None if no snapshot
+            has been compared yet
+        """
+        return self._last_report
+
+    def _report(self):
+        """
+        Compares a new snapshot with the previous snapshot and
+        returns the report of the frames since it.
+        """
+        snapshot = self._take_snapshot()
+        now = time.perf_counter()
+        stats = snapshot.compare_to(self._snapshot, "traceback" if self._traceback_frames > 1 else "lineno")
+        stats.sort(key=lambda stat: (stat.size_diff, stat.count_diff), reverse=True)
+        sites = [AllocationSite(
+            location=", ".join("{}:{}".format(f.filename, f.lineno) for f in stat.traceback),
+            size=stat.size,
+            size_diff=stat.size_diff,
+            count=stat.count,
+            count_diff=stat.count_diff) for stat in stats[:self._top] if stat.size_diff > 0]
+
+        report = MemoryReport(
+            frames=self._frames,
+            elapsed=now - self._snapshot_time,
+            traced=self._frame_traced,
+            net_bytes_per_frame=self._bytes_total / self._frames,
+            net_blocks_per_frame=self._blocks_total / self._frames,
+            frame_peak=self._frame_peak,
+            top_sites=sites)
+        self._last_report = report
+        self._logger.info(str(report))
+
+        # the memory allocated by the snapshot is not counted in the next frame
+        self._snapshot = snapshot
+        self._snapshot_time = now
+        self._reset_frames()
+        return report
+
+    def _reset_frames(self):
+        """
+        Clears the frames recorded since the last snapshot.
+        """
+        self._frames = 0
+        self._frame_traced = tracemalloc.get_traced_memory()[0]
+        self._frame_blocks = sys.getallocatedblocks()
+        self._bytes_total = 0
+        self._blocks_total = 0
+        self._frame_peak = 0
+        tracemalloc.reset_peak()
+
+    @staticmethod
+    def _take_snapshot():
+        """
+        Returns a snapshot of the memory allocated, without the
+        allocations of tracemalloc and the import system.
+        """
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
@@ -0,0 +1,244 @@
+"""
+Operational metrics in the Prometheus text format.
+
+Counters and histograms are created once at module level by
+the modules they measure and are registered in a single
+registry. Updating a metric is an addition under a lock, and
+the text is only created when the metrics are scraped (see
+render), so the metrics cost almost nothing when nobody reads
+them.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import threading
+import bisect
+import math
+
+
+# default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# metrics registered by name
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    """
+    Metric with a value per set of label values.
+    """
+    type_name = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *labelvalues):
+        """
+        Returns the metric for a set of label values.
+
+        Params:
+            labelvalues: [string] one value per label name
+
+        Returns:
+            metric for the label values
+        """
+        assert (len(labelvalues) == len(self.labelnames)), \
+            "Expected {} label values but got {}.".format(len(self.labelnames), len(labelvalues))
+        labelvalues = tuple(str(v) for v in labelvalues)
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._create_child())
+        return child
+
+    def _label_text(self, labelvalues, extra=()):
+        pairs = list(zip(self.labelnames, labelvalues)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join('{}="{}"'.format(k, v) for k, v in pairs) + "}"
+
+    def render(self):
+        """
+        Returns the metric in the Prometheus text format.
+
+        Returns:
+            [list] lines of text
+        """
+        lines = ["# HELP {} {}".format(self.name, self.documentation),
+                 "# TYPE {} {}".format(self.name, self.type_name)]
+        with self._lock:
+            children = sorted(self._children.items())
+        for labelvalues, child in children:
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+
+class _CounterValue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """
+    Value that only increases, such as the number of frames.
+    """
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _create_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        """
+        Increases the counter (without labels).
+
+        Params:
+            amount: [int] amount added
+        """
+        self._default.inc(amount)
+
+    def get(self, *labelvalues):
+        """
+        Returns the value of the counter.
+
+        Returns:
+            [float] counter value
+        """
+        return self.labels(*labelvalues).value
+
+    def _render_child(self, labelvalues, child):
+        return ["{}{} {}".format(self.name, self._label_text(labelvalues), child.value)]
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values, such as latencies.
+    """
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _create_child(self):
+        return _HistogramValue(self._buckets)
+
+    def observe(self, value):
+        """
+        Records a value (without labels).
+
+        Params:
+            value: [float] value observed
+        """
+        self._default.observe(value)
+
+    def _render_child(self, labelvalues, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(list(self._buckets) + [math.inf], counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == math.inf else repr(float(bound))
+            lines.append("{}_bucket{} {}".format(self.name, self._label_text(labelvalues, [("le", le)]), cumulative))
+        lines.append("{}_sum{} {}".format(self.name, self._label_text(labelvalues), total))
+        lines.append("{}_count{} {}".format(self.name, self._label_text(labelvalues), count))
+        return lines
+
+
+def _register(metric):
+    with _registry_lock:
+        if metric.name in _registry:
+            existing = _registry[metric.name]
+            assert (type(existing) == type(metric) and existing.labelnames == metric.labelnames), \
+                "Metric '{}' is already registered with a different type or labels.".format(metric.name)
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """
+    Creates and registers a counter, or returns the counter
+    already registered with the name.
+
+    Params:
+        name: [string] metric name
+        documentation: [string] metric description
+        labelnames: [tuple] label names
+
+    Returns:
+        [Counter] counter
+    """
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """
+    Creates and registers a histogram, or returns the histogram
+    already registered with the name.
+
+    Params:
+        name: [string] metric name
+        documentation: [string] metric description
+        labelnames: [tuple] label names
+        buckets: [tuple] upper bounds of the buckets
+
+    Returns:
+        [Histogram] histogram
+    """
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render():
+    """
+    Returns all metrics registered in the Prometheus text format.
+
+    Returns:
+        [string] metrics text
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,235 @@
+"""
+On-disk cache of optimized ONNX models.
+
+Creating an ONNX Runtime session parses the model and runs the
+graph optimizations every time a model is loaded. The cache
+stores the optimized model the first time a model is loaded,
+with the weights in a separate file that ONNX Runtime memory
+maps, so later sessions are created with optimizations
+disabled and without copying the weights.
+
+Cached models are keyed by the SHA-256 hash of the model file,
+the ONNX Runtime version, the machine and the instruction set
+features of the CPU. Models are optimized with every graph
+optimization (ORT_ENABLE_ALL), which can choose layouts and
+kernels for the CPU the model was optimized on, so a cache
+directory copied to a machine with a different CPU is not used
+there (optimizing to ORT_ENABLE_EXTENDED gives a portable
+model, but runs the Lightweight model about 25% slower). File
+hashes are stored in an index with the file size and
+modification time, so a model file is only hashed again after
+it changes.
+
+Each cached model is written with a manifest of its file sizes,
+which is checked before the model is used. Models that are
+incomplete or fail to load are removed so they are created
+again (see remove_cached_model).
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import threading
+import platform
+import tempfile
+import hashlib
+import shutil
+import json
+import os
+
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+MODEL_CACHE_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", "yolo", "cache"))
+
+# file names of a cached model
+CACHED_MODEL_FILE = "model.onnx"
+CACHED_WEIGHTS_FILE = "model.data"
+
+# sizes of the files of a cached model, written once they are complete
+MANIFEST_FILE = "manifest.json"
+
+# index of the file hashes computed
+HASH_INDEX_FILE = "hashes.json"
+
+_index_lock = threading.Lock()
+
+
+def file_hash(file_path, cache_path=MODEL_CACHE_PATH):
+    """
+    Returns the SHA-256 hash of a file.
+
+    The hash is read from the cache index if the file has not
+    changed since it was last hashed.
+
+    Params:
+        file_path: [string] path to the file
+        cache_path: [string] path to the cache directory
+
+    Returns:
+        [string] hex digest of the file
+    """
+    file_path = os.path.realpath(file_path)
+    stat = os.stat(file_path)
+    index_path = os.path.join(cache_path, HASH_INDEX_FILE)
+
+    with _index_lock:
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        entry = index.get(file_path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        index[file_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+        # replace the index in one step so it is never read half-written
+        os.makedirs(cache_path, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=cache_path, suffix=".tmp", delete=False) as f:
+            json.dump(index, f, indent=1)
+        os.replace(f.name, index_path)
+        return digest.hexdigest()
+
+
+def cpu_features():
+    """
+    Returns a short hash of the instruction set features of the
+    CPU (the CPU description where they cannot be read).
+
+    Returns:
+        [string] hex digest of the CPU features
+    """
+    features = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                # x86 lists 'flags', ARM lists 'Features'
+                name, _, value = line.partition(":")
+                if name.strip() in ("flags", "Features"):
+                    features = " ".join(sorted(value.split()))
+                    break
+    except OSError:
+        pass
+    if not features:
+        features = platform.processor()
+    return hashlib.sha256(features.encode()).hexdigest()[:8]
+
+
+def _cached_model_dir(onnx_path, cache_path):
+    """
+    Returns the directory of the cached version of a model.
+    """
+    import onnxruntime
+
+    key = "{}-{}-ort{}-{}-{}".format(
+        os.path.splitext(os.path.basename(onnx_path))[0],
+        file_hash(onnx_path, cache_path)[:16],
+        onnxruntime.__version__,
+        platform.machine(),
+        cpu_features())
+    return os.path.join(cache_path, key)
+
+
+def _is_complete(model_dir):
+    """
+    Returns True if the files of a cached model have the sizes
+    in its manifest.
+    """
+    try:
+        with open(os.path.join(model_dir, MANIFEST_FILE)) as f:
+            sizes = json.load(f)
+        return (CACHED_MODEL_FILE in sizes
+                and all(os.path.getsize(os.path.join(model_dir, name)) == size for name, size in sizes.items()))
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def get_cached_model(onnx_path, cache_path=MODEL_CACHE_PATH):
+    """
+    Returns the path to the optimized version of an ONNX model,
+    creating it if it is not cached.
+
+    The model returned should be loaded with the ONNX Runtime
+    graph optimizations disabled, on the CPU.
+
+    Params:
+        onnx_path: [string] path to the ONNX model
+        cache_path: [string] path to the cache directory
+
+    Returns:
+        [string] path to the cached model
+
+    Raises:
+        AssertionError: assertions fail
+    """
+    import onnxruntime
+
+    assert (os.path.isfile(onnx_path)), \
+        "ONNX file '{}' not found.".format(onnx_path)
+
+    model_dir = _cached_model_dir(onnx_path, cache_path)
+    model_path = os.path.join(model_dir, CACHED_MODEL_FILE)
+    if _is_complete(model_dir):
+        return model_path
+    # incomplete or written by a version without a manifest
+    shutil.rmtree(model_dir, ignore_errors=True)
+
+    # write the model to a temporary directory then move it into
+    # place, so a cached model is never read half-written
+    os.makedirs(cache_path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=cache_path, suffix=".tmp")
+    try:
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.optimized_model_filepath = os.path.join(tmp_dir, CACHED_MODEL_FILE)
+        options.add_session_config_entry("session.optimized_model_external_initializers_file_name",
+                                         CACHED_WEIGHTS_FILE)
+        options.add_session_config_entry("session.optimized_model_external_initializers_min_size_in_bytes", "1024")
+        onnxruntime.InferenceSession(onnx_path, sess_options=options, providers=['CPUExecutionProvider'])
+        sizes = {name: os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir)}
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(sizes, f)
+        try:
+            os.rename(tmp_dir, model_dir)
+        except OSError:
+            # cached by another process first
+            if not _is_complete(model_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return model_path
+
+
+def remove_cached_model(onnx_path, cache_path=MODEL_CACHE_PATH):
+    """
+    Deletes the cached version of a model, so it is created again
+    the next time it is loaded (used when a cached model cannot
+    be loaded).
+
+    Params:
+        onnx_path: [string] path to the ONNX model
+        cache_path: [string] path to the cache directory
+    """
+    shutil.rmtree(_cached_model_dir(onnx_path, cache_path), ignore_errors=True)
+
+
+def clear_cache(cache_path=MODEL_CACHE_PATH):
+    """
+    Deletes every cached model and file hash.
+
+    Params:
+        cache_path: [string] path to the cache directory
+    """
+    shutil.rmtree(cache_path, ignore_errors=True)
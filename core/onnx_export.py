@@ -0,0 +1,388 @@
+"""
+Darknet to ONNX model conversion.
+
+Converts a Darknet YOLO cfg and weights file pair into an
+ONNX model that can be run by ONNX Runtime. Supports the
+layer types used by the Standard (YOLOv4) and Lightweight
+(tiny YOLOv3 3l) networks:
+    - convolutional (batch normalisation is folded into the weights)
+    - maxpool
+    - route
+    - shortcut
+    - upsample
+    - yolo
+
+The network input size is left dynamic. YOLO layers are exported
+as the raw outputs of the preceding convolution; the anchors and
+scales needed to decode them are stored in the model metadata under
+the 'yolo_layers' key.
+
+Exported models can be quantized to INT8 using calibration data
+for faster inference on the CPU.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import numpy as np
+import json
+import os
+
+
+# ONNX opset the graph is built against
+OPSET_VERSION = 13
+
+# epsilon used by Darknet batch normalisation
+BATCH_NORM_EPSILON = 0.000001
+
+
+def parse_cfg(cfg_path):
+    """
+    Parses a Darknet cfg file.
+
+    Params:
+        cfg_path: [string] path to the cfg file
+
+    Returns:
+        [list] one dictionary per section, with the section
+        name stored under the 'type' key
+
+    Raises:
+        AssertionError: assertion failed
+    """
+    assert (os.path.isfile(cfg_path)), \
+        "Cfg file '{}' not found.".format(cfg_path)
+
+    sections = []
+    with open(cfg_path) as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if not line:
+                continue
+            if line.startswith('['):
+                sections.append({'type': line[1:-1].strip()})
+            else:
+                key, value = line.split('=', 1)
+                sections[-1][key.strip()] = value.strip()
+    return sections
+
+
+def read_weights(weights_path):
+    """
+    Reads the weight values stored in a Darknet weights file.
+
+    Params:
+        weights_path: [string] path to the weights file
+
+    Returns:
+        [np.ndarray] flat float32 array of weight values
+
+    Raises:
+        AssertionError: assertion failed
+    """
+    assert (os.path.isfile(weights_path)), \
+        "Weights file '{}' not found.".format(weights_path)
+
+    with open(weights_path, 'rb') as f:
+        major, minor, _ = np.fromfile(f, dtype=np.int32, count=3)
+        # the 'seen' counter is 64-bit from version 0.2 onwards
+        if (major * 10 + minor) >= 2 and major < 1000 and minor < 1000:
+            np.fromfile(f, dtype=np.int64, count=1)
+        else:
+            np.fromfile(f, dtype=np.int32, count=1)
+        return np.fromfile(f, dtype=np.float32)
+
+
+def _layer_indexes(value, index):
+    """
+    Converts a comma separated list of relative or absolute
+    layer indexes to absolute indexes.
+    """
+    indexes = [int(i) for i in value.split(',')]
+    return [i if i >= 0 else index + i for i in indexes]
+
+
+def build_model(cfg_path, weights_path):
+    """
+    Builds an ONNX model from a Darknet cfg and weights file.
+
+    Params:
+        cfg_path: [string] path to the cfg file
+        weights_path: [string] path to the weights file
+
+    Returns:
+        [onnx.ModelProto] ONNX model
+
+    Raises:
+        AssertionError: assertion failed
+        Exception: unsupported layer or weights file size mismatch
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    sections = parse_cfg(cfg_path)
+    weights = read_weights(weights_path)
+    assert (sections and sections[0]['type'] in ('net', 'network')), \
+        "Cfg file '{}' must start with a [net] section.".format(cfg_path)
+
+    nodes = []
+    initializers = []
+    outputs = []
+    yolo_layers = []
+
+    # name and channel count of the output of every layer
+    layer_names = []
+    layer_channels = []
+
+    channels = int(sections[0].get('channels', 3))
+    prev_name = 'input'
+    weights_offset = 0
+
+    def add_initializer(name, arr):
+        initializers.append(numpy_helper.from_array(np.ascontiguousarray(arr), name))
+        return name
+
+    def take_weights(count):
+        nonlocal weights_offset
+        if weights_offset + count > len(weights):
+            raise Exception("Weights file '{}' is too small for cfg file '{}'.".format(
+                weights_path, cfg_path))
+        values = weights[weights_offset:weights_offset + count]
+        weights_offset += count
+        return values
+
+    for index, section in enumerate(sections[1:]):
+        layer_type = section['type']
+        name = '{}_{}'.format(layer_type, index)
+
+        if layer_type == 'convolutional':
+            filters = int(section['filters'])
+            size = int(section['size'])
+            stride = int(section.get('stride', 1))
+            groups = int(section.get('groups', 1))
+            padding = size // 2 if int(section.get('pad', 0)) else int(section.get('padding', 0))
+            activation = section.get('activation', 'logistic')
+
+            # darknet stores biases and batch norm values before the weights
+            if int(section.get('batch_normalize', 0)):
+                beta = take_weights(filters)
+                gamma = take_weights(filters)
+                mean = take_weights(filters)
+                var = take_weights(filters)
+            else:
+                beta = take_weights(filters)
+            kernel = take_weights(filters * (channels // groups) * size * size).reshape(
+                filters, channels // groups, size, size)
+
+            # fold batch normalisation into the convolution
+            if int(section.get('batch_normalize', 0)):
+                scale = gamma / np.sqrt(var + BATCH_NORM_EPSILON)
+                kernel = kernel * scale[:, None, None, None]
+                bias = beta - mean * scale
+            else:
+                bias = beta
+
+            conv_name = name if activation == 'linear' else name + '_conv'
+            nodes.append(helper.make_node(
+                'Conv',
+                inputs=[prev_name,
+                        add_initializer(name + '_w', kernel.astype(np.float32)),
+                        add_initializer(name + '_b', bias.astype(np.float32))],
+                outputs=[conv_name],
+                kernel_shape=[size, size],
+                strides=[stride, stride],
+                pads=[padding] * 4,
+                group=groups))
+
+            if activation == 'leaky':
+                nodes.append(helper.make_node('LeakyRelu', [conv_name], [name], alpha=0.1))
+            elif activation == 'mish':
+                nodes.append(helper.make_node('Softplus', [conv_name], [name + '_softplus']))
+                nodes.append(helper.make_node('Tanh', [name + '_softplus'], [name + '_tanh']))
+                nodes.append(helper.make_node('Mul', [conv_name, name + '_tanh'], [name]))
+            elif activation == 'logistic':
+                nodes.append(helper.make_node('Sigmoid', [conv_name], [name]))
+            elif activation == 'relu':
+                nodes.append(helper.make_node('Relu', [conv_name], [name]))
+            elif activation != 'linear':
+                raise Exception("Activation '{}' not supported.".format(activation))
+            channels = filters
+
+        elif layer_type == 'maxpool':
+            size = int(section['size'])
+            stride = int(section.get('stride', 1))
+            padding = int(section.get('padding', size - 1))
+            # darknet pads the bottom/right edges with any odd remainder
+            nodes.append(helper.make_node(
+                'MaxPool',
+                inputs=[prev_name],
+                outputs=[name],
+                kernel_shape=[size, size],
+                strides=[stride, stride],
+                pads=[padding // 2, padding // 2, padding - padding // 2, padding - padding // 2]))
+
+        elif layer_type == 'upsample':
+            stride = int(section.get('stride', 2))
+            nodes.append(helper.make_node(
+                'Resize',
+                inputs=[prev_name,
+                        '',
+                        add_initializer(name + '_scales', np.array([1, 1, stride, stride], dtype=np.float32))],
+                outputs=[name],
+                mode='nearest'))
+
+        elif layer_type == 'route':
+            assert ('groups' not in section), \
+                "Grouped route layers are not supported."
+            indexes = _layer_indexes(section['layers'], index)
+            if len(indexes) == 1:
+                nodes.append(helper.make_node('Identity', [layer_names[indexes[0]]], [name]))
+            else:
+                nodes.append(helper.make_node('Concat', [layer_names[i] for i in indexes], [name], axis=1))
+            channels = sum(layer_channels[i] for i in indexes)
+
+        elif layer_type == 'shortcut':
+            assert (section.get('activation', 'linear') == 'linear'), \
+                "Only linear shortcut layers are supported."
+            source = _layer_indexes(section['from'], index)[0]
+            nodes.append(helper.make_node('Add', [prev_name, layer_names[source]], [name]))
+
+        elif layer_type == 'yolo':
+            mask = [int(i) for i in section['mask'].split(',')]
+            anchors = [float(i) for i in section['anchors'].split(',')]
+            anchors = [[anchors[2 * i], anchors[2 * i + 1]] for i in mask]
+            yolo_layers.append({
+                'anchors': anchors,
+                'classes': int(section.get('classes', 1)),
+                'scale_x_y': float(section.get('scale_x_y', 1.0))})
+            nodes.append(helper.make_node('Identity', [prev_name], [name]))
+            outputs.append(helper.make_tensor_value_info(
+                name, TensorProto.FLOAT, ['batch', len(mask) * (5 + yolo_layers[-1]['classes']), None, None]))
+
+        else:
+            raise Exception("Layer type '{}' not supported.".format(layer_type))
+
+        layer_names.append(name)
+        layer_channels.append(channels)
+        prev_name = name
+
+    if weights_offset != len(weights):
+        raise Exception("Weights file '{}' does not match cfg file '{}' ({} unused values).".format(
+            weights_path, cfg_path, len(weights) - weights_offset))
+
+    # name nodes after their outputs so they can be referenced
+    # (e.g. to exclude them from quantization)
+    for node in nodes:
+        node.name = node.output[0]
+
+    graph = helper.make_graph(
+        nodes,
+        os.path.splitext(os.path.basename(cfg_path))[0],
+        inputs=[helper.make_tensor_value_info(
+            'input', TensorProto.FLOAT, ['batch', int(sections[0].get('channels', 3)), 'height', 'width'])],
+        outputs=outputs,
+        initializer=initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', OPSET_VERSION)])
+    model.ir_version = 8
+    helper.set_model_props(model, {'yolo_layers': json.dumps(yolo_layers)})
+    onnx.checker.check_model(model)
+    return model
+
+
+def export_onnx(cfg_path, weights_path, onnx_path):
+    """
+    Converts a Darknet cfg and weights file pair to an ONNX file.
+
+    Params:
+        cfg_path: [string] path to the cfg file
+        weights_path: [string] path to the weights file
+        onnx_path: [string] path of the ONNX file to be written
+
+    Returns:
+        [string] path of the ONNX file written
+    """
+    import onnx
+
+    model = build_model(cfg_path, weights_path)
+    onnx.save(model, onnx_path)
+    return onnx_path
+
+
+def quantize_model(onnx_path, output_path, calibration_blobs, quantize_output_layers=False):
+    """
+    Quantizes an exported ONNX model to INT8.
+
+    Uses static post-training quantization: activation ranges are
+    calibrated by running the model on the blobs passed, which
+    should be representative of the images seen in use (e.g.
+    recorded thermal frames).
+
+    Params:
+        onnx_path: [string] path to the FP32 ONNX file
+        output_path: [string] path of the INT8 ONNX file to be written
+        calibration_blobs: [list] 4D network input blobs
+        quantize_output_layers: [bool] set to True to also quantize the
+            convolutions feeding the YOLO layers (faster but less accurate)
+
+    Returns:
+        [string] path of the INT8 ONNX file written
+
+    Raises:
+        AssertionError: assertion failed
+    """
+    import onnx
+    from onnx import helper
+    from onnxruntime.quantization import (CalibrationDataReader,
+                                          QuantFormat,
+                                          QuantType,
+                                          quantize_static)
+
+    assert (os.path.isfile(onnx_path)), \
+        "ONNX file '{}' not found.".format(onnx_path)
+    assert (len(calibration_blobs) > 0), \
+        "At least one calibration blob is required."
+
+    model = onnx.load(onnx_path)
+    input_name = model.graph.input[0].name
+
+    class BlobDataReader(CalibrationDataReader):
+        def __init__(self):
+            self._blobs = iter(calibration_blobs)
+
+        def get_next(self):
+            blob = next(self._blobs, None)
+            return None if blob is None else {input_name: blob}
+
+    # the convolutions feeding the YOLO layers are sensitive to
+    # quantization error so are left as FP32 by default
+    nodes_to_exclude = []
+    if not quantize_output_layers:
+        outputs = [o.name for o in model.graph.output]
+        producers = {n.output[0]: n for n in model.graph.node}
+        for name in outputs:
+            node = producers[name]
+            while node.op_type == 'Identity':
+                node = producers[node.input[0]]
+            nodes_to_exclude.append(node.name)
+
+    quantize_static(
+        model_input=onnx_path,
+        model_output=output_path,
+        calibration_data_reader=BlobDataReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=nodes_to_exclude)
+
+    # keep the YOLO layer metadata needed for decoding
+    quantized = onnx.load(output_path)
+    helper.set_model_props(quantized, {p.key: p.value for p in model.metadata_props})
+    onnx.save(quantized, output_path)
+    return output_path
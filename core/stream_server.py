@@ -0,0 +1,274 @@
+"""
+HTTP server streaming the fever monitor results.
+
+Serves the latest annotated image as an MJPEG stream and as
+a single JPEG, and the latest faces detected as JSON:
+    /               page showing the stream
+    /stream.mjpg    MJPEG stream of the annotated images
+    /frame.jpg      latest annotated image
+    /detections     latest faces detected (JSON)
+    /metrics        operational metrics (Prometheus text format)
+
+Publishing a frame only stores it. Each frame is encoded to
+JPEG once, by the first client that needs it, and shared by
+every other client. Clients are served by their own threads
+and always skip to the latest frame, so slow clients do not
+slow down the monitor or each other.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import json
+import time
+import io
+
+# module imports
+from core import metrics
+
+
+# content type of the Prometheus text format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# MJPEG multipart boundary
+BOUNDARY = "fevermonitorframe"
+
+# page showing the stream
+INDEX_PAGE = b"""<!DOCTYPE html>
+<html><head><title>Fever Monitor</title></head>
+<body style="margin:0;background:#000"><img src="/stream.mjpg" style="height:100vh"></body></html>
+"""
+
+
+class StreamServer:
+    """
+    Embeddable HTTP server for the latest monitor results.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, jpeg_quality=80):
+        """
+        Creates the server and binds it to an address.
+
+        Params:
+            host: [string] address to listen on
+            port: [int] port to listen on (0 picks a free port)
+            jpeg_quality: [int] JPEG quality from 1 to 95
+        """
+        assert (1 <= jpeg_quality <= 95), \
+            "JPEG quality must be a valid value from 1 to 95."
+        self._jpeg_quality = jpeg_quality
+        self._condition = threading.Condition()
+        self._frame_id = 0
+        self._image = None
+        self._detections = None
+        self._jpeg = None
+        self._jpeg_frame_id = 0
+        self._encode_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        self._server = ThreadingHTTPServer((host, port), _StreamRequestHandler)
+        self._server.daemon_threads = True
+        self._server.stream = self
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def get_address(self):
+        """
+        Returns the address the server is listening on.
+
+        Returns:
+            [tuple] (host, port)
+        """
+        return self._server.server_address[:2]
+
+    def start(self):
+        """
+        Starts serving requests in a background thread.
+        """
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="StreamServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops serving requests and closes the server.
+        """
+        if not self._running:
+            return
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def is_running(self):
+        """
+        Returns True if the server is serving requests.
+
+        Returns:
+            [bool] True if running
+        """
+        return self._running
+
+    def publish(self, image, faces):
+        """
+        Sets the latest monitor results served.
+
+        Does not encode the image, so returns immediately.
+
+        Params:
+            image: [PIL.Image.Image] annotated image
+            faces: [list] Face objects detected in the image
+        """
+        detections = {
+            "timestamp": time.time(),
+            "faces": [{
+                "x": int(f.detection.x),
+                "y": int(f.detection.y),
+                "w": int(f.detection.w),
+                "h": int(f.detection.h),
+                "confidence": float(f.detection.confidence),
+                "temp": float(f.temp),
+                "over_threshold": bool(f.over_threshold)} for f in faces]}
+
+        with self._condition:
+            self._frame_id += 1
+            self._image = image
+            detections["frame_id"] = self._frame_id
+            self._detections = detections
+            self._condition.notify_all()
+
+    def wait_for_frame(self, last_frame_id, timeout=1.0):
+        """
+        Waits for a frame newer than the last frame a client sent.
+
+        Params:
+            last_frame_id: [int] id of the last frame sent
+            timeout: [float] seconds to wait
+
+        Returns:
+            [int] id of the latest frame, or None if there is no newer
+            frame or the server stopped
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame_id > last_frame_id or not self._running, timeout)
+            if not self._running or self._frame_id <= last_frame_id:
+                return None
+            return self._frame_id
+
+    def get_jpeg(self):
+        """
+        Returns the latest image encoded as JPEG, encoding it if
+        it has not been encoded yet.
+
+        Returns:
+            [tuple] (frame id, JPEG bytes), or (0, None) if no frame
+            has been published
+        """
+        with self._encode_lock:
+            with self._condition:
+                frame_id, image = self._frame_id, self._image
+            if image is None:
+                return 0, None
+            if self._jpeg_frame_id != frame_id:
+                buffer = io.BytesIO()
+                image.convert("RGB").save(buffer, format="JPEG", quality=self._jpeg_quality)
+                self._jpeg, self._jpeg_frame_id = buffer.getvalue(), frame_id
+            return self._jpeg_frame_id, self._jpeg
+
+    def get_detections(self):
+        """
+        Returns the latest faces detected.
+
+        Returns:
+            [dict] frame id, timestamp and faces, or None if no frame
+            has been published
+        """
+        with self._condition:
+            return self._detections
+
+
+class _StreamRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles requests to the stream server.
+    """
+
+    def log_message(self, format, *args):
+        # do not write a line to stderr for every request
+        pass
+
+    def do_GET(self):
+        stream = self.server.stream
+        path = self.path.split("?")[0]
+
+        if path == "/":
+            self._send(200, "text/html", INDEX_PAGE)
+
+        elif path == "/frame.jpg":
+            _, jpeg = stream.get_jpeg()
+            if jpeg is None:
+                self._send(503, "text/plain", b"No frame published.")
+            else:
+                self._send(200, "image/jpeg", jpeg)
+
+        elif path == "/detections":
+            detections = stream.get_detections()
+            if detections is None:
+                self._send(503, "text/plain", b"No frame published.")
+            else:
+                self._send(200, "application/json", json.dumps(detections).encode())
+
+        elif path == "/metrics":
+            self._send(200, METRICS_CONTENT_TYPE, metrics.render().encode())
+
+        elif path == "/stream.mjpg":
+            self._stream_mjpeg(stream)
+
+        else:
+            self._send(404, "text/plain", b"Not found.")
+
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_mjpeg(self, stream):
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace; boundary={}".format(BOUNDARY))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        last_frame_id = 0
+        try:
+            while stream.is_running():
+                if stream.wait_for_frame(last_frame_id) is None:
+                    continue
+                last_frame_id, jpeg = stream.get_jpeg()
+                self.wfile.write("--{}\r\nContent-Type: image/jpeg\r\nContent-Length: {}\r\n\r\n".format(
+                    BOUNDARY, len(jpeg)).encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # client disconnected
+            pass
@@ -0,0 +1,121 @@
+"""
+Face temperature estimators.
+
+Estimates the temperature of every face in a thermal frame
+at once. The pixels of all faces are gathered into a single
+array and each estimator is computed for all faces with
+NumPy group operations, avoiding a Python call per face.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import numpy as np
+import cv2
+
+# module imports
+from core.boxes import shrink_boxes
+
+
+# estimators that can be used to measure face temperatures
+temperature_estimators = [
+    "Maximum",
+    "Top-k mean",
+    "Percentile",
+    "Hotspot"]
+
+# number of hottest pixels averaged by "Top-k mean"
+TOP_K = 10
+
+# percentile of the face pixels used by "Percentile"
+PERCENTILE = 95
+
+# band of the face box height searched by "Hotspot", covering
+# the eyes where the inner canthus is found
+HOTSPOT_BAND = 0.2, 0.6
+
+
+def estimate_temperatures(img, boxes, estimator="Maximum", shrink=0.0, top_k=TOP_K, percentile=PERCENTILE):
+    """
+    Estimates the temperature of each face in a thermal frame.
+
+    Estimators:
+        "Maximum": hottest pixel
+        "Top-k mean": mean of the top_k hottest pixels
+        "Percentile": percentile of the pixels (linear interpolation)
+        "Hotspot": hottest 3x3 pixel mean in the eye band of the box
+
+    Shrinking the boxes before measuring keeps hot backgrounds
+    and objects at the edges of the boxes out of the estimates.
+
+    Params:
+        img: [np.ndarray] 2D thermal frame
+        boxes: [np.ndarray] int array of boxes with shape [N, 4],
+            within the bounds of the frame and with areas above 0
+        estimator: [string] name of the estimator
+        shrink: [float] fraction of the box width and height removed
+            (split equally between each side)
+        top_k: [int] number of pixels averaged by "Top-k mean"
+        percentile: [float] percentile used by "Percentile"
+
+    Returns:
+        [np.ndarray] float array of face temperatures in the units of
+        the frame with shape [N]
+
+    Raises:
+        [Exception] estimator name not recognised
+        [AssertionError] assertion failed
+    """
+    if estimator not in temperature_estimators:
+        raise Exception("Temperature estimator '{}' not recognised.".format(estimator))
+    assert (0 <= shrink < 1), \
+        "Shrink must be a valid value from 0 up to 1."
+
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.float64)
+    boxes = shrink_boxes(boxes, shrink)
+
+    # search the eye band of a 3x3 mean image for hotspots
+    if estimator == "Hotspot":
+        img = cv2.blur(img.astype(np.float32), (3, 3))
+        top = (boxes[:, 3] * HOTSPOT_BAND[0]).astype(int)
+        bottom = np.maximum(np.ceil(boxes[:, 3] * HOTSPOT_BAND[1]).astype(int), top + 1)
+        boxes = np.stack([boxes[:, 0], boxes[:, 1] + top, boxes[:, 2], bottom - top], axis=1)
+
+    # gather the pixels of every face into one array
+    values = np.concatenate([img[y:y + h, x:x + w].ravel() for x, y, w, h in boxes])
+    counts = boxes[:, 2] * boxes[:, 3]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    if estimator in ("Maximum", "Hotspot"):
+        return np.maximum.reduceat(values, starts).astype(np.float64)
+
+    # sort the pixels of each face, hottest last, with one sort by
+    # offsetting the pixels of each face above those of the face before
+    values = values.astype(np.float64)
+    value_min = values.min()
+    offsets = np.repeat(np.arange(len(boxes)) * (values.max() - value_min + 1), counts)
+    values -= value_min
+    values += offsets
+    values.sort()
+    values -= offsets
+    values += value_min
+    ends = starts + counts
+
+    if estimator == "Top-k mean":
+        k = np.minimum(top_k, counts)
+        sums = np.concatenate([[0.0], np.cumsum(values)])
+        return (sums[ends] - sums[ends - k]) / k
+
+    # "Percentile"
+    position = (counts - 1) * percentile / 100
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+    return values[starts + lower] * (1 - fraction) + values[starts + upper] * fraction
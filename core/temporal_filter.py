@@ -0,0 +1,171 @@
+"""
+Temporal filters for reducing the noise in thermal frames.
+
+Each filter combines the latest frame with the frames before
+it using arrays allocated for the first frame and reused for
+every frame after, so filtering adds little latency.
+"""
+
+__author__ = "James Cook"
+__copyright__ = "Copyright 2021"
+__license__ = "GNU General Public License v3.0"
+__version__ = "1.0.0"
+__maintainer__ = "James Cook"
+__email__ = "contact@cookjames.uk"
+
+
+# external module imports
+import numpy as np
+
+
+# temporal filters that can be applied to frames
+temporal_filters = [
+    "None",
+    "Exponential",
+    "Median"]
+
+
+class ExponentialFilter:
+    """
+    Running exponential average of frames.
+
+    Each output pixel is alpha times the latest frame plus
+    (1 - alpha) times the previous output, so a lower alpha
+    removes more noise but responds slower to changes.
+    """
+
+    def __init__(self, alpha=0.5):
+        assert (0 < alpha <= 1), \
+            "Alpha must be a valid value greater than 0 and up to 1."
+        self._alpha = alpha
+        self._average = None
+        self._scratch = None
+        self._output = None
+
+    def apply(self, frame):
+        """
+        Adds a frame to the average and returns the filtered frame.
+
+        The array returned is reused by the next call, so it must
+        be copied if it is needed after the next frame.
+
+        Params:
+            frame: [np.ndarray] 2D thermal frame
+
+        Returns:
+            [np.ndarray] filtered frame with the same shape and type
+        """
+        if self._average is None or self._average.shape != frame.shape:
+            self._average = frame.astype(np.float32)
+            self._scratch = np.empty(frame.shape, dtype=np.float32)
+            self._output = np.empty(frame.shape, dtype=frame.dtype)
+        else:
+            np.multiply(frame, self._alpha, out=self._scratch, dtype=np.float32)
+            self._average *= 1 - self._alpha
+            self._average += self._scratch
+
+        # round to the type of the frame (integer frames)
+        if np.issubdtype(self._output.dtype, np.integer):
+            np.rint(self._average, out=self._scratch)
+            np.copyto(self._output, self._scratch, casting='unsafe')
+        else:
+            np.copyto(self._output, self._average, casting='unsafe')
+        return self._output
+
+    def reset(self):
+        """
+        Clears the frames averaged.
+        """
+        self._average = None
+
+
+class MedianFilter:
+    """
+    Median of the last N frames.
+
+    Removes single-frame noise such as hot pixels without
+    blurring edges, with a delay of half the frames.
+
+    The frames are sorted pixel-wise with an odd-even
+    transposition sorting network of in-place minimum and
+    maximum operations, which is much faster than sorting
+    along the frame axis for the small number of frames used.
+    """
+
+    def __init__(self, num_frames=3):
+        assert (type(num_frames) == int and num_frames >= 1 and num_frames % 2 == 1), \
+            "Number of frames must be a valid odd integer."
+        self._num_frames = num_frames
+        self._frames = None
+        self._sorted = None
+        self._scratch = None
+        self._index = 0
+        self._count = 0
+
+    def apply(self, frame):
+        """
+        Adds a frame to the ring of frames and returns the median
+        frame.
+
+        The array returned is reused by the next call, so it must
+        be copied if it is needed after the next frame.
+
+        Params:
+            frame: [np.ndarray] 2D thermal frame
+
+        Returns:
+            [np.ndarray] filtered frame with the same shape and type
+        """
+        if self._frames is None or self._frames.shape[1:] != frame.shape or self._frames.dtype != frame.dtype:
+            self._frames = np.empty((self._num_frames,) + frame.shape, dtype=frame.dtype)
+            self._sorted = np.empty_like(self._frames)
+            self._scratch = np.empty_like(frame)
+            self._index = 0
+            self._count = 0
+
+        # overwrite the oldest frame in the ring
+        self._frames[self._index] = frame
+        self._index = (self._index + 1) % self._num_frames
+        self._count = min(self._count + 1, self._num_frames)
+
+        # sort a copy of the frames in place, the middle row is the median
+        sorted_frames = self._sorted[:self._count]
+        np.copyto(sorted_frames, self._frames[:self._count])
+        for sort_round in range(self._count):
+            for i in range(sort_round % 2, self._count - 1, 2):
+                np.minimum(sorted_frames[i], sorted_frames[i + 1], out=self._scratch)
+                np.maximum(sorted_frames[i], sorted_frames[i + 1], out=sorted_frames[i + 1])
+                np.copyto(sorted_frames[i], self._scratch)
+        return sorted_frames[self._count // 2]
+
+    def reset(self):
+        """
+        Clears the frames in the ring.
+        """
+        self._index = 0
+        self._count = 0
+
+
+def create_temporal_filter(name="None", alpha=0.5, num_frames=3):
+    """
+    Creates a temporal filter by name.
+
+    Params:
+        name: [string] name of the filter in temporal_filters
+        alpha: [float] weight of the latest frame ("Exponential")
+        num_frames: [int] odd number of frames ("Median")
+
+    Returns:
+        filter object with apply and reset methods, or None
+        for "None"
+
+    Raises:
+        [Exception] filter name not recognised
+    """
+    if name == "None":
+        return None
+    elif name == "Exponential":
+        return ExponentialFilter(alpha=alpha)
+    elif name == "Median":
+        return MedianFilter(num_frames=num_frames)
+    raise Exception("Temporal filter '{}' not recognised.".format(name))
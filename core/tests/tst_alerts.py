@@ -0,0 +1,142 @@
+"""
+Unit tests for the alerts module.
+"""
+
+# unit test imports
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import subprocess
+import threading
+import tempfile
+import json
+import time
+import sys
+import os
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.alerts import AlertEngine, CallbackSink, FileSink, WebhookSink, ALERTS_RAISED
+from core.fever_monitor import Face
+from core.inference import Detection
+
+
+def create_face(x, temp=38.5, over_threshold=True):
+    return Face(detection=Detection(x=x, y=10, w=20, h=20, class_id=0, confidence=0.9),
+                temp=temp,
+                img=None,
+                over_threshold=over_threshold)
+
+
+class TestAlertsModule(unittest.TestCase):
+
+    def test_AlertEngine_rules_001(self):
+        """
+        Tests the AlertEngine debounce and escalation rules.
+
+        Case 1: Person alerted once per debounce period
+        Case 2: Second person alerted separately
+        Case 3: Faces under the threshold not alerted
+        Case 4: Alerts escalated from the escalate_after-th alert
+        Case 5: Alerts metric counts alerts, not frames over the threshold
+        """
+        alerts = []
+        alerts_raised = ALERTS_RAISED.labels().value
+        with AlertEngine([CallbackSink(alerts.append)], debounce=2.0, escalate_after=3) as engine:
+            # perform operation and get result
+            for t in range(0, 7):
+                engine.submit([create_face(x=10 + t), create_face(x=100, over_threshold=False)], timestamp=t)
+            engine.submit([create_face(x=15), create_face(x=80)], timestamp=7)
+
+        # assertions
+        self.assertEqual([0, 2, 4, 6, 7], [a.timestamp for a in alerts])
+        self.assertEqual([0, 0, 0, 0, 1], [a.person_id for a in alerts])
+        self.assertEqual([False, False, True, True, False], [a.escalated for a in alerts])
+        self.assertEqual(5, engine.get_alert_count())
+        self.assertEqual(5, ALERTS_RAISED.labels().value - alerts_raised)
+
+    def test_AlertEngine_slow_sink_002(self):
+        """
+        Tests a slow sink does not delay submitting frames or the
+        other sinks.
+        """
+        fast_alerts = []
+        release = threading.Event()
+        engine = AlertEngine([CallbackSink(lambda alert: release.wait(5), name="slow"),
+                              CallbackSink(fast_alerts.append, name="fast")], debounce=0)
+        engine.start()
+
+        # perform operation and get result
+        start = time.perf_counter()
+        for t in range(20):
+            engine.submit([create_face(x=10)], timestamp=t)
+        submit_time = time.perf_counter() - start
+        deadline = time.time() + 5
+        while len(fast_alerts) < 20 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        engine.stop()
+
+        # assertions
+        self.assertLess(submit_time, 0.1)
+        self.assertEqual(20, len(fast_alerts))
+
+    def test_AlertEngine_sinks_003(self):
+        """
+        Tests the file and webhook sinks.
+        """
+        posts = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                posts.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self.send_response(204)
+                self.end_headers()
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "alerts.jsonl")
+
+            # perform operation and get result
+            with AlertEngine([FileSink(file_path),
+                              WebhookSink("http://127.0.0.1:{}/".format(server.server_address[1]))]) as engine:
+                engine.submit([create_face(x=10, temp=39.0)], temp_unit="Celsius", timestamp=1.0)
+            with open(file_path) as f:
+                lines = [json.loads(line) for line in f]
+        server.shutdown()
+        server.server_close()
+
+        # assertions
+        self.assertEqual(1, len(lines))
+        self.assertEqual(lines, posts)
+        self.assertEqual(39.0, lines[0]["temp"])
+        self.assertEqual("Celsius", lines[0]["temp_unit"])
+
+    def test_import_004(self):
+        """
+        Tests the alerts module is imported without OpenCV or flirpy.
+
+        Case 1: core.alerts imported in a new process
+        """
+        # perform operation and get result
+        output = subprocess.run(
+            [sys.executable, "-c", "import sys, core.alerts, core; "
+                                   "print(sorted({'cv2', 'flirpy', 'PIL'} & set(sys.modules))); "
+                                   "print(core.LeptonCamera.__name__)"],
+            cwd=PROJECT_ROOT_PATH, check=True, capture_output=True, text=True).stdout.split()
+
+        # assertions
+        self.assertEqual(["[]", "LeptonCamera"], output)
+
+
+if __name__ == '__main__':
+    unittest.main()
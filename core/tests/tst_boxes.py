@@ -0,0 +1,169 @@
+"""
+Unit tests for the boxes module.
+"""
+
+# unit test imports
+import unittest
+import sys
+import os
+import numpy as np
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.boxes import (to_box_array,
+                        clip_boxes,
+                        expand_boxes,
+                        box_area,
+                        box_iou,
+                        shrink_boxes,
+                        non_max_suppression)
+from core.image_processing import keep_box_within_bounds
+
+
+class TestBoxesModule(unittest.TestCase):
+
+    def test_to_box_array_001(self):
+        """
+        Tests the to_box_array method.
+        """
+        # perform operation and get result
+        result = to_box_array([(1.0, 2.0, 3.0, 4.0), (5, 6, 7, 8)])
+        empty_result = to_box_array([])
+
+        # assertions
+        self.assertEqual((2, 4), result.shape)
+        self.assertTrue(np.issubdtype(result.dtype, np.integer))
+        self.assertEqual((0, 4), empty_result.shape)
+
+    def test_clip_boxes_002(self):
+        """
+        Tests the clip_boxes method.
+
+        Case 1: Matches keep_box_within_bounds.
+        """
+        # test data
+        test_data = [
+            [(20, 20), 0, 0, 12, 16],
+            [(20, 20), 0, 0, 12, 21],
+            [(20, 20), 0, 0, 22, 12],
+            [(20, 20), 15, 1, 6, 12],
+            [(20, 20), 2, 15, 6, 12],
+            [(20, 20), -5, 15, 1, 1],
+            [(20, 20), -5, 15, 11, -1],
+            [(20, 20), -5, 15, 7, 1],
+            [(20, 20), -5, -1, 40, 1],
+            [(30, 20), 41, 15, 2, 1],
+            [(30, 20), 2, 31, 2, 5]
+        ]
+
+        for shape, x, y, w, h in test_data:
+            # result
+            result = clip_boxes(np.array([[x, y, w, h]]), width=shape[1], height=shape[0])
+
+            # expected result
+            expected_result = keep_box_within_bounds(np.zeros(shape), x, y, w, h)
+
+            # assertions
+            self.assertTrue((result[0] == np.array(expected_result)).all())
+
+    def test_clip_boxes_003(self):
+        """
+        Tests the clip_boxes method.
+
+        Case 2: Empty array.
+        """
+        # perform operation and get result
+        result = clip_boxes(to_box_array([]), width=160, height=120)
+
+        # assertions
+        self.assertEqual((0, 4), result.shape)
+
+    def test_expand_boxes_004(self):
+        """
+        Tests the expand_boxes method.
+        """
+        # perform operation and get result
+        result = expand_boxes(np.array([[50, 70, 30, 20], [10, 10, 0, 0]]), x_zoom_out=0.5, y_zoom_out=0.5)
+
+        # expected result
+        expected_result = [[43, 65, 45, 30], [10, 10, 0, 0]]
+
+        # assertions
+        self.assertTrue((result == np.array(expected_result)).all())
+
+    def test_box_area_005(self):
+        """
+        Tests the box_area method.
+        """
+        # perform operation and get result
+        result = box_area(np.array([[0, 0, 10, 5], [3, 3, 0, 7], [1, 1, -2, 4]]))
+
+        # expected result
+        expected_result = [50, 0, 0]
+
+        # assertions
+        self.assertTrue((result == np.array(expected_result)).all())
+
+    def test_box_iou_006(self):
+        """
+        Tests the box_iou method.
+        """
+        boxes_a = np.array([[0, 0, 10, 10], [20, 20, 10, 10]])
+        boxes_b = np.array([[0, 0, 10, 10], [5, 0, 10, 10], [100, 100, 5, 5]])
+
+        # perform operation and get result
+        result = box_iou(boxes_a, boxes_b)
+
+        # expected result
+        expected_result = [[1.0, 50 / 150, 0.0],
+                           [0.0, 0.0, 0.0]]
+
+        # assertions
+        self.assertEqual((2, 3), result.shape)
+        self.assertTrue(np.allclose(result, np.array(expected_result)))
+
+    def test_shrink_boxes_007(self):
+        """
+        Tests the shrink_boxes method.
+        """
+        boxes = np.array([[10, 10, 20, 30], [5, 5, 1, 1]])
+
+        # perform operation and get result
+        result = shrink_boxes(boxes, shrink=0.5)
+
+        # expected result
+        expected_result = [[15, 17, 10, 15], [5, 5, 1, 1]]
+
+        # assertions
+        self.assertTrue((np.array(expected_result) == result).all())
+
+    def test_non_max_suppression_008(self):
+        """
+        Tests the non_max_suppression method.
+
+        Case 1: overlapping boxes of one class suppressed
+        Case 2: boxes of different classes not suppressed
+        Case 3: only the top k boxes considered
+        """
+        boxes = np.array([[0, 0, 10, 10], [1, 0, 10, 10], [50, 50, 10, 10], [0, 1, 10, 10]])
+        scores = np.array([0.6, 0.9, 0.7, 0.8])
+
+        # perform operation and get result
+        result_1 = non_max_suppression(boxes, scores, iou_threshold=0.5)
+        result_2 = non_max_suppression(boxes, scores, iou_threshold=0.5, class_ids=np.array([0, 0, 0, 1]))
+        result_3 = non_max_suppression(boxes, scores, iou_threshold=0.5, top_k=2)
+
+        # assertions
+        self.assertEqual([1, 2], list(result_1))
+        self.assertEqual([1, 3, 2], list(result_2))
+        self.assertEqual([1], list(result_3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit tests for the event_store module.
+"""
+
+# unit test imports
+import unittest
+import sqlite3
+import tempfile
+import sys
+import os
+from PIL import Image
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.event_store import EventStore
+from core.fever_monitor import Face
+from core.inference import Detection
+
+
+def create_faces(num_faces):
+    """
+    Returns a list of faces for testing.
+    """
+    return [Face(detection=Detection(x=i, y=2, w=3, h=4, class_id=0, confidence=0.5),
+                 temp=36.0 + i,
+                 img=Image.new('RGB', (4, 4)),
+                 over_threshold=(i > 0)) for i in range(num_faces)]
+
+
+class TestEventStoreModule(unittest.TestCase):
+
+    def test_EventStore_record_001(self):
+        """
+        Tests the EventStore.record method writes all records on close.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "events.db")
+
+            # perform operation
+            with EventStore(db_path, batch_size=4) as event_store:
+                for frame in range(5):
+                    event_store.record(create_faces(2), timestamp=100.0 + frame)
+                event_store.record([])
+
+            # get result
+            result = event_store.get_events()
+
+            # assertions
+            self.assertEqual(10, len(result))
+            self.assertEqual(10, event_store.get_written_count())
+            self.assertEqual((100.0, 1, 0, 36.0, "Celsius", 0, 0),
+                             tuple(result[0][k] for k in ("timestamp", "frame_id", "face_id", "temp",
+                                                          "temp_unit", "x", "over_threshold")))
+            self.assertEqual((5, 1, 37.0, 1), tuple(result[-1][k] for k in ("frame_id", "face_id", "temp",
+                                                                           "over_threshold")))
+            self.assertIsNone(result[0]["thumbnail"])
+            self.assertEqual(2, len(event_store.get_events(since=103.0)))
+
+            # the database uses write-ahead logging
+            connection = sqlite3.connect(db_path)
+            self.assertEqual("wal", connection.execute("PRAGMA journal_mode").fetchone()[0])
+            connection.close()
+
+    def test_EventStore_record_002(self):
+        """
+        Tests the EventStore.record method stores face images when
+        thumbnails are saved.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with EventStore(os.path.join(tmp_dir, "events.db"), save_thumbnails=True) as event_store:
+                event_store.record(create_faces(1))
+
+            # get result
+            result = event_store.get_events()
+
+            # assertions
+            self.assertTrue(result[0]["thumbnail"].startswith(b'\x89PNG'))
+
+    def test_EventStore_record_003(self):
+        """
+        Tests the EventStore.record method raises an exception after
+        the store is closed.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            event_store = EventStore(os.path.join(tmp_dir, "events.db"))
+            event_store.close()
+
+            with self.assertRaises(AssertionError) as context:
+                event_store.record(create_faces(1))
+            self.assertTrue('closed' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
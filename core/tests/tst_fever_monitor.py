@@ -5,6 +5,9 @@ Unit tests for the fever_monitor module.
 # unit test imports
 import unittest
 from unittest.mock import patch
+import tracemalloc
+import threading
+import time
 import sys
 import os
 from cv2 import imread
@@ -21,7 +24,14 @@ PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
 sys.path.append(PROJECT_ROOT_PATH)
 
 # project imports
-from core.fever_monitor import FeverMonitor
+from core.fever_monitor import (FeverMonitor,
+                                Face,
+                                faces_to_array,
+                                MonitorConfig,
+                                ADAPTIVE_HOLD_FRAMES,
+                                ADAPTIVE_PROBE_INTERVAL)
+from core.inference import (Detection,
+                            OnnxInference)
 
 
 class TestFeverMonitorModule(unittest.TestCase):
@@ -253,6 +263,440 @@ class TestFeverMonitorModule(unittest.TestCase):
         # assertions
         self.assertEqual(expected_result, result)
 
+    def test_FeverMonitor_set_inference_engine_015(self):
+        """
+        Tests the FeverMonitor.set_inference_engine class method raises an exception
+        when an invalid inference engine name is passed.
+        """
+        self.setup()
+        with self.assertRaises(Exception) as context:
+            self.fever_monitor.set_inference_engine("FortyTwo")
+        self.assertTrue('not recognised' in str(context.exception))
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_016(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 8: Using the ONNX Runtime inference engine.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        self.fever_monitor.set_inference_engine("ONNX Runtime", num_threads=1)
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual("ONNX Runtime", self.fever_monitor.get_inference_engine())
+        self.assertEqual(Image.Image, type(pil_image))
+        self.assertEqual(1, len(face_objects))
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_017(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 9: Using the Lightweight INT8 YOLO model.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        self.fever_monitor.set_yolo_model("Lightweight INT8")
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual("Lightweight INT8", self.fever_monitor.get_model_name_selected())
+        self.assertEqual(Image.Image, type(pil_image))
+        self.assertEqual(1, len(face_objects))
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_018(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 10: Using a region of interest containing the face.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        self.fever_monitor.set_rois([(32, 0, 96, 120)])
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual(Image.Image, type(pil_image))
+        self.assertEqual(1, len(face_objects))
+        self.assertTrue(face_objects[0].detection.x >= 32)
+
+    def test_FeverMonitor_set_rois_019(self):
+        """
+        Tests the FeverMonitor.set_rois class method.
+        """
+        self.setup()
+
+        # perform operation and get result
+        self.fever_monitor.set_rois([(0, 20, 160, 60), (10, 10, 20, 20)])
+        result = self.fever_monitor.get_rois()
+
+        # expected result
+        expected_result = [(0, 20, 160, 60), (10, 10, 20, 20)]
+
+        # assertions
+        self.assertEqual(expected_result, result)
+        self.assertEqual([(160, 64), (32, 32)], self.fever_monitor._roi_network_dimensions)
+
+        # clearing the regions of interest
+        self.fever_monitor.set_rois(None)
+        self.assertEqual([], self.fever_monitor.get_rois())
+
+    def test_FeverMonitor_set_rois_020(self):
+        """
+        Tests the FeverMonitor.set_rois class method raises an exception
+        when a region of interest is outside the image bounds.
+        """
+        self.setup()
+        with self.assertRaises(AssertionError) as context:
+            self.fever_monitor.set_rois([(100, 0, 100, 120)])
+        self.assertTrue('must be within the image bounds' in str(context.exception))
+
+    def test_Face_img_021(self):
+        """
+        Tests the Face.img property creates the image lazily.
+        """
+        calls = []
+
+        def img_loader():
+            calls.append(1)
+            return Image.new('RGB', (4, 4))
+
+        face = Face(
+            detection=Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.5),
+            temp=36.5,
+            img=None,
+            over_threshold=False,
+            img_loader=img_loader)
+
+        # assertions
+        self.assertEqual(0, len(calls))
+        self.assertEqual(Image.Image, type(face.img))
+        self.assertEqual(Image.Image, type(face.img))
+        self.assertEqual(1, len(calls))
+
+    def test_faces_to_array_022(self):
+        """
+        Tests the faces_to_array method.
+        """
+        faces = [Face(detection=Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.5),
+                      temp=36.5,
+                      img=None,
+                      over_threshold=False)]
+
+        # perform operation and get result
+        result = faces_to_array(faces)
+
+        # assertions
+        self.assertEqual(1, len(result))
+        self.assertEqual(36.5, result['temp'][0])
+        self.assertEqual(3, result['w'][0])
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_023(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 11: Face images are created when they are read.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        self.fever_monitor.set_temp_threshold(0)
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual(1, len(face_objects))
+        self.assertIsNone(face_objects[0]._img)
+        self.assertEqual(Image.Image, type(face_objects[0].img))
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_024(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 12: Face images over the threshold are created in run.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        self.fever_monitor.set_eager_face_images(True)
+        self.fever_monitor.set_temp_threshold(0)
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual(1, len(face_objects))
+        self.assertEqual(Image.Image, type(face_objects[0]._img))
+
+    def test_FeverMonitor_set_eager_face_images_025(self):
+        """
+        Tests the FeverMonitor.set_eager_face_images class method raises
+        an exception when the parameter is not a boolean.
+        """
+        self.setup()
+        with self.assertRaises(AssertionError):
+            self.fever_monitor.set_eager_face_images(1)
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_FeverMonitor_run_026(self, mock_grab):
+        """
+        Tests the FeverMonitor.run class method.
+
+        Case 13: Frame captured shortly after a flat-field correction.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',')
+        self.setup()
+
+        # FFC complete 500 ms before the frame was captured
+        self.fever_monitor._lepton_camera._camera.status = 3 << 4
+        self.fever_monitor._lepton_camera._camera.ffc_elapsed_ms = 500
+        self.fever_monitor.set_ffc_window(2.0)
+        pil_image, face_objects = self.fever_monitor.run()
+
+        # assertions
+        self.assertEqual(Image.Image, type(pil_image))
+        self.assertEqual(0, len(face_objects))
+        self.assertTrue(self.fever_monitor.is_frame_skipped())
+        self.assertEqual(500, self.fever_monitor.get_capture_metadata().ffc_elapsed_ms)
+
+        # frame captured outside of the window
+        self.fever_monitor._lepton_camera._camera.ffc_elapsed_ms = 5000
+        self.fever_monitor.run()
+        self.assertFalse(self.fever_monitor.is_frame_skipped())
+
+    def test_FeverMonitor_set_temporal_filter_027(self):
+        """
+        Tests the FeverMonitor.set_temporal_filter class method.
+        """
+        self.setup()
+
+        # perform operation and get result
+        self.fever_monitor.set_temporal_filter("Median", num_frames=5)
+        result = self.fever_monitor.get_temporal_filter()
+
+        # assertions
+        self.assertEqual("Median", result)
+        with self.assertRaises(Exception) as context:
+            self.fever_monitor.set_temporal_filter("Mean")
+        self.assertTrue('not recognised' in str(context.exception))
+
+    def test_FeverMonitor_process_frame_028(self):
+        """
+        Tests the FeverMonitor.process_frame class method.
+
+        Case 1: Frame rendered
+        Case 2: Frame not rendered
+        Case 3: Monitor without a camera cannot run
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", confidence_threshold=0.1, use_camera=False)
+        img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+
+        # perform operation and get result
+        pil_image, face_objects = fever_monitor.process_frame(img)
+        no_image, unrendered_face_objects = fever_monitor.process_frame(img, render=False)
+
+        # assertions
+        self.assertEqual(Image.Image, type(pil_image))
+        self.assertIsNone(no_image)
+        self.assertEqual([f.temp for f in face_objects], [f.temp for f in unrendered_face_objects])
+        self.assertTrue(all(f.img is None for f in unrendered_face_objects))
+        self.assertIsNone(fever_monitor.get_capture_metadata())
+        with self.assertRaises(AssertionError):
+            fever_monitor.run()
+
+    def test_FeverMonitor_apply_config_029(self):
+        """
+        Tests the FeverMonitor.apply_config class method.
+
+        Case 1: Snapshot of the current settings changes nothing
+        Case 2: Only the settings changed are applied
+        Case 3: Model reloaded when the model changes
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", use_camera=False)
+        config = fever_monitor.get_config()
+
+        # perform operation and get result
+        with patch.object(fever_monitor, '_load_model') as mock_load_model, \
+                patch.object(fever_monitor, 'set_gpu') as mock_set_gpu:
+            unchanged = fever_monitor.apply_config(config)
+            changed = fever_monitor.apply_config(config._replace(colormap_index=2, rois=[[0, 0, 80, 60]]))
+            model_reloads = mock_load_model.call_count
+            fever_monitor.apply_config(fever_monitor.get_config()._replace(yolo_model="Lightweight"))
+
+        # assertions
+        self.assertEqual(MonitorConfig, type(config))
+        self.assertEqual(set(), unchanged)
+        self.assertEqual({"colormap_index", "rois"}, changed)
+        self.assertEqual(0, model_reloads)
+        self.assertEqual(1, mock_load_model.call_count)
+        mock_set_gpu.assert_not_called()
+        self.assertEqual(config._replace(colormap_index=2, rois=((0, 0, 80, 60),), yolo_model="Lightweight"),
+                         fever_monitor.get_config())
+
+    def test_FeverMonitor_background_model_load_030(self):
+        """
+        Tests loading models in the background.
+
+        Case 1: Current model used while the new model loads
+        Case 2: New model swapped in once loaded
+        Case 3: Current model kept when the new model fails to load
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", use_camera=False, background_model_load=True)
+        img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+        first_inf = fever_monitor._yolo_inf
+        release = threading.Event()
+        create_inference = fever_monitor._create_inference
+
+        def slow_create_inference(*args):
+            release.wait(10)
+            return create_inference(*args)
+
+        # perform operation and get result
+        with patch.object(fever_monitor, '_create_inference', side_effect=slow_create_inference):
+            fever_monitor.set_yolo_model("Lightweight")
+            loading = fever_monitor.is_model_loading()
+            fever_monitor.process_frame(img, render=False)
+            inf_while_loading = fever_monitor._yolo_inf
+            release.set()
+            while fever_monitor.is_model_loading():
+                time.sleep(0.01)
+            fever_monitor.process_frame(img, render=False)
+        second_inf = fever_monitor._yolo_inf
+
+        with patch.object(fever_monitor, '_create_inference', side_effect=Exception("corrupt weights")):
+            fever_monitor.set_yolo_model("Standard")
+            while fever_monitor.is_model_loading():
+                time.sleep(0.01)
+            fever_monitor.process_frame(img, render=False)
+
+        # assertions
+        self.assertTrue(loading)
+        self.assertIs(first_inf, inf_while_loading)
+        self.assertIsNot(first_inf, second_inf)
+        self.assertIs(second_inf, fever_monitor._yolo_inf)
+        self.assertEqual("Lightweight", fever_monitor.get_model_name_selected())
+        self.assertIn("corrupt weights", fever_monitor.pop_model_load_error())
+        self.assertIsNone(fever_monitor.pop_model_load_error())
+
+    def test_FeverMonitor_adaptive_resolution_031(self):
+        """
+        Tests the adaptive resolution mode.
+
+        Case 1: Large confident faces inferred at the reduced size, with a full size probe
+        Case 2: Frame with a small face run again at full size, and full size held
+        Case 3: Passes at each size counted
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", confidence_threshold=0.5, use_camera=False,
+                                     adaptive_resolution=True)
+        img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+        large_face = Detection(40, 30, 40, 50, 0, 0.9)
+        small_face = Detection(10, 10, 12, 16, 0, 0.9)
+        frame_faces = []
+        sizes = []
+
+        def run(**kwargs):
+            sizes.append(fever_monitor._yolo_inf.get_network_dimensions())
+            return list(frame_faces), 0.01
+
+        # perform operation and get result
+        with patch.object(fever_monitor._yolo_inf, 'run', side_effect=run):
+            frame_faces[:] = [large_face]
+            for _ in range(ADAPTIVE_PROBE_INTERVAL + 1):
+                fever_monitor.process_frame(img, render=False)
+            probe_sizes = list(sizes)
+            sizes.clear()
+            frame_faces[:] = [large_face, small_face]
+            fever_monitor.process_frame(img, render=False)
+            rerun_sizes = list(sizes)
+            sizes.clear()
+            frame_faces[:] = [large_face]
+            for _ in range(ADAPTIVE_HOLD_FRAMES + 1):
+                fever_monitor.process_frame(img, render=False)
+            hold_sizes = list(sizes)
+        stats = fever_monitor.get_resolution_stats()
+
+        # expected result
+        reduced, full = (96, 64), fever_monitor._yolo_inf.get_network_dimensions()
+
+        # assertions
+        self.assertTrue(fever_monitor.get_adaptive_resolution())
+        self.assertEqual([reduced] * ADAPTIVE_PROBE_INTERVAL + [full], probe_sizes)
+        self.assertEqual([reduced, full], rerun_sizes)
+        self.assertEqual([full] * ADAPTIVE_HOLD_FRAMES + [reduced], hold_sizes)
+        self.assertEqual(1, stats["reruns"])
+        self.assertEqual({"96x64": ADAPTIVE_PROBE_INTERVAL + 2, "{}x{}".format(*full): ADAPTIVE_HOLD_FRAMES + 2},
+                         stats["passes"])
+        self.assertAlmostEqual(0.01, stats["mean_forward_seconds"]["96x64"])
+        with self.assertRaises(AssertionError):
+            fever_monitor.set_adaptive_resolution(1)
+
+    def test_FeverMonitor_memory_tracking_032(self):
+        """
+        Tests the FeverMonitor.set_memory_tracking class method.
+
+        Case 1: Memory report made every interval frames
+        Case 2: Report cleared once popped
+        Case 3: Tracking stopped when set to 0
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", use_camera=False, memory_tracking=2)
+        img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+
+        # perform operation and get result
+        try:
+            fever_monitor.process_frame(img, render=False)
+            first_report = fever_monitor.pop_memory_report()
+            fever_monitor.process_frame(img, render=False)
+            fever_monitor.process_frame(img, render=False)
+            report = fever_monitor.pop_memory_report()
+            popped_report = fever_monitor.pop_memory_report()
+            config = fever_monitor.get_config()
+        finally:
+            fever_monitor.set_memory_tracking(0)
+
+        # assertions
+        self.assertIsNone(first_report)
+        self.assertEqual(2, report.frames)
+        self.assertIsNone(popped_report)
+        self.assertEqual(2, config.memory_tracking)
+        self.assertEqual(0, fever_monitor.get_memory_tracking())
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_FeverMonitor_apply_config_model_033(self):
+        """
+        Tests the FeverMonitor.apply_config class method when the model
+        and inference engine change together.
+
+        Case 1: Model loaded once with the new model and engine
+        Case 2: Previous settings kept when the model fails to load
+        """
+        fever_monitor = FeverMonitor(yolo_model="Standard", inference_engine="OpenCV", use_camera=False)
+        config = fever_monitor.get_config()
+        create_inference = fever_monitor._create_inference
+
+        # perform operation and get result
+        with patch.object(fever_monitor, '_create_inference', side_effect=create_inference) as mock_create_inference:
+            changed = fever_monitor.apply_config(config._replace(yolo_model="Lightweight",
+                                                                 inference_engine="ONNX Runtime"))
+        new_config = fever_monitor.get_config()
+
+        with patch.object(fever_monitor, '_create_inference', side_effect=Exception("corrupt weights")):
+            with self.assertRaises(Exception):
+                fever_monitor.apply_config(new_config._replace(yolo_model="Standard", num_threads=2))
+        failed_config = fever_monitor.get_config()
+
+        # assertions
+        self.assertEqual({"yolo_model", "inference_engine"}, changed)
+        self.assertEqual(1, mock_create_inference.call_count)
+        self.assertEqual(("Lightweight", "ONNX Runtime", 0, False), mock_create_inference.call_args[0])
+        self.assertEqual(OnnxInference, type(fever_monitor._yolo_inf))
+        self.assertEqual(new_config, failed_config)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -27,7 +27,9 @@ from core.image_processing import (to_color_img_array,
                                    crop_image_array,
                                    get_max_array_value,
                                    keep_box_within_bounds,
-                                   draw_face_box)
+                                   draw_face_box,
+                                   draw_box,
+                                   to_8bit_array)
 from core.fever_monitor import Face
 from core.inference import Detection
 
@@ -436,6 +438,80 @@ class TestImageProcessingModule(unittest.TestCase):
         self.assertEqual(type(result), np.ndarray)
         self.assertTrue((np.array(self.img_arr.shape) == np.array(result.shape)).all())
 
+    def test_crop_image_array_020(self):
+        """
+        Tests the crop_face_in_image_array method.
+
+        Case 8: Crop starting at the top-left edge of the array.
+        """
+        # perform operation
+        cropped_arr = crop_image_array(
+            self.img_arr,
+            x=0,
+            y=0,
+            w=30,
+            h=20)
+
+        # result
+        result = cropped_arr.shape
+
+        # expected result
+        expected_result = [20, 30, 3]
+
+        # assertions
+        self.assertTrue((np.array(result) == np.array(expected_result)).all())
+
+    def test_draw_box_021(self):
+        """
+        Tests the draw_box method.
+        """
+        arr = self.img_arr.copy()
+
+        # perform operation and get result
+        result = draw_box(
+            arr=arr,
+            box=np.array([20, 30, 30, 40]),
+            color=(255, 0, 0),
+            text="face",
+            box_thickness=1,
+            text_thickness=1)
+
+        # assertions
+        self.assertEqual(type(result), np.ndarray)
+        self.assertTrue((np.array(self.img_arr.shape) == np.array(result.shape)).all())
+        self.assertTrue((result[30, 20] == np.array([255, 0, 0])).all())
+
+    def test_to_8bit_array_022(self):
+        """
+        Tests the to_8bit_array method.
+
+        Case 1: Same result as rescaling a float32 array
+        Case 2: Array with a single value
+        """
+        arr = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+
+        # perform operation and get result
+        result = to_8bit_array(arr)
+
+        # expected result
+        float_arr = arr.astype(np.float32)
+        expected_result = (255 * (float_arr - float_arr.min()) / (float_arr.max() - float_arr.min())).astype(np.uint8)
+
+        # assertions
+        self.assertEqual(np.uint8, result.dtype)
+        self.assertTrue((result == expected_result).all())
+        self.assertTrue((to_8bit_array(np.full((2, 2), 30000, dtype=np.uint16)) == 0).all())
+
+    def test_to_color_img_array_023(self):
+        """
+        Tests the to_color_img_array method gives the same image for
+        uint16 and float32 arrays.
+        """
+        arr = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+
+        # assertions
+        self.assertTrue((to_color_img_array(arr) == to_color_img_array(arr.astype(np.float32))).all())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,7 @@ import unittest
 # module imports
 import os
 import sys
+import numpy as np
 from cv2 import imread
 
 # global path variable definitions
@@ -21,7 +22,14 @@ YOLO_FILES_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "yolo"))
 sys.path.append(PROJECT_ROOT_PATH)
 
 # project imports
-from core.inference import YoloInference
+from core.inference import (YoloInference,
+                            OnnxInference,
+                            Detection,
+                            DETECTION_DTYPE,
+                            detections_to_array,
+                            array_to_detections,
+                            suppress_boxes,
+                            tile_grid)
 
 
 class TestInferenceModule(unittest.TestCase):
@@ -55,6 +63,19 @@ class TestInferenceModule(unittest.TestCase):
             network_height=160,
             use_gpu=False)
 
+    def setup_onnx_lightweight(self):
+        """
+        Sets up a fresh instance of an OnnxInference object using the
+        Lightweight YOLO model exported to ONNX.
+        """
+        self.inf = OnnxInference(
+            onnx_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.onnx'),
+            labels_path=os.path.join(YOLO_FILES_PATH, 'obj.names'),
+            network_width=128,
+            network_height=160,
+            use_gpu=False,
+            num_threads=1)
+
     def test_load_image_001(self):
         """
         Test the YoloInference.load_image class function.
@@ -161,6 +182,164 @@ class TestInferenceModule(unittest.TestCase):
         self.setup_standard()
         self.inf.set_gpu(True)
 
+    def test_onnx_run_008(self):
+        """
+        Test the OnnxInference.run class function.
+
+        Case 1: Detections match the OpenCV Darknet model.
+        """
+        self.setup_lightweight()
+        darknet_inf = self.inf
+        self.setup_onnx_lightweight()
+
+        for img in self.sample_images:
+            img_arr = imread(os.path.join(TEST_SAMPLE_IMAGES_PATH, img))
+            darknet_inf.load_image(img_arr)
+            self.inf.load_image(img_arr)
+
+            # result
+            result = [(d.x, d.y, d.w, d.h) for d in self.inf.run(0.4)[0]]
+
+            # expected result
+            expected_result = [(d.x, d.y, d.w, d.h) for d in darknet_inf.run(0.4)[0]]
+
+            # assertions
+            self.assertEqual(expected_result, result)
+
+    def test_onnx_set_num_threads_009(self):
+        """
+        Test the OnnxInference.set_num_threads class function.
+
+        Case 1: Invalid thread count.
+        """
+        self.setup_onnx_lightweight()
+
+        with self.assertRaises(AssertionError) as context:
+            self.inf.set_num_threads(-1)
+        self.assertTrue('Number of threads must be' in str(context.exception))
+
+    def test_detections_to_array_010(self):
+        """
+        Test the detections_to_array function.
+        """
+        detections = [Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.9),
+                      Detection(x=5, y=6, w=7, h=8, class_id=0, confidence=0.5)]
+
+        # perform operation and get result
+        result = detections_to_array(detections, temps=[36.5, 38.0])
+
+        # assertions
+        self.assertEqual(DETECTION_DTYPE, result.dtype)
+        self.assertEqual(2, len(result))
+        self.assertEqual([1, 5], list(result['x']))
+        self.assertEqual([8], list(result['h'][1:]))
+        self.assertTrue(np.allclose([36.5, 38.0], result['temp']))
+        self.assertTrue(np.isnan(detections_to_array(detections)['temp']).all())
+
+    def test_array_to_detections_011(self):
+        """
+        Test the array_to_detections function.
+        """
+        detections = [Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.5)]
+
+        # perform operation and get result
+        result = array_to_detections(detections_to_array(detections))
+
+        # assertions
+        self.assertEqual(1, len(result))
+        self.assertEqual((1, 2, 3, 4, 0, 0.5),
+                         (result[0].x, result[0].y, result[0].w, result[0].h, result[0].class_id, result[0].confidence))
+
+    def test_detection_slots_012(self):
+        """
+        Test the Detection class does not allow new attributes.
+        """
+        detection = Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.5)
+
+        with self.assertRaises(AttributeError):
+            detection.temp = 36.5
+
+    def test_suppress_boxes_013(self):
+        """
+        Test the suppress_boxes function.
+
+        Case 1: OpenCV and Vectorized methods keep the same boxes
+        Case 2: method not recognised
+        """
+        rng = np.random.default_rng(0)
+        boxes = np.hstack([rng.integers(0, 100, size=(200, 2)), rng.integers(1, 30, size=(200, 2))])
+        confidences = rng.uniform(0.1, 1.0, size=200).astype(np.float32)
+        class_ids = np.zeros(200, dtype=int)
+
+        for iou_threshold in [0.1, 0.3, 0.5]:
+            # perform operation and get result
+            result_opencv = suppress_boxes(boxes, confidences, class_ids, iou_threshold, method="OpenCV")
+            result_vectorized = suppress_boxes(boxes, confidences, class_ids, iou_threshold, method="Vectorized")
+
+            # assertions
+            self.assertEqual(list(result_opencv), list(result_vectorized))
+
+        with self.assertRaises(Exception) as context:
+            suppress_boxes(boxes, confidences, class_ids, 0.5, method="Unknown")
+        self.assertTrue("NMS method 'Unknown' not recognised." in str(context.exception))
+
+    def test_tile_grid_014(self):
+        """
+        Test the tile_grid function.
+
+        Case 1: image larger than a tile
+        Case 2: image smaller than a tile
+        """
+        # perform operation and get result
+        result_1 = tile_grid(320, 240, 160, 128, overlap=0.25)
+        result_2 = tile_grid(100, 100, 160, 128)
+
+        # assertions
+        self.assertEqual(9, len(result_1))
+        self.assertEqual([(0, 0), (80, 0), (160, 0)], [(x, y) for x, y, _, _ in result_1[:3]])
+        self.assertEqual((160, 112, 160, 128), result_1[-1])
+        self.assertEqual([(0, 0, 100, 100)], result_2)
+
+    def test_run_tiled_015(self):
+        """
+        Test the run class function with tiling.
+
+        Case 1: Batched tiles match running each tile separately.
+        Case 2: ONNX Runtime batches match the OpenCV Darknet model.
+        """
+        images = [imread(os.path.join(TEST_SAMPLE_IMAGES_PATH, img)) for img in sorted(self.sample_images)[:4]]
+        img_arr = np.vstack([np.hstack(images[:2]), np.hstack(images[2:])])
+        self.setup_lightweight()
+        darknet_inf = self.inf
+        self.setup_onnx_lightweight()
+
+        # perform operation and get result
+        darknet_inf.set_tiling(160, 128, overlap=0.25)
+        darknet_inf.load_image(img_arr)
+        tiles = darknet_inf.get_tiles()
+        result = darknet_inf.run(0.1)[0]
+        self.inf.set_tiling(160, 128, overlap=0.25)
+        self.inf.load_image(img_arr)
+        onnx_result = self.inf.run(0.1)[0]
+
+        # expected result
+        darknet_inf.set_tiling()
+        boxes, confidences = [], []
+        for x, y, w, h in tiles:
+            darknet_inf.load_image(np.ascontiguousarray(img_arr[y:y + h, x:x + w]))
+            detections = darknet_inf.run(0.1, nms_threshold=1.0)[0]
+            boxes.extend([d.x + x, d.y + y, d.w, d.h] for d in detections)
+            confidences.extend(d.confidence for d in detections)
+        idxs = suppress_boxes(np.array(boxes), np.array(confidences, dtype=np.float32),
+                              np.zeros(len(boxes), dtype=int), 0.1)
+        expected_result = sorted(tuple(boxes[i]) for i in idxs)
+
+        # assertions
+        self.assertEqual(9, len(tiles))
+        self.assertTrue(len(result) > 0)
+        self.assertEqual(expected_result, sorted((d.x, d.y, d.w, d.h) for d in result))
+        self.assertEqual(expected_result, sorted((d.x, d.y, d.w, d.h) for d in onnx_result))
+
 
 if __name__ == '__main__':
     unittest.main()
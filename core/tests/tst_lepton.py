@@ -10,6 +10,7 @@ from unittest.mock import patch
 import numpy as np
 import os
 import sys
+import tempfile
 
 # global path variable definitions
 THIS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -21,6 +22,10 @@ sys.path.append(PROJECT_ROOT_PATH)
 
 # project imports
 from core.lepton import (LeptonCamera,
+                         CaptureMetadata,
+                         FFC_STATE_IN_PROGRESS,
+                         FFC_STATE_COMPLETE,
+                         load_frame,
                          to_celsius,
                          to_fahrenheit,
                          to_kelvin)
@@ -279,6 +284,123 @@ class TestLeptonModule(unittest.TestCase):
         # assertions
         self.assertTrue((np.array(result) == np.array(expected_result)).all())
 
+    def test_load_frame_014(self):
+        """
+        Tests the load_frame method.
+
+        Case 1: '.csv' and '.npy' frame files.
+        """
+        expected_result = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab.csv'), delimiter=',').astype(np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            np.save(os.path.join(tmp_dir, 'frame.npy'), expected_result.astype(np.uint16))
+
+            # perform operation and get result
+            result_csv = load_frame(os.path.join(TEST_FILES_PATH, 'lepton_grab.csv'))
+            result_npy = load_frame(os.path.join(tmp_dir, 'frame.npy'))
+
+        # assertions
+        self.assertEqual(np.float32, result_csv.dtype)
+        self.assertTrue((result_csv == expected_result).all())
+        self.assertTrue((result_npy == expected_result).all())
+
+    def test_load_frame_015(self):
+        """
+        Tests the load_frame method.
+
+        Case 2: Unsupported file type.
+        """
+        with self.assertRaises(AssertionError) as context:
+            load_frame(os.path.join(TEST_FILES_PATH, 'samples', 'close_centre_normal.jpg'))
+        self.assertTrue("must be a '.npy' or '.csv' file" in str(context.exception))
+
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    def test_Lepton_get_metadata_016(self, mock_grab):
+        """
+        Tests the Lepton.get_metadata method.
+        """
+        mock_grab.return_value = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab.csv'), delimiter=',')
+        self.setup()
+        self.lepton_camera._camera.status = FFC_STATE_COMPLETE << 4
+        self.lepton_camera._camera.frame_count = 42
+        self.lepton_camera.capture()
+
+        # perform operation and get result
+        result = self.lepton_camera.get_metadata()
+
+        # assertions
+        self.assertEqual(4242.123, result.uptime_ms)
+        self.assertEqual(8282.987, result.ffc_elapsed_ms)
+        self.assertEqual(FFC_STATE_COMPLETE, result.ffc_state)
+        self.assertEqual(42, result.frame_count)
+
+    def test_CaptureMetadata_in_ffc_window_017(self):
+        """
+        Tests the CaptureMetadata.in_ffc_window method.
+
+        Case 1: FFC complete, inside and outside of the window
+        Case 2: FFC in progress
+        Case 3: No telemetry
+        """
+        metadata = CaptureMetadata(uptime_ms=10000, ffc_elapsed_ms=1500, ffc_state=FFC_STATE_COMPLETE, frame_count=1)
+
+        # assertions
+        self.assertTrue(metadata.in_ffc_window(2.0))
+        self.assertFalse(metadata.in_ffc_window(1.0))
+        self.assertTrue(CaptureMetadata(ffc_elapsed_ms=60000, ffc_state=FFC_STATE_IN_PROGRESS).in_ffc_window(0))
+        self.assertFalse(CaptureMetadata().in_ffc_window(2.0))
+
+    @patch('core.lepton.time.sleep')
+    @patch('flirpy.camera.lepton.Lepton.grab')
+    @patch('flirpy.camera.lepton.Lepton.find_video_device')
+    def test_Lepton_capture_018(self, mock_find_video_device, mock_grab, mock_sleep):
+        """
+        Tests the Lepton.capture reconnects after a capture failure.
+        """
+        img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab.csv'), delimiter=',')
+        mock_find_video_device.return_value = 0
+        mock_grab.side_effect = [Exception("test error"), Exception("test error"), img]
+        lepton_camera = LeptonCamera(reconnect_timeout=10)
+
+        # perform operation
+        lepton_camera.capture()
+
+        # assertions
+        self.assertTrue((lepton_camera.get_img() == img.astype(np.float32)).all())
+        self.assertEqual(1, lepton_camera.get_reconnect_count())
+        self.assertEqual([0.25, 0.5], [c.args[0] for c in mock_sleep.call_args_list])
+
+    @patch('flirpy.camera.lepton.Lepton.find_video_device')
+    def test_Lepton_lepton_connected_019(self, mock_find_video_device):
+        """
+        Tests the Lepton.lepton_connected method reuses a recent device scan.
+        """
+        mock_find_video_device.return_value = 0
+        lepton_camera = LeptonCamera()
+
+        # perform operation and get result
+        result = [lepton_camera.lepton_connected() for _ in range(3)]
+
+        # assertions
+        self.assertEqual([True, True, True], result)
+        self.assertEqual(1, mock_find_video_device.call_count)
+
+    def test_Lepton_get_raw_img_020(self):
+        """
+        Tests the Lepton.get_raw_img class method.
+        """
+        self.setup()
+
+        # perform operation and get result
+        result = self.lepton_camera.get_raw_img()
+
+        # expected results
+        expected_result = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab.csv'), delimiter=',').astype(np.uint16)
+
+        # assertions
+        self.assertEqual(np.uint16, result.dtype)
+        self.assertTrue((result == expected_result).all())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the memory_tracker module.
+"""
+
+# unit test imports
+import unittest
+from unittest.mock import MagicMock
+import tracemalloc
+import sys
+import os
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.memory_tracker import (MemoryTracker,
+                                 MemoryReport)
+
+
+class TestMemoryTrackerModule(unittest.TestCase):
+
+    def test_MemoryTracker_frame_001(self):
+        """
+        Tests the MemoryTracker.frame method.
+
+        Case 1: Report made every interval frames, and logged
+        Case 2: Memory kept every frame counted as net growth per frame
+        Case 3: Memory allocated and freed in a frame not counted
+        Case 4: Allocation site of the memory kept reported
+        """
+        logger = MagicMock()
+        tracker = MemoryTracker(interval=5, top=5, logger=logger)
+        kept = []
+
+        # perform operation and get result
+        tracker.start()
+        try:
+            results = []
+            for _ in range(10):
+                kept.append(bytearray(100000))
+                freed = [bytearray(1000) for _ in range(1000)]
+                del freed
+                results.append(tracker.frame())
+        finally:
+            tracker.stop()
+
+        # assertions
+        self.assertEqual([None] * 4, results[:4])
+        self.assertEqual([None] * 4, results[5:9])
+        self.assertEqual(MemoryReport, type(results[4]))
+        self.assertIs(results[9], tracker.get_last_report())
+        self.assertEqual(5, results[9].frames)
+        self.assertGreater(results[9].net_bytes_per_frame, 90000)
+        self.assertLess(results[9].net_bytes_per_frame, 110000)
+        self.assertLess(abs(results[9].net_blocks_per_frame), 100)
+        self.assertIn(os.path.abspath(__file__), results[9].top_sites[0].location)
+        self.assertGreater(results[9].top_sites[0].size_diff, 450000)
+        self.assertEqual(2, logger.info.call_count)
+
+    def test_MemoryTracker_start_stop_002(self):
+        """
+        Tests the MemoryTracker.start and MemoryTracker.stop methods.
+
+        Case 1: Tracing started and stopped by the tracker
+        Case 2: Tracing started elsewhere not stopped
+        Case 3: Frames not tracked before starting
+        """
+        tracker = MemoryTracker(interval=5)
+
+        # perform operation and get result
+        tracker.start()
+        tracing_started = tracemalloc.is_tracing()
+        tracking = tracker.is_tracking()
+        tracker.stop()
+        tracing_stopped = not tracemalloc.is_tracing()
+
+        tracemalloc.start()
+        try:
+            tracker.start()
+            tracker.stop()
+            tracing_kept = tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+        # assertions
+        self.assertTrue(tracing_started)
+        self.assertTrue(tracking)
+        self.assertTrue(tracing_stopped)
+        self.assertFalse(tracker.is_tracking())
+        self.assertTrue(tracing_kept)
+        with self.assertRaises(AssertionError):
+            tracker.frame()
+        with self.assertRaises(AssertionError):
+            MemoryTracker(interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the metrics module.
+"""
+
+# unit test imports
+import unittest
+import threading
+import sys
+import os
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core import metrics
+
+
+class TestMetricsModule(unittest.TestCase):
+
+    def test_counter_001(self):
+        """
+        Tests the counter function and Counter class.
+
+        Case 1: Counter incremented by several threads
+        Case 2: Counter with labels
+        Case 3: Counter registered again returns the same counter
+        """
+        counter = metrics.counter("test_metrics_counter_001_total", "Test counter.")
+        labelled = metrics.counter("test_metrics_labelled_001_total", "Test counter.", labelnames=("stage",))
+
+        # perform operation and get result
+        threads = [threading.Thread(target=lambda: [counter.inc() for _ in range(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        labelled.labels("a").inc(2)
+        labelled.labels("b").inc()
+        text = metrics.render()
+
+        # assertions
+        self.assertEqual(4000, counter.get())
+        self.assertEqual(2, labelled.get("a"))
+        self.assertIs(counter, metrics.counter("test_metrics_counter_001_total", "Test counter."))
+        self.assertIn("# TYPE test_metrics_counter_001_total counter", text)
+        self.assertIn("test_metrics_counter_001_total 4000\n", text)
+        self.assertIn('test_metrics_labelled_001_total{stage="a"} 2\n', text)
+        self.assertIn('test_metrics_labelled_001_total{stage="b"} 1\n', text)
+
+    def test_histogram_002(self):
+        """
+        Tests the histogram function and Histogram class.
+        """
+        histogram = metrics.histogram("test_metrics_histogram_002_seconds", "Test histogram.",
+                                      labelnames=("stage",), buckets=(0.1, 1.0))
+
+        # perform operation and get result
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.labels("a").observe(value)
+        text = metrics.render()
+
+        # assertions
+        self.assertIn("# TYPE test_metrics_histogram_002_seconds histogram", text)
+        self.assertIn('test_metrics_histogram_002_seconds_bucket{stage="a",le="0.1"} 2\n', text)
+        self.assertIn('test_metrics_histogram_002_seconds_bucket{stage="a",le="1.0"} 3\n', text)
+        self.assertIn('test_metrics_histogram_002_seconds_bucket{stage="a",le="+Inf"} 4\n', text)
+        self.assertIn('test_metrics_histogram_002_seconds_sum{stage="a"} 2.65\n', text)
+        self.assertIn('test_metrics_histogram_002_seconds_count{stage="a"} 4\n', text)
+
+    def test_register_003(self):
+        """
+        Tests registering a metric name again with a different type
+        raises an assertion error.
+        """
+        metrics.counter("test_metrics_register_003", "Test metric.")
+
+        # assertions
+        with self.assertRaises(AssertionError):
+            metrics.histogram("test_metrics_register_003", "Test metric.")
+
+
+if __name__ == '__main__':
+    unittest.main()
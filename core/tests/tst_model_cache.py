@@ -0,0 +1,149 @@
+"""
+Unit tests for the model_cache module.
+"""
+
+# unit test imports
+import unittest
+from unittest.mock import patch
+import functools
+import tempfile
+import json
+import sys
+import os
+import numpy as np
+from cv2 import imread
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TEST_SAMPLE_IMAGES_PATH = os.path.abspath(os.path.join(THIS_PATH, "files", "samples"))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+YOLO_FILES_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "yolo"))
+ONNX_PATH = os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.onnx')
+LABELS_PATH = os.path.join(YOLO_FILES_PATH, 'obj.names')
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.model_cache import (file_hash,
+                               get_cached_model,
+                               remove_cached_model,
+                               HASH_INDEX_FILE,
+                               MANIFEST_FILE)
+from core.inference import OnnxInference
+
+
+class TestModelCacheModule(unittest.TestCase):
+
+    def test_file_hash_001(self):
+        """
+        Tests the file_hash function.
+
+        Case 1: Hash of a new file
+        Case 2: Hash read from the index
+        Case 3: Hash of a modified file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "model.onnx")
+            with open(file_path, "wb") as f:
+                f.write(b"abc")
+
+            # perform operation and get result
+            result = file_hash(file_path, cache_path=tmp_dir)
+            with patch('hashlib.sha256') as mock_sha256:
+                cached_result = file_hash(file_path, cache_path=tmp_dir)
+            with open(file_path, "wb") as f:
+                f.write(b"abcd")
+            os.utime(file_path, ns=(0, 0))
+            modified_result = file_hash(file_path, cache_path=tmp_dir)
+            with open(os.path.join(tmp_dir, HASH_INDEX_FILE)) as f:
+                index = json.load(f)
+
+        # assertions
+        self.assertEqual("ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad", result)
+        self.assertEqual(result, cached_result)
+        mock_sha256.assert_not_called()
+        self.assertEqual("88d4266fd4e6338d13b845fcf289579d209c897823b9217da3e161936f031589", modified_result)
+        self.assertEqual(modified_result, index[os.path.realpath(file_path)]["sha256"])
+
+    def test_get_cached_model_002(self):
+        """
+        Tests the get_cached_model function creates an optimized model
+        once, giving the same outputs as the model.
+        """
+        import onnxruntime
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # perform operation and get result
+            model_path = get_cached_model(ONNX_PATH, cache_path=tmp_dir)
+            mtime = os.stat(model_path).st_mtime_ns
+            second_model_path = get_cached_model(ONNX_PATH, cache_path=tmp_dir)
+
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+            cached_session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+            session = onnxruntime.InferenceSession(ONNX_PATH, providers=['CPUExecutionProvider'])
+            blob = np.random.default_rng(0).random((1, 3, 128, 160), dtype=np.float32)
+            name = session.get_inputs()[0].name
+            cached_outputs = cached_session.run(None, {name: blob})
+            outputs = session.run(None, {name: blob})
+            metadata = cached_session.get_modelmeta().custom_metadata_map
+            del cached_session
+
+            # assertions
+            self.assertEqual(model_path, second_model_path)
+            self.assertEqual(mtime, os.stat(second_model_path).st_mtime_ns)
+            self.assertIn('yolo_layers', metadata)
+            for cached_output, output in zip(cached_outputs, outputs):
+                np.testing.assert_allclose(output, cached_output, rtol=1e-5, atol=1e-5)
+
+    def test_get_cached_model_corrupt_003(self):
+        """
+        Tests cached models that are incomplete or corrupt.
+
+        Case 1: Truncated model created again
+        Case 2: Corrupt model of the same size not loaded, the model
+                loaded instead gives the same detections
+        Case 3: Corrupt model removed so it is created again
+        """
+        img = imread(os.path.join(TEST_SAMPLE_IMAGES_PATH, sorted(os.listdir(TEST_SAMPLE_IMAGES_PATH))[0]))
+
+        def detect(use_cache):
+            inf = OnnxInference(onnx_path=ONNX_PATH, labels_path=LABELS_PATH, network_width=160,
+                                network_height=128, num_threads=1, use_cache=use_cache)
+            inf.load_image(img)
+            detections, _ = inf.run(threshold=0.1)
+            return [(d.x, d.y, d.w, d.h, d.class_id, round(d.confidence, 4)) for d in detections]
+
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                patch('core.inference.get_cached_model', functools.partial(get_cached_model, cache_path=tmp_dir)), \
+                patch('core.inference.remove_cached_model',
+                      functools.partial(remove_cached_model, cache_path=tmp_dir)):
+            model_path = get_cached_model(ONNX_PATH, cache_path=tmp_dir)
+            model_size = os.path.getsize(model_path)
+
+            # perform operation and get result
+            with open(model_path, "r+b") as f:
+                f.truncate(model_size // 2)
+            truncated_rebuilt_size = os.path.getsize(get_cached_model(ONNX_PATH, cache_path=tmp_dir))
+
+            with open(model_path, "wb") as f:
+                f.write(b"\xff" * model_size)
+            with self.assertLogs('core.inference', level='WARNING') as logs:
+                cached_detections = detect(use_cache=True)
+            corrupt_removed = not os.path.exists(os.path.dirname(model_path))
+            detections = detect(use_cache=False)
+            detect(use_cache=True)
+            recreated = os.path.isfile(os.path.join(os.path.dirname(model_path), MANIFEST_FILE))
+
+        # assertions
+        self.assertEqual(model_size, truncated_rebuilt_size)
+        self.assertIn("Failed loading cached model", logs.output[0])
+        self.assertTrue(corrupt_removed)
+        self.assertTrue(recreated)
+        self.assertTrue(len(detections) > 0)
+        self.assertEqual(sorted(detections), sorted(cached_detections))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Unit tests for the onnx_export module.
+"""
+
+# unit test imports
+import unittest
+
+# module imports
+import os
+import sys
+import tempfile
+import numpy as np
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+YOLO_FILES_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "yolo"))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.onnx_export import (parse_cfg,
+                              build_model,
+                              export_onnx,
+                              quantize_model)
+
+
+class TestOnnxExportModule(unittest.TestCase):
+
+    def test_parse_cfg_001(self):
+        """
+        Tests the parse_cfg method.
+        """
+        # perform operation and get result
+        sections = parse_cfg(os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l.cfg'))
+        result = [s['type'] for s in sections].count('yolo')
+
+        # expected result
+        expected_result = 3
+
+        # assertions
+        self.assertEqual('net', sections[0]['type'])
+        self.assertEqual(expected_result, result)
+
+    def test_parse_cfg_002(self):
+        """
+        Tests the parse_cfg method.
+
+        Case 2: File not found.
+        """
+        with self.assertRaises(AssertionError) as context:
+            parse_cfg(os.path.join(YOLO_FILES_PATH, 'FortyTwo.cfg'))
+        self.assertTrue('not found' in str(context.exception))
+
+    def test_build_model_003(self):
+        """
+        Tests the build_model method.
+        """
+        # perform operation and get result
+        model = build_model(
+            cfg_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l.cfg'),
+            weights_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.weights'))
+        result = len(model.graph.output)
+
+        # expected result
+        expected_result = 3
+
+        # assertions
+        self.assertEqual(expected_result, result)
+        self.assertTrue('yolo_layers' in [p.key for p in model.metadata_props])
+
+    def test_build_model_004(self):
+        """
+        Tests the build_model method.
+
+        Case 2: Weights file does not match the cfg file.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            weights_path = os.path.join(tmp_dir, 'empty.weights')
+            with open(weights_path, 'wb') as f:
+                np.array([0, 2, 5], dtype=np.int32).tofile(f)
+                np.array([0], dtype=np.int64).tofile(f)
+                np.zeros(10, dtype=np.float32).tofile(f)
+
+            with self.assertRaises(Exception) as context:
+                build_model(
+                    cfg_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l.cfg'),
+                    weights_path=weights_path)
+            self.assertTrue('too small' in str(context.exception))
+
+    def test_quantize_model_005(self):
+        """
+        Tests the quantize_model method.
+        """
+        import onnx
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            onnx_path = export_onnx(
+                cfg_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l.cfg'),
+                weights_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.weights'),
+                onnx_path=os.path.join(tmp_dir, 'fp32.onnx'))
+
+            # perform operation
+            quantize_model(
+                onnx_path=onnx_path,
+                output_path=os.path.join(tmp_dir, 'int8.onnx'),
+                calibration_blobs=[np.random.rand(1, 3, 128, 160).astype(np.float32) for _ in range(2)])
+
+            # get result
+            model = onnx.load(os.path.join(tmp_dir, 'int8.onnx'))
+
+        # assertions
+        self.assertTrue('QuantizeLinear' in [n.op_type for n in model.graph.node])
+        self.assertTrue('yolo_layers' in [p.key for p in model.metadata_props])
+
+    def test_quantize_model_006(self):
+        """
+        Tests the quantize_model method.
+
+        Case 2: No calibration data.
+        """
+        with self.assertRaises(AssertionError) as context:
+            quantize_model(
+                onnx_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_best.onnx'),
+                output_path=os.path.join(YOLO_FILES_PATH, 'Lightweight', 'tiny_yolo_3l_int8.onnx'),
+                calibration_blobs=[])
+        self.assertTrue('At least one calibration blob is required.' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Unit tests for the stream_server module.
+"""
+
+# unit test imports
+import unittest
+import urllib.request
+import urllib.error
+import threading
+import json
+import sys
+import os
+from PIL import Image
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.stream_server import StreamServer, BOUNDARY
+from core.fever_monitor import Face
+from core.inference import Detection
+from core import metrics
+
+
+class TestStreamServerModule(unittest.TestCase):
+
+    def setUp(self):
+        self.stream_server = StreamServer(host="127.0.0.1", port=0)
+        self.stream_server.start()
+        self.url = "http://{}:{}".format(*self.stream_server.get_address())
+        self.faces = [Face(detection=Detection(x=1, y=2, w=3, h=4, class_id=0, confidence=0.5),
+                           temp=38.5,
+                           img=None,
+                           over_threshold=True)]
+
+    def tearDown(self):
+        self.stream_server.stop()
+
+    def test_StreamServer_frame_001(self):
+        """
+        Tests the /frame.jpg and /detections endpoints.
+
+        Case 1: No frame published
+        Case 2: Frame published
+        """
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(self.url + "/frame.jpg", timeout=5)
+        self.assertEqual(503, context.exception.code)
+
+        # perform operation and get result
+        self.stream_server.publish(Image.new('RGB', (160, 120)), self.faces)
+        jpeg = urllib.request.urlopen(self.url + "/frame.jpg", timeout=5).read()
+        detections = json.loads(urllib.request.urlopen(self.url + "/detections", timeout=5).read())
+
+        # assertions
+        self.assertTrue(jpeg.startswith(b'\xff\xd8'))
+        self.assertEqual(1, detections["frame_id"])
+        self.assertEqual({"x": 1, "y": 2, "w": 3, "h": 4, "confidence": 0.5, "temp": 38.5, "over_threshold": True},
+                         detections["faces"][0])
+
+    def test_StreamServer_stream_002(self):
+        """
+        Tests the /stream.mjpg endpoint sends each new frame.
+        """
+        self.stream_server.publish(Image.new('RGB', (160, 120)), [])
+        response = urllib.request.urlopen(self.url + "/stream.mjpg", timeout=5)
+
+        # read the first part, then publish a second frame and read it
+        parts = []
+        for i in range(2):
+            self.assertEqual("--{}".format(BOUNDARY).encode(), response.readline().strip())
+            headers = {}
+            line = response.readline().strip()
+            while line:
+                key, value = line.decode().split(": ")
+                headers[key] = value
+                line = response.readline().strip()
+            parts.append(response.read(int(headers["Content-Length"])))
+            response.readline()
+            if i == 0:
+                self.stream_server.publish(Image.new('RGB', (160, 120), (255, 0, 0)), [])
+        response.close()
+
+        # assertions
+        self.assertTrue(all(part.startswith(b'\xff\xd8') for part in parts))
+        self.assertNotEqual(parts[0], parts[1])
+
+    def test_StreamServer_get_jpeg_003(self):
+        """
+        Tests the StreamServer.get_jpeg method encodes each frame once
+        for any number of clients.
+        """
+        self.stream_server.publish(Image.new('RGB', (160, 120)), [])
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.stream_server.get_jpeg()))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # assertions
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(jpeg is results[0][1] for _, jpeg in results))
+
+    def test_StreamServer_metrics_004(self):
+        """
+        Tests the /metrics endpoint serves the metrics registered.
+        """
+        metrics.counter("test_stream_server_metrics_004_total", "Test counter.").inc(3)
+
+        # perform operation and get result
+        response = urllib.request.urlopen(self.url + "/metrics", timeout=5)
+        text = response.read().decode()
+
+        # assertions
+        self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("test_stream_server_metrics_004_total 3\n", text)
+        self.assertIn("# TYPE fever_monitor_frames_captured_total counter", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
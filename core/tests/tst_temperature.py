@@ -0,0 +1,101 @@
+"""
+Unit tests for the temperature module.
+"""
+
+# unit test imports
+import unittest
+import sys
+import os
+import numpy as np
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TEST_FILES_PATH = os.path.abspath(os.path.join(THIS_PATH, "files"))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.temperature import estimate_temperatures
+
+
+class TestTemperatureModule(unittest.TestCase):
+    def __init__(self,  *args, **kwargs):
+        super(TestTemperatureModule, self).__init__(*args, **kwargs)
+        self.img = np.loadtxt(os.path.join(TEST_FILES_PATH, 'lepton_grab_face.csv'), delimiter=',').astype(np.uint16)
+        self.boxes = np.array([[10, 10, 20, 30], [50, 40, 1, 1], [100, 60, 40, 50]])
+
+    def test_estimate_temperatures_001(self):
+        """
+        Tests the estimate_temperatures method.
+
+        Case 1: Maximum
+        """
+        # perform operation and get result
+        result = estimate_temperatures(self.img, self.boxes, "Maximum")
+
+        # expected result
+        expected_result = [self.img[y:y + h, x:x + w].max() for x, y, w, h in self.boxes]
+
+        # assertions
+        self.assertTrue(np.allclose(expected_result, result))
+
+    def test_estimate_temperatures_002(self):
+        """
+        Tests the estimate_temperatures method.
+
+        Case 2: Top-k mean
+        """
+        # perform operation and get result
+        result = estimate_temperatures(self.img, self.boxes, "Top-k mean", top_k=10)
+
+        # expected result
+        expected_result = [np.sort(self.img[y:y + h, x:x + w].ravel())[-10:].mean() for x, y, w, h in self.boxes]
+
+        # assertions
+        self.assertTrue(np.allclose(expected_result, result))
+
+    def test_estimate_temperatures_003(self):
+        """
+        Tests the estimate_temperatures method.
+
+        Case 3: Percentile with shrunk boxes
+        """
+        # perform operation and get result
+        result = estimate_temperatures(self.img, self.boxes, "Percentile", shrink=0.5, percentile=90)
+
+        # expected result
+        expected_result = [np.percentile(self.img[y:y + h, x:x + w], 90)
+                           for x, y, w, h in [(15, 17, 10, 15), (50, 40, 1, 1), (110, 72, 20, 25)]]
+
+        # assertions
+        self.assertTrue(np.allclose(expected_result, result))
+
+    def test_estimate_temperatures_004(self):
+        """
+        Tests the estimate_temperatures method.
+
+        Case 4: Hotspot is not above the maximum
+        Case 5: No boxes
+        """
+        # perform operation and get result
+        result = estimate_temperatures(self.img, self.boxes, "Hotspot")
+
+        # assertions
+        self.assertEqual((3,), result.shape)
+        self.assertTrue((result[[0, 2]] <= estimate_temperatures(self.img, self.boxes, "Maximum")[[0, 2]]).all())
+        self.assertEqual((0,), estimate_temperatures(self.img, self.boxes[:0], "Hotspot").shape)
+
+    def test_estimate_temperatures_005(self):
+        """
+        Tests the estimate_temperatures method raises an exception when
+        an invalid estimator is passed.
+        """
+        with self.assertRaises(Exception) as context:
+            estimate_temperatures(self.img, self.boxes, "Mean")
+        self.assertTrue('not recognised' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit tests for the temporal_filter module.
+"""
+
+# unit test imports
+import unittest
+import sys
+import os
+import numpy as np
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", ".."))
+
+# append project path
+sys.path.append(PROJECT_ROOT_PATH)
+
+# project imports
+from core.temporal_filter import (ExponentialFilter,
+                                  MedianFilter,
+                                  create_temporal_filter)
+
+
+class TestTemporalFilterModule(unittest.TestCase):
+
+    def test_ExponentialFilter_apply_001(self):
+        """
+        Tests the ExponentialFilter.apply method.
+        """
+        temporal_filter = ExponentialFilter(alpha=0.5)
+
+        # perform operation and get result
+        first_result = temporal_filter.apply(np.full((2, 2), 30000, dtype=np.uint16)).copy()
+        result = temporal_filter.apply(np.full((2, 2), 30100, dtype=np.uint16))
+
+        # assertions
+        self.assertEqual(np.uint16, result.dtype)
+        self.assertTrue((first_result == 30000).all())
+        self.assertTrue((result == 30050).all())
+
+        # a reset filter starts from the next frame
+        temporal_filter.reset()
+        self.assertTrue((temporal_filter.apply(np.full((2, 2), 30100, dtype=np.uint16)) == 30100).all())
+
+    def test_MedianFilter_apply_002(self):
+        """
+        Tests the MedianFilter.apply method removes a hot pixel in a single frame.
+        """
+        temporal_filter = MedianFilter(num_frames=3)
+        frames = [np.full((2, 2), 30000, dtype=np.uint16) for _ in range(3)]
+        frames[1][0, 0] = 40000
+
+        # perform operation and get result
+        results = [temporal_filter.apply(frame).copy() for frame in frames]
+
+        # assertions
+        self.assertEqual(np.uint16, results[-1].dtype)
+        self.assertTrue((results[-1] == 30000).all())
+
+    def test_MedianFilter_init_003(self):
+        """
+        Tests the MedianFilter.__init__ method raises an exception when
+        the number of frames is even.
+        """
+        with self.assertRaises(AssertionError):
+            MedianFilter(num_frames=4)
+
+    def test_create_temporal_filter_004(self):
+        """
+        Tests the create_temporal_filter method.
+        """
+        # assertions
+        self.assertIsNone(create_temporal_filter("None"))
+        self.assertEqual(ExponentialFilter, type(create_temporal_filter("Exponential")))
+        self.assertEqual(MedianFilter, type(create_temporal_filter("Median")))
+        with self.assertRaises(Exception) as context:
+            create_temporal_filter("Mean")
+        self.assertTrue('not recognised' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
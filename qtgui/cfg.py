@@ -11,6 +11,7 @@ __email__ = "contact@cookjames.uk"
 
 
 import os
+import threading
 import configparser
 
 CONFIGS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -42,3 +43,87 @@ def overwrite_config(config):
             config.write(configfile)
     except Exception as e:
         raise Exception("Failed writing configs: " + str(e))
+
+
+def parse_rois(value):
+    """
+        Parses regions of interest from a config value of
+        the form 'x,y,w,h;x,y,w,h' into a list of tuples.
+        Returns an empty list if the value is empty.
+    """
+    try:
+        return [tuple(int(v) for v in roi.split(',')) for roi in value.split(';') if roi.strip()]
+    except ValueError as e:
+        raise Exception("Failed parsing regions of interest '{}': {}".format(value, e))
+
+
+def to_monitor_config(config):
+    """
+        Returns the fever monitor settings stored in the
+        SETTINGS section of a ConfigParser object as an
+        immutable MonitorConfig snapshot
+    """
+    # imported on first use so reading the config file at start-up
+    # does not import the fever monitor and OpenCV
+    from core.fever_monitor import MonitorConfig
+    from core.image_processing import colormaps
+
+    settings = config["SETTINGS"]
+    return MonitorConfig(
+        temp_threshold=float(settings["temp_thresh"]),
+        temp_unit=settings["temp_unit"],
+        colormap_index=int(colormaps.index(settings["color_map"])),
+        yolo_model=settings["model"],
+        confidence_threshold=float(settings["confidence_thresh"]),
+        use_gpu=bool(int(settings["use_gpu"])),
+        inference_engine=settings.get("engine", "OpenCV"),
+        num_threads=int(settings.get("num_threads", "0")),
+        rois=tuple(parse_rois(settings.get("rois", ""))),
+        ffc_window=float(settings.get("ffc_window", "2.0")),
+        reconnect_timeout=float(settings.get("reconnect_timeout", "30")),
+        temporal_filter=settings.get("temporal_filter", "None"),
+        filter_alpha=float(settings.get("filter_alpha", "0.5")),
+        filter_frames=int(settings.get("filter_frames", "3")),
+        temp_estimator=settings.get("temp_estimator", "Maximum"),
+        face_shrink=float(settings.get("face_shrink", "0.0")),
+        nms_method=settings.get("nms_method", "OpenCV"),
+        nms_threshold=float(settings["nms_threshold"]) if settings.get("nms_threshold", "") else None,
+        nms_top_k=int(settings.get("nms_top_k", "0")),
+        adaptive_resolution=bool(int(settings.get("adaptive_resolution", "0"))),
+        memory_tracking=int(settings.get("memory_tracking", "0")))
+
+
+class ConfigWatcher(threading.Thread):
+    """
+        Thread that reloads the config file when it is
+        modified and passes it to a callback
+    """
+    def __init__(self, callback, error_callback=None, interval=1.0):
+        threading.Thread.__init__(self, name="ConfigWatcher", daemon=True)
+        self._callback = callback
+        self._error_callback = error_callback
+        self._interval = interval
+        self._file_path = os.path.join(CONFIGS_PATH, 'configs.ini')
+        self._stop_event = threading.Event()
+        self._mtime = self._get_mtime()
+
+    def _get_mtime(self):
+        try:
+            return os.stat(self._file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            mtime = self._get_mtime()
+            if mtime is None or mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            try:
+                self._callback(get_configs())
+            except Exception as e:
+                if self._error_callback is not None:
+                    self._error_callback(e)
+
+    def stop(self):
+        self._stop_event.set()
@@ -28,6 +28,9 @@ class Controller:
         logger.debug("Showing main window")
         self.main.show()
 
+        # import the fever monitor while the window is idle
+        preload_modules()
+
     def exit_safely(self):
         """
         Stops execution safely.
@@ -13,20 +13,21 @@ __email__ = "contact@cookjames.uk"
 # external module imports
 from PyQt5.QtGui import QPixmap
 from PIL.ImageQt import ImageQt
-from pygame import mixer
+import threading
+import importlib
 import os
-import time
 
 # project module imports
 from qtgui.gen import MainWindowGenerated
 from qtgui.thread import thread_log, kill_thread
 from qtgui.window import Window
-from qtgui.logger import init_console_logger
-from qtgui.workers.worker1 import Worker1
+from qtgui.logger import init_console_logger, init_signal_logger
+from qtgui.workers.classes import CommunicateLog, CommunicateConfig
 from qtgui.show_dialog import show_message_dialog
-from qtgui.settings_dialog import SettingsDialog
-from qtgui.cfg import overwrite_config
-from core.image_processing import colormaps
+from qtgui.cfg import (overwrite_config,
+                       to_monitor_config,
+                       ConfigWatcher)
+from core.alerts import AlertEngine, CallbackSink, LogSink, FileSink, WebhookSink
 
 # global path variable definitions
 THIS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -35,8 +36,39 @@ SOUNDS_PATH = os.path.abspath(os.path.join(THIS_PATH, "sounds"))
 # initialise the logger
 logger = init_console_logger(name="gui")
 
-# init music mixer
-mixer.init()
+# music mixer, initialised when the first sound is played as
+# importing pygame and opening the audio device is slow
+_mixer = None
+_mixer_lock = threading.Lock()
+
+
+def get_mixer():
+    """
+        Returns the pygame music mixer, initialising it
+        on first use
+    """
+    global _mixer
+    with _mixer_lock:
+        if _mixer is None:
+            from pygame import mixer
+            mixer.init()
+            _mixer = mixer
+        return _mixer
+
+
+def preload_modules():
+    """
+        Imports the fever monitor (NumPy, OpenCV, flirpy...) in
+        a background thread once the window is shown, so it is
+        already imported when the monitor is started
+    """
+    def preload():
+        try:
+            importlib.import_module("core.fever_monitor")
+        except Exception as e:
+            logger.error("Failed preloading modules: {}".format(e))
+
+    threading.Thread(target=preload, name="Preload", daemon=True).start()
 
 
 class MainWindow(Window):
@@ -87,7 +119,23 @@ class MainWindow(Window):
         self._face_label_pointer = 0
 
         self._worker_thread = None
-        self._last_violation = 0
+        self._alert_engine = None
+
+        # log messages from background threads are passed to the GUI thread
+        self._com_log = CommunicateLog()
+        self._com_log.myGUI_signal.connect(self.log_thread_callback)
+        self._thread_logger = init_signal_logger(self._com_log.myGUI_signal)
+
+        # apply changes made to the config file while running,
+        # reloaded configs are passed to the GUI thread
+        self._com_config = CommunicateConfig()
+        self._com_config.myGUI_signal.connect(self.config_file_changed)
+        self._config_watcher = None
+        if bool(int(self.config["SETTINGS"].get("hot_reload", "0"))):
+            self._config_watcher = ConfigWatcher(
+                callback=self._com_config.myGUI_signal.emit,
+                error_callback=lambda e: self._thread_logger.error("Failed to reload configs file: {}".format(e)))
+            self._config_watcher.start()
 
         logger.info("GUI initialised")
 
@@ -126,18 +174,21 @@ class MainWindow(Window):
         # start thread
         logger.debug("Initialising worker thread...")
         try:
+            from qtgui.workers.worker1 import Worker1
+            self.start_alert_engine()
             self._worker_thread = Worker1(
                 logger_callback=self.log_thread_callback,
                 data_callback=self.data_callback,
                 error_callback=self.error_callback,
-                temp_threshold=float(self.config["SETTINGS"]["temp_thresh"]),
-                temp_unit=self.config["SETTINGS"]["temp_unit"],
-                colormap_index=int(colormaps.index(self.config["SETTINGS"]["color_map"])),
-                model_name=self.config["SETTINGS"]["model"],
-                confidence_threshold=float(self.config["SETTINGS"]["confidence_thresh"]),
-                use_gpu=bool(int(self.config["SETTINGS"]["use_gpu"])))
+                config=to_monitor_config(self.config),
+                event_db=self.config["SETTINGS"].get("event_db", ""),
+                event_thumbnails=bool(int(self.config["SETTINGS"].get("event_thumbnails", "0"))),
+                stream_host=self.config["SETTINGS"].get("stream_host", "127.0.0.1"),
+                stream_port=int(self.config["SETTINGS"].get("stream_port", "0")),
+                alert_engine=self._alert_engine)
         except Exception as e:
             logger.error("Failed to initialise worker thread: {}".format(e))
+            self.stop_alert_engine()
             show_message_dialog(text="Error: {}".format(e), dimensions=None)
             return
 
@@ -152,6 +203,7 @@ class MainWindow(Window):
         if self._worker_thread is not None:
             kill_thread(self._worker_thread)
             self._worker_thread = None
+        self.stop_alert_engine()
         self.ui.pushButton_start.setEnabled(True)
         self.ui.pushButton_stop.setEnabled(False)
         self.play_audio('monitor_stopped.mp3')
@@ -183,31 +235,53 @@ class MainWindow(Window):
         self.ui.label_thermal_stream.setPixmap(pixmap)
         self.ui.label_thermal_stream.setMask(pixmap.mask())
 
-        # detect faces over threshold
-        violation = False
+        # display faces over threshold, alerts are raised by the alert engine
         for face in faces:
             if face.over_threshold:
-                violation = True
                 self.display_face(face.img, face.temp)
 
-        if (violation
-                and not mixer.music.get_busy()  # do not interrupt current player
-                and time.time() - self._last_violation > 2):  # prevent excessive repetition
-            self.play_audio('temperature_violation.mp3')
-            self._last_violation = time.time()
-
     def error_callback(self, error):
         logger.error("error_callback: {}".format(str(error)))
         self.play_audio('an_error_occurred_monitor_stopped.mp3')
         show_message_dialog(text="Error: {}".format(error), dimensions=None)
         self._worker_thread = None
+        self.stop_alert_engine()
         self.ui.pushButton_start.setEnabled(True)
         self.ui.pushButton_stop.setEnabled(False)
         self.ui.label_fps.setText(str("%.1f" % 0))
 
+    def start_alert_engine(self):
+        """
+            Starts the alert engine with the alert sinks configured
+        """
+        sinks = [CallbackSink(self.play_alert_audio, name="audio"), LogSink(self._thread_logger)]
+        alert_log = self.config["SETTINGS"].get("alert_log", "")
+        if alert_log:
+            sinks.append(FileSink(alert_log))
+        alert_webhook = self.config["SETTINGS"].get("alert_webhook", "")
+        if alert_webhook:
+            sinks.append(WebhookSink(alert_webhook))
+
+        self._alert_engine = AlertEngine(
+            sinks=sinks,
+            debounce=float(self.config["SETTINGS"].get("alert_debounce", "2.0")),
+            escalate_after=int(self.config["SETTINGS"].get("alert_escalate_after", "3")))
+        self._alert_engine.start()
+
+    def stop_alert_engine(self):
+        if self._alert_engine is not None:
+            self._alert_engine.stop()
+            self._alert_engine = None
+
+    def play_alert_audio(self, alert):
+        # called by the alert engine, do not interrupt current player
+        if not get_mixer().music.get_busy():
+            self.play_audio('temperature_violation.mp3')
+
     def open_settings_dialog(self):
         try:
             # load dialog
+            from qtgui.settings_dialog import SettingsDialog
             dialog = SettingsDialog(self.config)
             # execute dialog
             accepted = dialog.exec_()
@@ -225,13 +299,7 @@ class MainWindow(Window):
             # apply settings to fever monitor if running
             if self._worker_thread is not None:
                 try:
-                    self._worker_thread.change_configuration(
-                        temp_threshold=float(self.config["SETTINGS"]["temp_thresh"]),
-                        temp_unit=self.config["SETTINGS"]["temp_unit"],
-                        colormap_index=int(colormaps.index(self.config["SETTINGS"]["color_map"])),
-                        model_name=self.config["SETTINGS"]["model"],
-                        confidence_threshold=float(self.config["SETTINGS"]["confidence_thresh"]),
-                        use_gpu=bool(int(self.config["SETTINGS"]["use_gpu"])))
+                    self._worker_thread.change_configuration(to_monitor_config(self.config))
                 except Exception as e:
                     logger.error("Failed to set worker thread runtime configuration: {}".format(e))
                     show_message_dialog(text="Error: Failed to change runtime configuration.", dimensions=None)
@@ -239,6 +307,20 @@ class MainWindow(Window):
             # apply gui changes
             self.update_fps_frame_visibility()
 
+    def config_file_changed(self, config):
+        """
+            Applies a config file modified while running
+        """
+        self.config = config
+        if self._worker_thread is not None:
+            try:
+                self._worker_thread.change_configuration(to_monitor_config(config))
+            except Exception as e:
+                logger.error("Failed to apply reloaded configs file: {}".format(e))
+                return
+        self.update_fps_frame_visibility()
+        logger.info("Reloaded configs file.")
+
     def play_audio(self, file_name):
         try:
             sound_enabled = bool(int(self.config['SETTINGS']['sound']))
@@ -248,6 +330,7 @@ class MainWindow(Window):
 
         if sound_enabled:
             try:
+                mixer = get_mixer()
                 mixer.music.load(os.path.abspath(os.path.join(SOUNDS_PATH, file_name)))
             except Exception as e:
                 logger.error("Failed to load audio file: {}".format(e))
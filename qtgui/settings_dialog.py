@@ -16,7 +16,6 @@ from PyQt5.QtWidgets import QDialog
 # project module imports
 from qtgui.gen import SettingsDialogGenerated
 from qtgui.logger import init_console_logger
-from core.image_processing import colormaps
 
 # setup logger
 logger = init_console_logger(name="settings_dialog")
@@ -48,9 +47,10 @@ class SettingsDialog(QDialog):
         """
         Sets possible values for selection widgets.
         """
+        from core.image_processing import colormaps
         self.ui.comboBox_temp_unit.addItems(["Celsius", "Fahrenheit", "Kelvin"])
         self.ui.comboBox_colormap.addItems(colormaps)
-        self.ui.comboBox_model.addItems(["Standard", "Lightweight"])
+        self.ui.comboBox_model.addItems(["Standard", "Lightweight", "Lightweight INT8"])
 
     def load_settings(self):
         """
@@ -26,5 +26,9 @@ class CommunicateData(QtCore.QObject):
     myGUI_signal = QtCore.pyqtSignal([Image, float, list])
 
 
+class CommunicateConfig(QtCore.QObject):
+    myGUI_signal = QtCore.pyqtSignal([object])
+
+
 if __name__ == "__main__":
     print("Module test not implemented")
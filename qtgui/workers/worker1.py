@@ -19,6 +19,8 @@ from qtgui.workers.classes import (CommunicateLog,
 
 # module imports
 from core.fever_monitor import FeverMonitor
+from core.event_store import EventStore
+from core.stream_server import StreamServer
 from qtgui.logger import init_signal_logger
 
 
@@ -30,12 +32,12 @@ class Worker1(threading.Thread):
                  logger_callback,
                  data_callback,
                  error_callback,
-                 temp_threshold,
-                 temp_unit,
-                 colormap_index,
-                 model_name,
-                 confidence_threshold,
-                 use_gpu=False):
+                 config,
+                 event_db="",
+                 event_thumbnails=False,
+                 stream_host="127.0.0.1",
+                 stream_port=0,
+                 alert_engine=None):
 
         threading.Thread.__init__(self)
 
@@ -54,23 +56,34 @@ class Worker1(threading.Thread):
         self._com_error = CommunicateFatalError()
         self._com_error.myGUI_signal.connect(error_callback)
 
-        # construct fever model object
+        # open the event store if results are recorded
+        self._event_store = None
+        if event_db:
+            self._log.debug("Opening event store '{}'".format(event_db))
+            self._event_store = EventStore(db_path=event_db, save_thumbnails=event_thumbnails)
+
+        # start the stream server if results are streamed
+        self._stream_server = None
+        if stream_port:
+            self._stream_server = StreamServer(host=stream_host, port=stream_port)
+            self._stream_server.start()
+            self._log.info("Streaming to http://{}:{}/".format(*self._stream_server.get_address()))
+
+        # alerts are raised by an engine running in its own thread
+        self._alert_engine = alert_engine
+
+        # construct fever model object, face images over the
+        # threshold are created in this thread rather than the GUI,
+        # models changed while running are loaded in the background
         self._fever_monitor = FeverMonitor(
-            temp_threshold=temp_threshold,
-            temp_unit=temp_unit,
-            colormap_index=colormap_index,
-            yolo_model=model_name,
-            confidence_threshold=confidence_threshold,
-            use_gpu=use_gpu)
-
-        # initialise variables
-        self._temp_threshold = temp_threshold
-        self._temp_unit = temp_unit
-        self._colormap_index = colormap_index
-        self._model_name = model_name
-        self._confidence_threshold = confidence_threshold
-        self._use_gpu = use_gpu
-        self._configuration_changed = False
+            eager_face_images=True,
+            background_model_load=True,
+            event_store=self._event_store,
+            **config._asdict())
+
+        # latest settings snapshot, replaced as a whole so it can
+        # be swapped from the GUI thread without a lock
+        self._config = config
 
     def run(self):
         """
@@ -84,24 +97,37 @@ class Worker1(threading.Thread):
 
             fps = 0
             smoothing = 0.9
+            applied_config = self._config
 
             while True:
 
-                # apply new settings if set
-                if self._configuration_changed:
-                    self._configuration_changed = False
-                    self._fever_monitor.set_temp_threshold(temp=self._temp_threshold)
-                    self._fever_monitor.set_temp_unit(self._temp_unit)
-                    self._fever_monitor.set_colormap_index(index=self._colormap_index)
-                    self._fever_monitor.set_yolo_model(model=self._model_name)
-                    self._fever_monitor.set_confidence_threshold(threshold=self._confidence_threshold)
-                    self._fever_monitor.set_gpu(use=self._use_gpu)
+                # apply new settings if set, only reloading what changed
+                config = self._config
+                if config is not applied_config:
+                    applied_config = config
+                    try:
+                        changed = self._fever_monitor.apply_config(config)
+                        if changed:
+                            self._log.info("Applied settings: {}".format(", ".join(sorted(changed))))
+                    except Exception as e:
+                        # keep monitoring with the settings that could be applied
+                        self._log.error("Failed applying settings: {}".format(e))
 
                 # run
                 start = time.time()
                 image, faces = self._fever_monitor.run()
                 elapsed_time = time.time() - start
 
+                # the previous model is kept if a new model fails to load
+                model_load_error = self._fever_monitor.pop_model_load_error()
+                if model_load_error is not None:
+                    self._log.error(model_load_error)
+
+                # allocation sites that grew, if memory is tracked
+                memory_report = self._fever_monitor.pop_memory_report()
+                if memory_report is not None:
+                    self._log.info(str(memory_report))
+
                 # calculate fps
                 last_fps = fps
                 fps = 1 / elapsed_time
@@ -111,32 +137,35 @@ class Worker1(threading.Thread):
 
                 # return data
                 self._com_data.myGUI_signal.emit(image, fps, faces)
+                if self._stream_server is not None:
+                    self._stream_server.publish(image, faces)
+                if self._alert_engine is not None:
+                    self._alert_engine.submit(faces, temp_unit=self._fever_monitor.get_config().temp_unit)
 
         except Exception as e:
             # fatal error occurred and thread stopped
             self._com_error.myGUI_signal.emit(e)
 
-    def change_configuration(self,
-                             temp_threshold,
-                             temp_unit,
-                             colormap_index,
-                             model_name,
-                             confidence_threshold,
-                             use_gpu=False):
+        finally:
+            if self._stream_server is not None:
+                self._stream_server.stop()
+
+            # write any results queued
+            if self._event_store is not None:
+                try:
+                    self._event_store.close()
+                except Exception as e:
+                    self._log.error("Failed closing event store: {}".format(e))
+
+    def change_configuration(self, config):
         """
-        Sets up configuration changed to be applied to
-        the FeverMonitor object.
+        Sets a settings snapshot to be applied to the
+        FeverMonitor object before the next frame.
+
+        Params:
+            config: [MonitorConfig] settings snapshot
         """
-        # set configurations
-        self._temp_threshold = temp_threshold
-        self._temp_unit = temp_unit
-        self._colormap_index = colormap_index
-        self._model_name = model_name
-        self._confidence_threshold = confidence_threshold
-        self._use_gpu = use_gpu
-
-        # prompt the changes to be applied
-        self._configuration_changed = True
+        self._config = config
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+# --------------------- #
+#    Batch Processing   #
+# --------------------- #
+"""
+Re-screens recorded Lepton frames offline.
+
+Runs face detection and measurement on every frame of a
+recording through a pool of worker processes, each with its
+own model, as fast as the frames can be processed (no frame
+pacing and no images rendered). The faces detected are
+written to a columnar '.npz' file with one array per column:
+    frame, x, y, w, h, class_id, confidence, temp,
+    over_threshold      one row per face
+    frame_names, face_counts
+                        one row per frame
+
+A recording is a directory of raw frame files ('.npy' or
+'.csv', processed in name order, see core.lepton.load_frame)
+or a '.npy' file of frames stacked with shape [N, H, W].
+
+Frames are split into chunks of consecutive frames. The
+temporal filter, if used, is reset at the start of each
+chunk. Recorded frames have no telemetry data, so frames
+captured during flat-field corrections are not skipped.
+"""
+import multiprocessing
+import argparse
+import time
+import os
+
+import numpy as np
+import cv2
+
+from core.fever_monitor import FeverMonitor, faces_to_array, inference_engines, temp_units
+from core.temperature import temperature_estimators
+from core.temporal_filter import temporal_filters
+from core.inference import DETECTION_DTYPE, nms_methods
+from core.lepton import load_frame
+
+# fever monitor of each worker process
+_fever_monitor = None
+
+
+def list_frames(recording):
+    """
+    Returns the frames of a recording as (name, source, index)
+    tuples, where index is the frame index of a stacked file.
+    """
+    if os.path.isdir(recording):
+        names = sorted(f for f in os.listdir(recording) if os.path.splitext(f)[1].lower() in ('.npy', '.csv'))
+        return [(name, os.path.join(recording, name), None) for name in names]
+    num_frames = np.load(recording, mmap_mode='r').shape[0]
+    name = os.path.basename(recording)
+    return [("{}[{}]".format(name, i), recording, i) for i in range(num_frames)]
+
+
+def init_worker(settings):
+    """
+    Creates the fever monitor of a worker process.
+    """
+    global _fever_monitor
+    # each worker runs a single inference thread so workers do not compete
+    cv2.setNumThreads(1)
+    _fever_monitor = FeverMonitor(use_camera=False, num_threads=1, **settings)
+
+
+def process_chunk(chunk):
+    """
+    Processes a chunk of consecutive frames.
+
+    Returns:
+        [np.ndarray] frame index of each face
+        [np.ndarray] faces detected as a DETECTION_DTYPE array
+        [np.ndarray] over threshold flag of each face
+        [np.ndarray] number of faces in each frame
+    """
+    first_frame, frames = chunk
+    _fever_monitor.reset_temporal_filter()
+
+    stacks = {}
+    frame_ids, arrays, over_threshold, face_counts = [], [], [], []
+    for frame_id, (_, source, index) in enumerate(frames, first_frame):
+        if index is None:
+            img = load_frame(source)
+        else:
+            if source not in stacks:
+                stacks[source] = np.load(source, mmap_mode='r')
+            img = np.asarray(stacks[source][index])
+
+        _, faces = _fever_monitor.process_frame(img, render=False)
+        arrays.append(faces_to_array(faces))
+        over_threshold.extend(f.over_threshold for f in faces)
+        frame_ids.extend([frame_id] * len(faces))
+        face_counts.append(len(faces))
+
+    return (np.array(frame_ids, dtype=np.int64),
+            np.concatenate(arrays) if arrays else np.empty(0, dtype=DETECTION_DTYPE),
+            np.array(over_threshold, dtype=bool),
+            np.array(face_counts, dtype=np.int32))
+
+
+def batch_process(frames, settings, num_workers, chunk_size):
+    """
+    Processes frames with a pool of workers.
+
+    Returns:
+        [dict] output columns
+        [float] seconds taken
+    """
+    chunks = [(i, frames[i:i + chunk_size]) for i in range(0, len(frames), chunk_size)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(num_workers, initializer=init_worker, initargs=(settings,)) as pool:
+        results = list(pool.imap(process_chunk, chunks))
+    elapsed = time.perf_counter() - start
+
+    frame_ids, arrays, over_threshold, face_counts = zip(*results) if results else ([], [], [], [])
+    faces = np.concatenate(arrays) if arrays else np.empty(0, dtype=DETECTION_DTYPE)
+    columns = {"frame": np.concatenate(frame_ids) if frame_ids else np.empty(0, dtype=np.int64)}
+    columns.update({field: faces[field] for field in DETECTION_DTYPE.names})
+    columns["over_threshold"] = np.concatenate(over_threshold) if over_threshold else np.empty(0, dtype=bool)
+    columns["frame_names"] = np.array([name for name, _, _ in frames])
+    columns["face_counts"] = np.concatenate(face_counts) if face_counts else np.empty(0, dtype=np.int32)
+    return columns, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect and measure faces in recorded Lepton frames.")
+    parser.add_argument("recording", help="directory of frame files or a '.npy' file of stacked frames")
+    parser.add_argument("output", help="'.npz' file the results are written to")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--engine", default="OpenCV", choices=inference_engines)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--temp-threshold", type=float, default=38.0)
+    parser.add_argument("--temp-unit", default="Celsius", choices=temp_units)
+    parser.add_argument("--estimator", default="Maximum", choices=temperature_estimators)
+    parser.add_argument("--face-shrink", type=float, default=0.0)
+    parser.add_argument("--temporal-filter", default="None", choices=temporal_filters)
+    parser.add_argument("--filter-alpha", type=float, default=0.5)
+    parser.add_argument("--filter-frames", type=int, default=3)
+    parser.add_argument("--nms", default="OpenCV", choices=nms_methods)
+    parser.add_argument("--nms-threshold", type=float, default=None,
+                        help="IoU threshold of the non-maxima suppression (defaults to the confidence threshold)")
+    parser.add_argument("--nms-top-k", type=int, default=0)
+    parser.add_argument("--adaptive-resolution", action="store_true",
+                        help="infer at a reduced network size when faces are large enough")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    frames = list_frames(args.recording)
+    settings = {
+        "yolo_model": args.model,
+        "inference_engine": args.engine,
+        "confidence_threshold": args.confidence,
+        "temp_threshold": args.temp_threshold,
+        "temp_unit": args.temp_unit,
+        "temp_estimator": args.estimator,
+        "face_shrink": args.face_shrink,
+        "temporal_filter": args.temporal_filter,
+        "filter_alpha": args.filter_alpha,
+        "filter_frames": args.filter_frames,
+        "nms_method": args.nms,
+        "nms_threshold": args.nms_threshold,
+        "nms_top_k": args.nms_top_k,
+        "adaptive_resolution": args.adaptive_resolution}
+
+    columns, elapsed = batch_process(frames, settings, args.workers, args.chunk_size)
+    np.savez(args.output, **columns)
+
+    print("Processed {} frames ({} faces) in {:.2f} s with {} workers: {:.1f} frames/s".format(
+        len(frames), len(columns["frame"]), elapsed, args.workers, len(frames) / elapsed if elapsed else 0.0))
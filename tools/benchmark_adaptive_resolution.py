@@ -0,0 +1,84 @@
+# ------------------------------- #
+#   Benchmark Adaptive Resolution #
+# ------------------------------- #
+"""
+Compares inference at the full network size with the adaptive
+resolution mode (see FeverMonitor.set_adaptive_resolution).
+
+Processes the frames of a recording (a directory of raw Lepton
+frames or a stacked '.npy' file, as tools.batch_process) with
+each inference engine, first at the full network size and then
+with the adaptive resolution mode. Prints the mean time taken
+per frame, the number of network passes at each size with the
+mean time taken by the network, the number of frames run again
+at full size and the number of faces found. Uses the frame used
+by the unit tests if no recording is given.
+"""
+import argparse
+import time
+import os
+
+import numpy as np
+
+from core.fever_monitor import FeverMonitor, inference_engines
+from core.lepton import load_frame
+from tools.batch_process import list_frames
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, ".."))
+TEST_FRAME_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "core", "tests", "files", "lepton_grab_face.csv"))
+
+
+def load_frames(recording):
+    """
+    Returns the frames of a recording.
+    """
+    frames = []
+    for _, source, index in list_frames(recording):
+        frames.append(load_frame(source) if index is None else np.load(source, mmap_mode='r')[index])
+    return frames
+
+
+def run_frames(fever_monitor, frames):
+    """
+    Processes the frames and returns the mean time taken per frame
+    in seconds and the number of faces found.
+    """
+    # the first frame sets the network up
+    fever_monitor.process_frame(frames[0], render=False)
+    fever_monitor.reset_resolution_stats()
+
+    faces = 0
+    start = time.perf_counter()
+    for frame in frames:
+        faces += len(fever_monitor.process_frame(frame, render=False)[1])
+    return (time.perf_counter() - start) / len(frames), faces
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full size and adaptive resolution inference.")
+    parser.add_argument("recording", nargs="?", default=None,
+                        help="directory of raw Lepton frames or a stacked '.npy' file")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--engines", nargs="*", default=inference_engines)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=50,
+                        help="number of times the test frame is processed if no recording is given")
+    args = parser.parse_args()
+
+    frames = load_frames(args.recording) if args.recording else [load_frame(TEST_FRAME_PATH)] * args.repeats
+
+    print("{:<14} {:<10} {:>12} {:>8} {:>6}  {}".format(
+        "Engine", "Mode", "Per frame", "Reruns", "Faces", "Passes (mean forward time)"))
+    for engine in args.engines:
+        for adaptive in (False, True):
+            fever_monitor = FeverMonitor(yolo_model=args.model, inference_engine=engine,
+                                         confidence_threshold=args.confidence,
+                                         adaptive_resolution=adaptive, use_camera=False)
+            frame_time, faces = run_frames(fever_monitor, frames)
+            stats = fever_monitor.get_resolution_stats()
+            print("{:<14} {:<10} {:>9.1f} ms {:>8} {:>6}  {}".format(
+                engine, "Adaptive" if adaptive else "Full", frame_time * 1e3, stats["reruns"], faces,
+                ", ".join("{}: {} ({:.1f} ms)".format(r, n, stats["mean_forward_seconds"][r] * 1e3)
+                          for r, n in sorted(stats["passes"].items()))))
@@ -0,0 +1,70 @@
+# ----------------------- #
+#  Benchmark Estimators   #
+# ----------------------- #
+"""
+Reports the time taken by each face temperature estimator.
+
+Measures a number of face boxes in the frame used by the unit
+tests with each estimator of core.temperature, and prints the
+mean time per frame alongside the time taken by measuring the
+maximum of each face with a Python loop, as FeverMonitor.run
+did before the estimators were added.
+"""
+import argparse
+import time
+import os
+
+import numpy as np
+
+from core.temperature import estimate_temperatures, temperature_estimators
+from core.lepton import load_frame
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TEST_FRAME_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", "core", "tests", "files", "lepton_grab_face.csv"))
+
+
+def random_boxes(num_faces, width, height, seed=0):
+    """
+    Returns random face boxes within the bounds of a frame.
+    """
+    rng = np.random.default_rng(seed)
+    w = rng.integers(8, 40, num_faces)
+    h = rng.integers(10, 50, num_faces)
+    x = rng.integers(0, width - w)
+    y = rng.integers(0, height - h)
+    return np.stack([x, y, w, h], axis=1)
+
+
+def time_per_frame(function, repeats):
+    """
+    Returns the mean time taken by a function in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the face temperature estimators.")
+    parser.add_argument("--faces", type=int, nargs="*", default=[1, 5, 20])
+    parser.add_argument("--shrink", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+
+    img = load_frame(TEST_FRAME_PATH).astype(np.uint16)
+    height, width = img.shape
+
+    print("{:<12} {}".format("Estimator", " ".join("{:>10}".format("{} faces".format(n)) for n in args.faces)))
+    rows = {"Loop max": [], **{estimator: [] for estimator in temperature_estimators}}
+    for num_faces in args.faces:
+        boxes = random_boxes(num_faces, width, height)
+        rows["Loop max"].append(time_per_frame(
+            lambda: [np.amax(img[y:y + h, x:x + w]) for x, y, w, h in boxes], args.repeats))
+        for estimator in temperature_estimators:
+            rows[estimator].append(time_per_frame(
+                lambda: estimate_temperatures(img, boxes, estimator, shrink=args.shrink), args.repeats))
+
+    for name, times in rows.items():
+        print("{:<12} {}".format(name, " ".join("{:>7.1f} us".format(t * 1e6) for t in times)))
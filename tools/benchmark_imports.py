@@ -0,0 +1,117 @@
+# --------------------- #
+#   Benchmark Imports   #
+# --------------------- #
+"""
+Reports where start-up time is spent importing modules.
+
+Runs each entry module in a new Python process with
+'-X importtime' and prints the median time taken to import it,
+with the packages that took the longest (the time spent in each
+package's own modules, summed). Then prints:
+    time to window       starting the GUI until the main window
+                         is shown (needs PyQt5, the Qt platform
+                         can be set with QT_QPA_PLATFORM)
+    time to first frame  starting a new process until the first
+                         frame is processed without a camera
+                         (see tools.benchmark_startup)
+"""
+import importlib.util
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+import numpy as np
+
+from tools.benchmark_startup import time_startup
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, ".."))
+
+# modules imported by the GUI, the monitor and the tools
+ENTRY_MODULES = ["core.fever_monitor", "core.alerts", "core.event_store", "core.stream_server"]
+GUI_ENTRY_MODULES = ["qtgui.controller"]
+
+# code run to time the GUI start-up, as start_gui.py
+WINDOW_CODE = """
+import time
+start = time.perf_counter()
+import json, sys
+from PyQt5.QtWidgets import QApplication
+from qtgui.controller import Controller
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+controller = Controller()
+controller.show_main()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({"import": imported - start, "window": shown - start}))
+"""
+
+
+def time_imports(module):
+    """
+    Returns the time taken to import a module and the time spent
+    in the modules of each package it imports, in seconds.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=PROJECT_ROOT_PATH, check=True, capture_output=True, text=True).stderr
+
+    total, packages = 0.0, {}
+    for line in output.splitlines():
+        # import time: <self us> | <cumulative us> | <module, indented by depth>
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2]
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_us * 1e-6
+        if name.strip() == module and len(name) - len(name.lstrip()) == 1:
+            total = cumulative_us * 1e-6
+    return total, packages
+
+
+def time_window():
+    """
+    Returns the time taken to import the GUI and to show the
+    main window in seconds.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", WINDOW_CODE],
+        cwd=PROJECT_ROOT_PATH, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time module imports and the start-up of the fever monitor.")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--engine", default="OpenCV")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="number of packages listed for each module")
+    args = parser.parse_args()
+
+    has_gui = importlib.util.find_spec("PyQt5") is not None
+    modules = ENTRY_MODULES + (GUI_ENTRY_MODULES if has_gui else [])
+
+    for module in modules:
+        runs = [time_imports(module) for _ in range(args.repeats)]
+        print("import {}: {:.0f} ms".format(module, np.median([total for total, _ in runs]) * 1e3))
+        packages = {p: np.median([r[1].get(p, 0.0) for r in runs]) for p in runs[0][1]}
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print("    {:<24} {:>7.1f} ms".format(package, seconds * 1e3))
+
+    if has_gui:
+        runs = [time_window() for _ in range(args.repeats)]
+        print("Time to window: {:.0f} ms (imports {:.0f} ms)".format(
+            np.median([r["window"] for r in runs]) * 1e3, np.median([r["import"] for r in runs]) * 1e3))
+    else:
+        print("Time to window: not measured (PyQt5 is not installed)")
+
+    runs = [time_startup(args.model, args.engine, False) for _ in range(args.repeats)]
+    print("Time to first frame: {:.0f} ms (imports {:.0f} ms, {} engine)".format(
+        np.median([r["total"] for r in runs]) * 1e3, np.median([r["import"] for r in runs]) * 1e3, args.engine))
@@ -0,0 +1,87 @@
+# --------------------- #
+#  Benchmark Inference  #
+# --------------------- #
+"""
+Compares the throughput of the inference engines.
+
+Runs each YOLO model with each inference engine over the
+sample images used by the unit tests and prints the mean
+and 95th percentile inference times and the frames per
+second achieved.
+"""
+import argparse
+import time
+import os
+
+import numpy as np
+from cv2 import imread
+
+from core.fever_monitor import get_model_file_path, YOLO_FILES_PATH, inference_engines
+from core.inference import YoloInference, OnnxInference
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+SAMPLE_IMAGES_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", "core", "tests", "files", "samples"))
+
+
+def create_inference(model, engine, num_threads):
+    """
+    Creates an inference object for a model and engine.
+    """
+    labels_path = os.path.join(YOLO_FILES_PATH, "obj.names")
+    if engine == "ONNX Runtime":
+        inf = OnnxInference(
+            onnx_path=get_model_file_path(model, "onnx"),
+            labels_path=labels_path,
+            num_threads=num_threads)
+    else:
+        inf = YoloInference(
+            weights_path=get_model_file_path(model, "weights"),
+            cfg_path=get_model_file_path(model, "cfg"),
+            labels_path=labels_path)
+    inf.set_network_dimensions(160, 128)
+    return inf
+
+
+def benchmark(inf, images, repeats, threshold):
+    """
+    Returns the time taken to run each inference in seconds.
+    """
+    # warm up
+    inf.load_image(images[0])
+    inf.run(threshold=threshold)
+
+    times = []
+    for _ in range(repeats):
+        for img in images:
+            start = time.perf_counter()
+            inf.load_image(img)
+            inf.run(threshold=threshold)
+            times.append(time.perf_counter() - start)
+    return np.array(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare inference engine throughput.")
+    parser.add_argument("--models", nargs="*", default=["Standard", "Lightweight"])
+    parser.add_argument("--engines", nargs="*", default=inference_engines)
+    parser.add_argument("--threads", type=int, default=0,
+                        help="ONNX Runtime thread count (0 lets ONNX Runtime decide)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    images = [imread(os.path.join(SAMPLE_IMAGES_PATH, f))
+              for f in sorted(os.listdir(SAMPLE_IMAGES_PATH)) if '.jpg' in f]
+
+    print("{:<12} {:<14} {:>10} {:>10} {:>8}".format("Model", "Engine", "Mean (ms)", "P95 (ms)", "FPS"))
+    for model in args.models:
+        for engine in args.engines:
+            try:
+                inf = create_inference(model, engine, args.threads)
+            except Exception as e:
+                print("{:<12} {:<14} skipped: {}".format(model, engine, e))
+                continue
+            times = benchmark(inf, images, args.repeats, args.threshold)
+            print("{:<12} {:<14} {:>10.2f} {:>10.2f} {:>8.1f}".format(
+                model, engine, times.mean() * 1000, np.percentile(times, 95) * 1000, 1 / times.mean()))
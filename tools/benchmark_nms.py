@@ -0,0 +1,116 @@
+# --------------------- #
+#     Benchmark NMS     #
+# --------------------- #
+"""
+Compares the non-maxima suppression methods.
+
+Times the post-processing of YoloInference.run (filtering the
+decoded candidate boxes by confidence, converting them to image
+coordinates and suppressing overlapping boxes) for increasing
+numbers of candidate boxes over the confidence threshold:
+    Loop + OpenCV   the previous implementation, a Python loop
+                    per candidate then cv2.dnn.NMSBoxes on lists
+    OpenCV          decoded as arrays, cv2.dnn.NMSBoxes
+    Vectorized      decoded as arrays, core.boxes.non_max_suppression
+    Vectorized top-k
+                    as Vectorized, only the top-k boxes considered
+
+Candidates are generated around random face positions, as the
+network produces many overlapping boxes per face at low
+confidence thresholds. Prints the median time of each method
+and whether OpenCV and Vectorized kept the same boxes.
+"""
+import argparse
+import time
+
+import numpy as np
+import cv2
+
+from core.inference import suppress_boxes
+
+# image size the boxes are scaled to
+IMG_WIDTH, IMG_HEIGHT = 160, 120
+
+
+def generate_candidates(num_candidates, rng, threshold):
+    """
+    Returns decoded YOLO output rows (centre x, centre y, width,
+    height, objectness, class score) over the threshold.
+    """
+    faces = rng.uniform(0.1, 0.9, size=(max(1, num_candidates // 50), 4)) * [1, 1, 0.3, 0.4]
+    rows = faces[rng.integers(0, len(faces), num_candidates)] + rng.normal(0, 0.02, size=(num_candidates, 4))
+    scores = rng.uniform(threshold + 1e-3, 1.0, size=(num_candidates, 1))
+    return np.hstack([np.abs(rows), scores, scores]).astype(np.float32)
+
+
+def loop_postprocess(output, threshold):
+    """
+    Previous YoloInference.run post-processing, kept for comparison.
+    """
+    boxes, confidences, class_ids = [], [], []
+    for detection in output:
+        scores = detection[5:]
+        class_id = np.argmax(scores)
+        confidence = scores[class_id]
+        if confidence > threshold:
+            box = detection[0:4] * np.array([IMG_WIDTH, IMG_HEIGHT, IMG_WIDTH, IMG_HEIGHT])
+            (center_x, center_y, width, height) = box.astype("int")
+            boxes.append([int(center_x - (width / 2)), int(center_y - (height / 2)), int(width), int(height)])
+            confidences.append(float(confidence))
+            class_ids.append(class_id)
+    return np.array(cv2.dnn.NMSBoxes(boxes, confidences, threshold, threshold)).reshape(-1)
+
+
+def array_postprocess(output, threshold, method, top_k=0):
+    """
+    YoloInference.run post-processing.
+    """
+    scores = output[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+    mask = confidences > threshold
+    box = (output[mask, 0:4] * np.array([IMG_WIDTH, IMG_HEIGHT, IMG_WIDTH, IMG_HEIGHT])).astype("int")
+    boxes = np.stack([(box[:, 0] - box[:, 2] / 2).astype(int), (box[:, 1] - box[:, 3] / 2).astype(int),
+                      box[:, 2], box[:, 3]], axis=1)
+    return suppress_boxes(boxes, confidences[mask], class_ids[mask], threshold, method=method, top_k=top_k)
+
+
+def median_time(function, repeats):
+    """
+    Returns the result of a function and the median time taken
+    to run it in seconds.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, np.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the non-maxima suppression methods.")
+    parser.add_argument("--counts", nargs="*", type=int, default=[30, 100, 300, 1000, 3000, 10000],
+                        help="numbers of candidate boxes over the confidence threshold")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    methods = ["Loop + OpenCV", "OpenCV", "Vectorized", "Vectorized top-{}".format(args.top_k)]
+    print("{:>10} {} {:>6} {:>6}".format("Candidates", " ".join("{:>18}".format(m) for m in methods), "Kept", "Same"))
+    for count in args.counts:
+        output = generate_candidates(count, rng, args.threshold)
+        loop_kept, loop_time = median_time(lambda: loop_postprocess(output, args.threshold), args.repeats)
+        opencv_kept, opencv_time = median_time(
+            lambda: array_postprocess(output, args.threshold, "OpenCV"), args.repeats)
+        vectorized_kept, vectorized_time = median_time(
+            lambda: array_postprocess(output, args.threshold, "Vectorized"), args.repeats)
+        _, top_k_time = median_time(
+            lambda: array_postprocess(output, args.threshold, "Vectorized", args.top_k), args.repeats)
+        print("{:>10} {} {:>6} {:>6}".format(
+            count,
+            " ".join("{:>15.3f} ms".format(t * 1e3) for t in (loop_time, opencv_time, vectorized_time, top_k_time)),
+            len(opencv_kept),
+            "yes" if np.array_equal(loop_kept, opencv_kept) and np.array_equal(opencv_kept, vectorized_kept) else "no"))
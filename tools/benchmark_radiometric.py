@@ -0,0 +1,106 @@
+# ----------------------- #
+#  Benchmark Radiometric  #
+# ----------------------- #
+"""
+Compares the float32 and native uint16 radiometric paths.
+
+Runs the per-frame steps of FeverMonitor.run that touch the
+raw Lepton frame (conversion, rescaling and colormapping for
+inference and display, and the maximum temperature of each
+face) using both paths, and prints the mean and 95th
+percentile latency and the peak memory allocated per frame.
+
+Frames are loaded from a directory of raw Lepton frames
+('.npy'/'.csv') if one is passed, otherwise the frame used by
+the unit tests is used.
+"""
+import argparse
+import tracemalloc
+import time
+import os
+
+import numpy as np
+
+from core.fever_monitor import INFERENCE_COLORMAP_INDEX
+from core.image_processing import to_color_img_array
+from core.lepton import load_frame, to_celsius
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TEST_FRAME_PATH = os.path.abspath(os.path.join(THIS_PATH, "..", "core", "tests", "files", "lepton_grab_face.csv"))
+
+# face boxes measured in each frame
+FACE_BOXES = [(x, y, 24, 32) for x in range(0, 160 - 24, 34) for y in range(0, 120 - 32, 44)]
+
+
+def float_path(raw, colormap_index):
+    """
+    Processes a frame by converting it to float32 first.
+    """
+    img = raw.astype(np.float32)
+    inf_img = to_color_img_array(arr=img, colormap_index=INFERENCE_COLORMAP_INDEX)
+    color_img = to_color_img_array(arr=img, colormap_index=colormap_index)
+    temps = [to_celsius(img[y:y + h, x:x + w].max()) for x, y, w, h in FACE_BOXES]
+    return inf_img, color_img, temps
+
+
+def uint16_path(raw, colormap_index):
+    """
+    Processes a frame as uint16, only converting the face temperatures.
+    """
+    inf_img = to_color_img_array(arr=raw, colormap_index=INFERENCE_COLORMAP_INDEX)
+    color_img = to_color_img_array(arr=raw, colormap_index=colormap_index)
+    temps = [to_celsius(raw[y:y + h, x:x + w].max()) for x, y, w, h in FACE_BOXES]
+    return inf_img, color_img, temps
+
+
+def benchmark(path, frames, repeats, colormap_index):
+    """
+    Returns the time taken for each frame in seconds and the
+    peak memory allocated for a frame in bytes.
+    """
+    times = []
+    for _ in range(repeats):
+        for raw in frames:
+            start = time.perf_counter()
+            path(raw, colormap_index)
+            times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    peak = 0
+    for raw in frames:
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        path(raw, colormap_index)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start_size)
+    tracemalloc.stop()
+    return np.array(times), peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the float32 and uint16 radiometric paths.")
+    parser.add_argument("frames", nargs="?", default=None, help="directory of raw Lepton frames")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--colormap", type=int, default=1, help="display colormap index")
+    args = parser.parse_args()
+
+    if args.frames is None:
+        frame_paths = [TEST_FRAME_PATH]
+    else:
+        frame_paths = [os.path.join(args.frames, f) for f in sorted(os.listdir(args.frames))
+                       if os.path.splitext(f)[1].lower() in ('.npy', '.csv')]
+    frames = [load_frame(p).astype(np.uint16) for p in frame_paths]
+
+    # both paths must give the same results
+    for raw in frames:
+        for a, b in zip(float_path(raw, args.colormap), uint16_path(raw, args.colormap)):
+            assert np.array_equal(a, b), "The float32 and uint16 paths gave different results."
+
+    print("{:<8} {:>10} {:>10} {:>12}".format("Path", "Mean (us)", "P95 (us)", "Peak (KiB)"))
+    results = {}
+    for name, path in (("float32", float_path), ("uint16", uint16_path)):
+        times, peak = benchmark(path, frames, args.repeats, args.colormap)
+        results[name] = times
+        print("{:<8} {:>10.1f} {:>10.1f} {:>12.1f}".format(
+            name, times.mean() * 1e6, np.percentile(times, 95) * 1e6, peak / 1024))
+    print("uint16 speed-up: {:.2f}x".format(results["float32"].mean() / results["uint16"].mean()))
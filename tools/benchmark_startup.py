@@ -0,0 +1,76 @@
+# --------------------- #
+#   Benchmark Startup   #
+# --------------------- #
+"""
+Reports the cold-start time of the fever monitor.
+
+Starts a new Python process for each run, which imports the
+fever monitor, loads a model and processes the frame used by
+the unit tests into an annotated image, as the GUI does for
+its first frame (without a camera). Prints the median time
+taken by each step for each inference engine, with and
+without the model cache (see core.model_cache).
+"""
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+import numpy as np
+
+# global path variable definitions
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT_PATH = os.path.abspath(os.path.join(THIS_PATH, ".."))
+TEST_FRAME_PATH = os.path.abspath(os.path.join(PROJECT_ROOT_PATH, "core", "tests", "files", "lepton_grab_face.csv"))
+
+# code run by each process, prints the time taken by each step
+CHILD_CODE = """
+import time
+start = time.perf_counter()
+import json, sys
+from core.fever_monitor import FeverMonitor
+from core.lepton import load_frame
+imported = time.perf_counter()
+fever_monitor = FeverMonitor(yolo_model=sys.argv[1], inference_engine=sys.argv[2],
+                             model_cache=sys.argv[3] == "1", use_camera=False)
+loaded = time.perf_counter()
+image, faces = fever_monitor.process_frame(load_frame(sys.argv[4]))
+first_frame = time.perf_counter()
+print(json.dumps({"import": imported - start, "load": loaded - imported, "first frame": first_frame - loaded,
+                  "total": first_frame - start}))
+"""
+
+# (name, inference engine, model cache) of each configuration timed
+CONFIGURATIONS = [
+    ("OpenCV", "OpenCV", False),
+    ("ONNX Runtime", "ONNX Runtime", False),
+    ("ONNX Runtime (cached)", "ONNX Runtime", True)]
+
+
+def time_startup(model, engine, cache):
+    """
+    Returns the time taken by each step of a cold start in seconds.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE, model, engine, "1" if cache else "0", TEST_FRAME_PATH],
+        cwd=PROJECT_ROOT_PATH, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the fever monitor cold start.")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # the first cached run creates the cached model
+    first = time_startup(args.model, "ONNX Runtime", True)
+    print("First run with the model cache (creating it if needed): {:.0f} ms".format(first["total"] * 1e3))
+
+    steps = ["import", "load", "first frame", "total"]
+    print("{:<24} {}".format("Configuration", " ".join("{:>12}".format(s) for s in steps)))
+    for name, engine, cache in CONFIGURATIONS:
+        runs = [time_startup(args.model, engine, cache) for _ in range(args.repeats)]
+        print("{:<24} {}".format(name, " ".join(
+            "{:>9.0f} ms".format(np.median([r[s] for r in runs]) * 1e3) for s in steps)))
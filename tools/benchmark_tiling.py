@@ -0,0 +1,112 @@
+# --------------------- #
+#   Benchmark Tiling    #
+# --------------------- #
+"""
+Compares tiled inference with per-tile inference.
+
+Builds large inputs by stitching the sample images used by the
+unit tests into grids and by upscaling them, then times for each
+inference engine:
+    Whole       the image resized to the network size
+    Per tile    one network call per tile, then merged
+    Batched     every tile in one network call (see
+                YoloInference.set_tiling)
+Tiles are the network size. Prints the median time of each
+method and the number of faces each detects.
+"""
+import argparse
+import time
+import os
+
+import numpy as np
+import cv2
+
+from core.fever_monitor import inference_engines
+from core.inference import suppress_boxes
+from tools.benchmark_inference import create_inference, SAMPLE_IMAGES_PATH
+
+
+def build_inputs(images):
+    """
+    Returns (name, image) pairs of large inputs.
+    """
+    inputs = []
+    for n in (2, 3):
+        grid = [images[(r * n + c) % len(images)] for r in range(n) for c in range(n)]
+        inputs.append(("{0}x{0} stitched".format(n), np.vstack([np.hstack(grid[r * n:(r + 1) * n]) for r in range(n)])))
+    for scale in (2, 4):
+        inputs.append(("{}x upscaled".format(scale), cv2.resize(images[0], None, fx=scale, fy=scale)))
+    return inputs
+
+
+def run_per_tile(inf, image, tiles, threshold):
+    """
+    Runs each tile through the network separately and merges the
+    detections, as tiling without batching would.
+    """
+    inf.set_tiling()
+    boxes, confidences, class_ids = [], [], []
+    for x, y, w, h in tiles:
+        inf.load_image(np.ascontiguousarray(image[y:y + h, x:x + w]))
+        detections, _ = inf.run(threshold=threshold, nms_threshold=1.0)
+        boxes.extend([d.x + x, d.y + y, d.w, d.h] for d in detections)
+        confidences.extend(d.confidence for d in detections)
+        class_ids.extend(d.class_id for d in detections)
+    return suppress_boxes(np.array(boxes).reshape(-1, 4), np.array(confidences, dtype=np.float32),
+                          np.array(class_ids, dtype=int), threshold)
+
+
+def median_time(function, repeats):
+    """
+    Returns the result of a function and the median time taken
+    to run it in seconds.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, np.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare tiled and per-tile inference.")
+    parser.add_argument("--model", default="Lightweight")
+    parser.add_argument("--engines", nargs="*", default=inference_engines)
+    parser.add_argument("--threads", type=int, default=0,
+                        help="ONNX Runtime thread count (0 lets ONNX Runtime decide)")
+    parser.add_argument("--overlap", type=float, default=0.25)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    images = [cv2.imread(os.path.join(SAMPLE_IMAGES_PATH, f))
+              for f in sorted(os.listdir(SAMPLE_IMAGES_PATH)) if '.jpg' in f]
+
+    print("{:<14} {:<14} {:>6} {:>16} {:>16} {:>16}".format(
+        "Engine", "Input", "Tiles", "Whole", "Per tile", "Batched"))
+    for engine in args.engines:
+        inf = create_inference(args.model, engine, args.threads)
+        for name, image in build_inputs(images):
+            inf.load_image(image)
+            inf.run(threshold=args.threshold)
+
+            def run_whole():
+                inf.set_tiling()
+                inf.load_image(image)
+                return inf.run(threshold=args.threshold)[0]
+
+            def run_batched():
+                inf.set_tiling(inf._network_width, inf._network_height, args.overlap)
+                inf.load_image(image)
+                return inf.run(threshold=args.threshold)[0]
+
+            run_batched()
+            tiles = inf.get_tiles()
+            whole, whole_time = median_time(run_whole, args.repeats)
+            per_tile, per_tile_time = median_time(
+                lambda: run_per_tile(inf, image, tiles, args.threshold), args.repeats)
+            batched, batched_time = median_time(run_batched, args.repeats)
+            print("{:<14} {:<14} {:>6} {}".format(engine, name, len(tiles), " ".join(
+                "{:>7.1f} ms ({:>3})".format(t * 1e3, len(d)) for t, d in (
+                    (whole_time, whole), (per_tile_time, per_tile), (batched_time, batched)))))
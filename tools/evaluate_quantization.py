@@ -0,0 +1,146 @@
+# ----------------------- #
+#  Evaluate Quantization  #
+# ----------------------- #
+"""
+Reports the accuracy and speed of the INT8 Lightweight model
+against the FP32 Lightweight model.
+
+Runs both ONNX models over a labelled set and prints the
+precision, recall and average precision (AP at an IoU of 0.5
+by default) alongside the mean inference time of each model.
+
+The labelled set is a directory of images ('.jpg'/'.png') or
+raw Lepton frames ('.npy'/'.csv'), each with a Darknet label
+file of the same name ('.txt', one 'class x_centre y_centre
+width height' line per face, relative to the image size).
+"""
+import argparse
+import time
+import os
+
+import numpy as np
+from cv2 import imread
+
+from core.fever_monitor import (get_model_file_path,
+                                YOLO_FILES_PATH,
+                                INFERENCE_COLORMAP_INDEX,
+                                NETWORK_WIDTH,
+                                NETWORK_HEIGHT)
+from core.boxes import box_iou
+from core.image_processing import to_color_img_array
+from core.inference import OnnxInference
+from core.lepton import load_frame
+
+
+def load_labelled_set(path):
+    """
+    Returns a list of (image array, ground truth boxes) pairs.
+    """
+    samples = []
+    for file_name in sorted(os.listdir(path)):
+        name, extension = os.path.splitext(file_name)
+        label_path = os.path.join(path, name + '.txt')
+        if extension.lower() not in ('.jpg', '.png', '.npy', '.csv') or not os.path.isfile(label_path):
+            continue
+
+        if extension.lower() in ('.npy', '.csv'):
+            img = to_color_img_array(arr=load_frame(os.path.join(path, file_name)),
+                                     colormap_index=INFERENCE_COLORMAP_INDEX)
+        else:
+            img = imread(os.path.join(path, file_name))
+
+        # convert relative centre boxes to top-left pixel boxes
+        height, width = img.shape[:2]
+        with open(label_path) as f:
+            labels = np.array([line.split() for line in f if line.strip()], dtype=float).reshape(-1, 5)
+        boxes = np.stack([(labels[:, 1] - labels[:, 3] / 2) * width,
+                          (labels[:, 2] - labels[:, 4] / 2) * height,
+                          labels[:, 3] * width,
+                          labels[:, 4] * height], axis=1)
+        samples.append((img, boxes))
+    return samples
+
+
+def evaluate(inf, samples, threshold, iou_threshold):
+    """
+    Returns the precision, recall, AP and inference times of a model.
+    """
+    confidences = []
+    true_positives = []
+    times = []
+    num_ground_truths = 0
+
+    for img, ground_truths in samples:
+        inf.load_image(img)
+        start = time.perf_counter()
+        detections, _ = inf.run(threshold=threshold)
+        times.append(time.perf_counter() - start)
+
+        # match detections to ground truths, most confident first
+        num_ground_truths += len(ground_truths)
+        matched = np.zeros(len(ground_truths), dtype=bool)
+        for d in sorted(detections, key=lambda d: d.confidence, reverse=True):
+            confidences.append(d.confidence)
+            if len(ground_truths) == 0:
+                true_positives.append(False)
+                continue
+            ious = box_iou(np.array([[d.x, d.y, d.w, d.h]]), ground_truths)[0]
+            ious[matched] = 0
+            best = int(np.argmax(ious))
+            hit = ious[best] >= iou_threshold
+            if hit:
+                matched[best] = True
+            true_positives.append(hit)
+
+    # precision-recall curve over all detections
+    order = np.argsort(confidences)[::-1]
+    tp = np.cumsum(np.array(true_positives, dtype=float)[order])
+    fp = np.cumsum(1 - np.array(true_positives, dtype=float)[order])
+    recall = tp / max(num_ground_truths, 1)
+    precision = tp / np.maximum(tp + fp, 1e-9)
+
+    # all-point interpolated average precision
+    ap = 0.0
+    if len(order) > 0:
+        r = np.concatenate([[0.0], recall, [1.0]])
+        p = np.concatenate([[1.0], precision, [0.0]])
+        p = np.maximum.accumulate(p[::-1])[::-1]
+        ap = float(np.sum((r[1:] - r[:-1]) * p[1:]))
+
+    return {
+        "precision": precision[-1] if len(order) > 0 else 0.0,
+        "recall": recall[-1] if len(order) > 0 else 0.0,
+        "ap": ap,
+        "times": np.array(times)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the INT8 and FP32 Lightweight models.")
+    parser.add_argument("labelled", help="directory of labelled images or thermal frames")
+    parser.add_argument("--threshold", type=float, default=0.3, help="confidence threshold")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU threshold for a true positive")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="ONNX Runtime thread count (0 lets ONNX Runtime decide)")
+    args = parser.parse_args()
+
+    samples = load_labelled_set(args.labelled)
+    print("Evaluating {} labelled samples...".format(len(samples)))
+
+    results = {}
+    for name, model in (("FP32", "Lightweight"), ("INT8", "Lightweight INT8")):
+        inf = OnnxInference(
+            onnx_path=get_model_file_path(model, "onnx"),
+            labels_path=os.path.join(YOLO_FILES_PATH, "obj.names"),
+            num_threads=args.threads)
+        inf.set_network_dimensions(NETWORK_WIDTH, NETWORK_HEIGHT)
+        results[name] = evaluate(inf, samples, args.threshold, args.iou)
+
+    print("{:<6} {:>10} {:>8} {:>8} {:>10} {:>8}".format(
+        "Model", "Precision", "Recall", "AP", "Mean (ms)", "FPS"))
+    for name, result in results.items():
+        print("{:<6} {:>10.3f} {:>8.3f} {:>8.3f} {:>10.2f} {:>8.1f}".format(
+            name, result["precision"], result["recall"], result["ap"],
+            result["times"].mean() * 1000, 1 / result["times"].mean()))
+    print("INT8 speed-up: {:.2f}x, AP change: {:+.3f}".format(
+        results["FP32"]["times"].mean() / results["INT8"]["times"].mean(),
+        results["INT8"]["ap"] - results["FP32"]["ap"]))
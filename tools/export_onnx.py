@@ -0,0 +1,28 @@
+# --------------------- #
+#   Export ONNX Models  #
+# --------------------- #
+"""
+Converts the Standard and Lightweight Darknet YOLO models
+to ONNX files for use with core.inference.OnnxInference.
+
+The ONNX files are written next to the Darknet weights:
+    yolo/Standard/yolo-obj_best.onnx
+    yolo/Lightweight/tiny_yolo_3l_best.onnx
+"""
+import argparse
+
+from core.fever_monitor import get_model_file_path
+from core.onnx_export import export_onnx
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Darknet YOLO models to ONNX.")
+    parser.add_argument("models", nargs="*", default=["Standard", "Lightweight"],
+                        help="models to export: Standard and/or Lightweight (default: both)")
+    args = parser.parse_args()
+
+    for model in args.models:
+        onnx_path = export_onnx(
+            cfg_path=get_model_file_path(model, "cfg"),
+            weights_path=get_model_file_path(model, "weights"),
+            onnx_path=get_model_file_path(model, "onnx"))
+        print("Exported '{}' model to '{}'".format(model, onnx_path))
@@ -0,0 +1,79 @@
+# --------------------- #
+#    Profile Memory     #
+# --------------------- #
+"""
+Reports the net memory growth per frame of the fever monitor.
+
+Processes the frames of a recording (a directory of raw Lepton
+frames or a stacked '.npy' file, as tools.batch_process), or
+the frame used by the unit tests repeatedly, with memory
+tracking enabled (see FeverMonitor.set_memory_tracking). The
+results of the latest frames can be held, as the GUI holds
+images and faces in queued signals and pixmaps. Prints each
+memory report, then the net growth of the traced memory per
+frame over the whole run, and the time taken per frame with and
+without tracking.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.fever_monitor import FeverMonitor
+from core.lepton import load_frame
+from tools.benchmark_adaptive_resolution import load_frames, TEST_FRAME_PATH
+
+
+def run_frames(fever_monitor, frames, num_frames, hold):
+    """
+    Processes frames in a loop and returns the mean time taken
+    per frame in seconds and the memory reports made.
+    """
+    held = []
+    reports = []
+    start = time.perf_counter()
+    for i in range(num_frames):
+        held.append(fever_monitor.process_frame(frames[i % len(frames)]))
+        # faces are read as the GUI does, creating the face images
+        for face in held[-1][1]:
+            face.img
+        del held[:-hold or len(held)]
+        report = fever_monitor.pop_memory_report()
+        if report is not None:
+            reports.append(report)
+    return (time.perf_counter() - start) / num_frames, reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the net memory growth per frame of the fever monitor.")
+    parser.add_argument("recording", nargs="?", default=None,
+                        help="directory of raw Lepton frames or a stacked '.npy' file")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--engine", default="OpenCV")
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--frames", type=int, default=500, help="number of frames processed")
+    parser.add_argument("--interval", type=int, default=100, help="frames between memory reports")
+    parser.add_argument("--hold", type=int, default=0, help="number of latest results held")
+    args = parser.parse_args()
+
+    frames = load_frames(args.recording) if args.recording else [load_frame(TEST_FRAME_PATH)]
+
+    fever_monitor = FeverMonitor(yolo_model=args.model, inference_engine=args.engine,
+                                 confidence_threshold=args.confidence, use_camera=False)
+    fever_monitor.process_frame(frames[0])
+    untracked_time, _ = run_frames(fever_monitor, frames, min(args.frames, args.interval), args.hold)
+
+    fever_monitor.set_memory_tracking(args.interval)
+    tracked_time, reports = run_frames(fever_monitor, frames, args.frames, args.hold)
+    fever_monitor.set_memory_tracking(0)
+
+    for report in reports:
+        print(report)
+    if reports:
+        # the first interval includes memory allocated once (caches, buffers)
+        steady = reports[1:] or reports
+        print("Traced memory: {:.1f} MiB to {:.1f} MiB, net {:+.2f} KiB per frame after the first report".format(
+            reports[0].traced / 2 ** 20, reports[-1].traced / 2 ** 20,
+            np.mean([r.net_bytes_per_frame for r in steady]) / 1024))
+    print("Per frame: {:.1f} ms without tracking, {:.1f} ms with tracking".format(
+        untracked_time * 1e3, tracked_time * 1e3))
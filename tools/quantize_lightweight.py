@@ -0,0 +1,65 @@
+# --------------------- #
+#  Quantize Lightweight #
+# --------------------- #
+"""
+Quantizes the Lightweight YOLO model to INT8.
+
+Calibrates the quantization using recorded thermal frames
+(raw Lepton frames saved as '.npy' or '.csv' files), which
+are pre-processed the same way as in FeverMonitor.run. The
+ONNX model must first be exported using tools/export_onnx.py.
+
+The quantized model is written to:
+    yolo/Lightweight/tiny_yolo_3l_int8.onnx
+and can be selected using the "Lightweight INT8" model name.
+"""
+import argparse
+import os
+
+from core.fever_monitor import (get_model_file_path,
+                                INFERENCE_COLORMAP_INDEX,
+                                NETWORK_WIDTH,
+                                NETWORK_HEIGHT)
+from core.image_processing import to_color_img_array
+from core.inference import to_blob
+from core.lepton import load_frame
+from core.onnx_export import quantize_model
+
+
+def load_calibration_blobs(frames_path, max_frames):
+    """
+    Loads recorded thermal frames and converts them to network input blobs.
+    """
+    file_names = sorted(f for f in os.listdir(frames_path)
+                        if os.path.splitext(f)[1].lower() in ('.npy', '.csv'))
+    if max_frames > 0:
+        # spread the frames used across the whole recording
+        step = max(1, len(file_names) // max_frames)
+        file_names = file_names[::step][:max_frames]
+
+    blobs = []
+    for file_name in file_names:
+        frame = load_frame(os.path.join(frames_path, file_name))
+        color_arr = to_color_img_array(arr=frame, colormap_index=INFERENCE_COLORMAP_INDEX)
+        blobs.append(to_blob(color_arr, NETWORK_WIDTH, NETWORK_HEIGHT))
+    return blobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize the Lightweight YOLO model to INT8.")
+    parser.add_argument("frames", help="directory of recorded thermal frames (.npy or .csv)")
+    parser.add_argument("--max-frames", type=int, default=200,
+                        help="maximum number of frames used for calibration (0 uses all)")
+    parser.add_argument("--quantize-output-layers", action="store_true",
+                        help="also quantize the convolutions feeding the YOLO layers")
+    args = parser.parse_args()
+
+    blobs = load_calibration_blobs(args.frames, args.max_frames)
+    print("Calibrating using {} frames...".format(len(blobs)))
+
+    output_path = quantize_model(
+        onnx_path=get_model_file_path("Lightweight", "onnx"),
+        output_path=get_model_file_path("Lightweight INT8", "onnx"),
+        calibration_blobs=blobs,
+        quantize_output_layers=args.quantize_output_layers)
+    print("Quantized model written to '{}'".format(output_path))
@@ -0,0 +1,245 @@
+# --------------------- #
+#       Soak Test       #
+# --------------------- #
+"""
+Runs the fever monitor for a long time and flags regressions.
+
+Drives FeverMonitor.run as fast as possible with the Lepton
+camera replaced by frames replayed from a recording (a directory
+of raw Lepton frames or a stacked '.npy' file, as
+tools.batch_process) or the frame used by the unit tests, so the
+capture, inference, measurement and rendering code all run as
+they do with a camera. Face images are created and the latest
+results are held, as the GUI does.
+
+Every sample interval it prints (and optionally writes to a CSV
+file) the throughput, the frame time percentiles, the resident
+memory (RSS), the number of open file descriptors and threads,
+and the number of frames that raised an error. At the end a
+line is fitted to each over time (ignoring the warm-up samples)
+and these are flagged:
+    frame time drift  the median frame time grew by more than
+                      --max-drift (a fraction) over the run
+    memory growth     RSS grew faster than --max-memory-growth
+                      MiB per hour
+    descriptor leak   more descriptors open at the end than
+                      after the warm-up
+    errors            any frame raised an error
+The exit code is 1 if anything was flagged.
+
+RSS and descriptors are read from /proc (Linux). On other
+platforms RSS is the peak RSS (not counted on Windows) and
+descriptors are not counted.
+"""
+import argparse
+import threading
+import time
+import csv
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+from core.fever_monitor import FeverMonitor, inference_engines
+from core.lepton import load_frame
+from tools.benchmark_adaptive_resolution import load_frames, TEST_FRAME_PATH
+
+# frame time percentiles recorded in each sample
+PERCENTILES = (50, 95, 99)
+
+# columns of each sample
+SAMPLE_COLUMNS = ["elapsed_s", "frames", "fps"] + ["p{}_ms".format(p) for p in PERCENTILES] + [
+    "max_ms", "rss_mib", "open_fds", "threads", "errors"]
+
+
+def rss_mib():
+    """
+    Returns the resident memory of this process in MiB (the peak
+    resident memory where /proc is not available), or None where
+    neither is available.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def open_fds():
+    """
+    Returns the number of file descriptors open in this process,
+    or None where /proc is not available.
+    """
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+class FrameReplay:
+    """
+    Replaces Lepton.grab, returning the frames in a loop.
+
+    Patched in as a plain function rather than a mock, as mocks
+    keep every call made to them, which would grow the memory.
+    """
+
+    def __init__(self, frames):
+        self._frames = frames
+        self._index = 0
+
+    def grab(self, camera, device_id=None):
+        frame = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        return frame
+
+
+def fit_change(times, values):
+    """
+    Returns the value at the first time and the change over the
+    times of a line fitted to values.
+    """
+    slope, intercept = np.polyfit(times, values, 1)
+    return slope * times[0] + intercept, slope * (times[-1] - times[0])
+
+
+def find_regressions(samples, warm_up, max_drift, max_memory_growth):
+    """
+    Returns a description of each regression found in the samples
+    after the warm-up samples.
+    """
+    regressions = []
+    if samples[-1]["errors"]:
+        regressions.append("{} frames raised an error".format(samples[-1]["errors"]))
+
+    steady = samples[warm_up:]
+    if len(steady) < 2:
+        return regressions + ["too few samples to fit (run for longer or lower --interval)"]
+    hours = np.array([s["elapsed_s"] for s in steady]) / 3600
+
+    start, change = fit_change(hours, [s["p50_ms"] for s in steady])
+    if start > 0 and change / start > max_drift:
+        regressions.append("median frame time drifted from {:.1f} ms to {:.1f} ms ({:+.0%})".format(
+            start, start + change, change / start))
+
+    if steady[0]["rss_mib"] is not None:
+        start, change = fit_change(hours, [s["rss_mib"] for s in steady])
+        growth = change / (hours[-1] - hours[0])
+        if growth > max_memory_growth:
+            regressions.append("RSS grew by {:.1f} MiB per hour ({:.1f} MiB to {:.1f} MiB)".format(
+                growth, start, start + change))
+
+    if steady[0]["open_fds"] is not None and steady[-1]["open_fds"] > steady[0]["open_fds"]:
+        regressions.append("open file descriptors grew from {} to {}".format(
+            steady[0]["open_fds"], steady[-1]["open_fds"]))
+    return regressions
+
+
+def soak(fever_monitor, duration, interval, hold, on_sample):
+    """
+    Runs the fever monitor for a duration in seconds and returns
+    a sample of the results every interval seconds (passing each
+    to on_sample as it is taken).
+    """
+    samples = []
+    held = []
+    frames = errors = 0
+    frame_times = []
+    start = last_sample = time.perf_counter()
+    while True:
+        frame_start = time.perf_counter()
+        try:
+            held.append(fever_monitor.run())
+            # faces are read as the GUI does, creating the face images
+            for face in held[-1][1]:
+                face.img
+            del held[:-hold or len(held)]
+        except Exception as e:
+            errors += 1
+            print("Frame {} failed: {}".format(frames, e))
+        now = time.perf_counter()
+        frame_times.append(now - frame_start)
+        frames += 1
+
+        if now - last_sample >= interval or now - start >= duration:
+            times_ms = np.array(frame_times) * 1e3
+            sample = dict(zip(SAMPLE_COLUMNS, [
+                now - start, frames, len(frame_times) / (now - last_sample)]
+                + [np.percentile(times_ms, p) for p in PERCENTILES]
+                + [times_ms.max(), rss_mib(), open_fds(), threading.active_count(), errors]))
+            samples.append(sample)
+            on_sample(sample)
+            frame_times = []
+            last_sample = now
+            if now - start >= duration:
+                return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fever monitor for a long time and flag regressions.")
+    parser.add_argument("recording", nargs="?", default=None,
+                        help="directory of raw Lepton frames or a stacked '.npy' file")
+    parser.add_argument("--hours", type=float, default=1.0, help="duration of the test")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between samples")
+    parser.add_argument("--warm-up", type=int, default=1, help="samples ignored when looking for regressions")
+    parser.add_argument("--model", default="Standard")
+    parser.add_argument("--engine", default="OpenCV", choices=inference_engines)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--hold", type=int, default=2, help="number of latest results held")
+    parser.add_argument("--memory-tracking", type=int, default=0,
+                        help="frames between memory reports (see FeverMonitor.set_memory_tracking), 0 to disable")
+    parser.add_argument("--max-drift", type=float, default=0.1,
+                        help="largest increase in the median frame time allowed, as a fraction")
+    parser.add_argument("--max-memory-growth", type=float, default=5.0,
+                        help="largest RSS growth allowed in MiB per hour")
+    parser.add_argument("--output", default=None, help="CSV file the samples are written to")
+    args = parser.parse_args()
+
+    frames = load_frames(args.recording) if args.recording else [load_frame(TEST_FRAME_PATH)]
+    replay = FrameReplay([np.ascontiguousarray(f, dtype=np.uint16) for f in frames])
+
+    output = open(args.output, "w", newline="") if args.output else None
+    writer = csv.DictWriter(output, fieldnames=SAMPLE_COLUMNS) if output else None
+    if writer:
+        writer.writeheader()
+
+    print(" ".join("{:>10}".format(c) for c in SAMPLE_COLUMNS))
+
+    def print_sample(sample):
+        print(" ".join("{:>10}".format("-" if v is None else "{:.1f}".format(v) if isinstance(v, float) else v)
+                       for v in sample.values()))
+        if writer:
+            writer.writerow(sample)
+            output.flush()
+
+    try:
+        with patch('flirpy.camera.lepton.Lepton.find_video_device', new=lambda camera: 0), \
+                patch('flirpy.camera.lepton.Lepton.grab', new=replay.grab):
+            fever_monitor = FeverMonitor(yolo_model=args.model, inference_engine=args.engine,
+                                         confidence_threshold=args.confidence,
+                                         memory_tracking=args.memory_tracking)
+            samples = soak(fever_monitor, args.hours * 3600, args.interval, args.hold, print_sample)
+    finally:
+        if output:
+            output.close()
+
+    report = fever_monitor.pop_memory_report()
+    if report is not None:
+        print(report)
+
+    regressions = find_regressions(samples, args.warm_up, args.max_drift, args.max_memory_growth)
+    for regression in regressions:
+        print("REGRESSION: " + regression)
+    if not regressions:
+        print("No regressions found over {:.2f} hours ({} frames)".format(args.hours, samples[-1]["frames"]))
+    sys.exit(1 if regressions else 0)